@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from toto_core import NUM_SPACE, number_histogram
+from number_features import pattern_matrix
+from decay_model import DecayFrequencyModel
+import consensus
+
+_PATTERN_NAMES, _PATTERNS = pattern_matrix()
+
+
+def number_features(history: np.ndarray, recent: int = 100, half_life: float = 200) -> Tuple[List[str], np.ndarray]:
+    """(names, (10000, features)) describing every number as of the end of `history`
+
+    Frequency, recent frequency, gap since last seen, decayed weight,
+    positional digit log-probability and the structural pattern classes.
+    Only `history` is used, so rows can be built at any walk-forward cutoff.
+    """
+    n_draws = len(history)
+    counts = number_histogram(history).astype(np.float64)
+    recent_counts = number_histogram(history[-recent:]).astype(np.float64)
+
+    rows, cols = np.nonzero(history >= 0)
+    last_seen = np.full(NUM_SPACE, -1, dtype=np.int64)
+    last_seen[history[rows, cols].astype(np.int64)] = rows      # rows ascend, so the last write wins
+    per_draw = max((history >= 0).sum() / max(n_draws, 1), 1.0)
+    gap = np.where(last_seen >= 0, n_draws - 1 - last_seen, n_draws) * per_draw / NUM_SPACE
+
+    decayed = DecayFrequencyModel(half_life).rebuild(history).number_scores() if n_draws else np.zeros(NUM_SPACE)
+
+    names = ['log_count', 'log_recent', 'gap', 'log_decayed', 'digit_log_prob']
+    columns = [np.log1p(counts), np.log1p(recent_counts), np.log1p(gap), np.log1p(decayed),
+               consensus.score_digit(consensus.history_statistics(history))]
+    names += [f"pattern_{n}" for n in _PATTERN_NAMES]
+    return names, np.column_stack(columns + [_PATTERNS.astype(np.float64)])
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+class LogisticBaseline:
+    """L2-regularized logistic regression of "drawn in the next `horizon` draws"
+
+    Trained walk-forward: at each cutoff the features use only the draws
+    before it and the label is whether the number appears in the following
+    `horizon` draws. Fitting is Newton's method on the stacked examples (a
+    handful of (features x features) solves); scoring all 10000 numbers is
+    one matrix-vector product.
+    """
+
+    def __init__(self, l2: float = 1.0, horizon: int = 50, recent: int = 100, half_life: float = 200):
+        self.l2 = l2
+        self.horizon = horizon
+        self.recent = recent
+        self.half_life = half_life
+        self.names = None
+        self.weights = None
+        self.mean = None
+        self.scale = None
+
+    def _features(self, history: np.ndarray) -> np.ndarray:
+        self.names, x = number_features(history, self.recent, self.half_life)
+        return x
+
+    def training_set(self, draws: np.ndarray, cutoffs) -> Tuple[np.ndarray, np.ndarray]:
+        xs, ys = [], []
+        for cut in cutoffs:
+            xs.append(self._features(draws[:cut]))
+            ys.append(number_histogram(draws[cut:cut + self.horizon]) > 0)
+        return np.vstack(xs), np.concatenate(ys).astype(np.float64)
+
+    def fit(self, draws: np.ndarray, n_cutoffs: int = 20, step: int = None, iterations: int = 25):
+        """Train on `n_cutoffs` walk-forward cutoffs spaced `step` draws apart (default: horizon)"""
+        step = step or self.horizon
+        last = len(draws) - self.horizon
+        cutoffs = [c for c in range(last, 0, -step)][:n_cutoffs][::-1]
+        cutoffs = [c for c in cutoffs if c >= self.recent]
+        if not cutoffs:
+            raise ValueError("not enough draws for walk-forward training")
+
+        x, y = self.training_set(draws, cutoffs)
+        self.mean = x.mean(axis=0)
+        self.scale = x.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        x = np.column_stack([np.ones(len(x)), (x - self.mean) / self.scale])
+
+        w = np.zeros(x.shape[1])
+        penalty = np.full(x.shape[1], self.l2)
+        penalty[0] = 0.0                                         # intercept is not regularized
+        for _ in range(iterations):
+            p = _sigmoid(x @ w)
+            grad = x.T @ (p - y) + penalty * w
+            hessian = (x * (p * (1 - p))[:, None]).T @ x + np.diag(penalty)
+            step_w = np.linalg.solve(hessian, grad)
+            w -= step_w
+            if np.abs(step_w).max() < 1e-8:
+                break
+        self.weights = w
+        return self
+
+    def scores(self, history: np.ndarray) -> np.ndarray:
+        """(10000,) log-odds of appearing in the next `horizon` draws"""
+        if self.weights is None:
+            raise ValueError("model is not fitted")
+        x = (self._features(history) - self.mean) / self.scale
+        return x @ self.weights[1:] + self.weights[0]
+
+    def probabilities(self, history: np.ndarray) -> np.ndarray:
+        return _sigmoid(self.scores(history))
+
+    def coefficients(self) -> Dict[str, float]:
+        return dict(zip(['intercept'] + self.names, (float(w) for w in self.weights)))
+
+
+def backtest(draws: np.ndarray, folds: int = 10, horizon: int = 50, top_k: int = 100,
+             model_kwargs: Dict = None, train_cutoffs: int = 20) -> Dict[str, float]:
+    """Walk-forward top-k lift of the baseline next to the 11 rule-based scorers
+
+    Same protocol as consensus.fit_weights: at every cutoff each method
+    scores all numbers from the draws before it, and its lift is the hits
+    of its top_k over the next `horizon` draws divided by chance. The
+    baseline is retrained at every cutoff on earlier draws only.
+    """
+    n_draws = len(draws)
+    first = max(horizon * 2, n_draws - folds * horizon)
+    cutoffs = list(range(first, n_draws - horizon + 1, horizon))[-folds:]
+    names = list(consensus.SCORERS)
+
+    lift = {name: 0.0 for name in ['Logistic Baseline'] + names}
+    for cut in cutoffs:
+        history = draws[:cut]
+        future = number_histogram(draws[cut:cut + horizon])
+        expected = max(future.sum() / NUM_SPACE * top_k, 1e-9)
+
+        model = LogisticBaseline(horizon=horizon, **(model_kwargs or {})).fit(history, train_cutoffs)
+        ranked = {'Logistic Baseline': model.scores(history)}
+        _, matrix = consensus.score_matrix(history, names)
+        ranked.update(zip(names, matrix))
+
+        for name, score in ranked.items():
+            top = np.argsort(-score, kind='stable')[:top_k]
+            lift[name] += future[top].sum() / expected
+
+    return {name: value / max(len(cutoffs), 1) for name, value in lift.items()}
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from toto_core import NUM_SPACE, number_histogram, digit_matrix
+
+# Per-process copy of the arrays the workers resample (set by _init_worker)
+_SHARED = {}
+
+
+def draw_digit_counts(draws: np.ndarray) -> np.ndarray:
+    """(draws, 10) how often each digit appears (any position) in every draw"""
+    rows, cols = np.nonzero(draws >= 0)
+    digits = digit_matrix(draws[rows, cols]).astype(np.int64)
+    counts = np.zeros((len(draws), 10), dtype=np.int64)
+    np.add.at(counts, (np.repeat(rows, 4), digits.ravel()), 1)
+    return counts
+
+
+def hot_cold_digit_labels(digit_counts: np.ndarray) -> np.ndarray:
+    """+1 hot / -1 cold / 0 for each digit, rows of (..., 10) counts (get_hot_cold_digits rule)"""
+    avg = digit_counts.sum(axis=-1, keepdims=True) / 10
+    return (digit_counts > avg * 1.2).astype(np.int8) - (digit_counts < avg * 0.8).astype(np.int8)
+
+
+def _init_worker(flat_numbers, flat_rows, digit_counts, tracked, hot_cut, cold_cut, digit_labels):
+    _SHARED.update(flat_numbers=flat_numbers, flat_rows=flat_rows, digit_counts=digit_counts,
+                   tracked=tracked, hot_cut=hot_cut, cold_cut=cold_cut, digit_labels=digit_labels)
+
+
+def _run_resamples(seeds, sizes) -> Dict[str, np.ndarray]:
+    """Resample draws batch by batch (one seed per batch), keeping only running aggregates
+
+    Per resample only the draw multiplicities are drawn; number counts are
+    one weighted bincount over the flattened history and digit counts one
+    matrix-vector product. Only the tracked numbers keep their per-resample
+    counts (for percentile intervals), so memory is O(batch * draws +
+    resamples * tracked), not O(resamples * 10000).
+    """
+    s = _SHARED
+    n_draws = len(s['digit_counts'])
+    n_resamples = sum(sizes)
+
+    hot_hits = np.zeros(NUM_SPACE, dtype=np.int64)
+    cold_hits = np.zeros(NUM_SPACE, dtype=np.int64)
+    total = np.zeros(NUM_SPACE)
+    total_sq = np.zeros(NUM_SPACE)
+    tracked_samples = np.empty((n_resamples, len(s['tracked'])))
+    digit_samples = np.empty((n_resamples, 10))
+    digit_same = np.zeros(10, dtype=np.int64)
+
+    done = 0
+    for seed, size in zip(seeds, sizes):
+        rng = np.random.default_rng(seed)
+        # multiplicity of every draw in each resample: (size, draws)
+        picks = rng.integers(0, n_draws, size=(size, n_draws))
+        slots = (picks + (np.arange(size) * n_draws)[:, None]).ravel()
+        weights = np.bincount(slots, minlength=size * n_draws).reshape(size, n_draws).astype(np.float64)
+
+        for i in range(size):
+            counts = np.bincount(s['flat_numbers'], weights=weights[i][s['flat_rows']], minlength=NUM_SPACE)
+            hot_hits += counts >= s['hot_cut']
+            cold_hits += counts <= s['cold_cut']
+            total += counts
+            total_sq += counts * counts
+            tracked_samples[done + i] = counts[s['tracked']]
+
+        digits = weights @ s['digit_counts']
+        digit_samples[done:done + size] = digits
+        digit_same += (hot_cold_digit_labels(digits) == s['digit_labels']).sum(axis=0)
+        done += size
+
+    return {'hot_hits': hot_hits, 'cold_hits': cold_hits, 'total': total, 'total_sq': total_sq,
+            'tracked_samples': tracked_samples, 'digit_samples': digit_samples,
+            'digit_same': digit_same, 'n': n_resamples}
+
+
+class BootstrapResult:
+    """Confidence intervals and stability of the hot / cold labels
+
+    stability of a hot number is the share of resamples in which its count
+    still reaches the original hot cut-off (the count of the top_n-th
+    number); likewise for cold numbers and the cold cut-off. A digit's
+    stability is the share of resamples that give it the same
+    hot / cold / neutral label.
+    """
+
+    def __init__(self, counts, hot, cold, digit_counts, digit_labels, parts: List[Dict], level: float):
+        n = sum(p['n'] for p in parts)
+        self.resamples = n
+        self.level = level
+        self.counts = counts
+        self.hot = hot
+        self.cold = cold
+        self.hot_stability = sum(p['hot_hits'] for p in parts) / n
+        self.cold_stability = sum(p['cold_hits'] for p in parts) / n
+        self.mean = sum(p['total'] for p in parts) / n
+        self.std = np.sqrt(np.maximum(sum(p['total_sq'] for p in parts) / n - self.mean ** 2, 0))
+
+        tail = (1 - level) / 2 * 100
+        tracked = np.concatenate([p['tracked_samples'] for p in parts])
+        self.tracked = np.concatenate([hot, cold])
+        self.tracked_interval = np.percentile(tracked, [tail, 100 - tail], axis=0).T
+
+        digits = np.concatenate([p['digit_samples'] for p in parts])
+        self.digit_counts = digit_counts
+        self.digit_labels = digit_labels
+        self.digit_interval = np.percentile(digits, [tail, 100 - tail], axis=0).T
+        self.digit_stability = sum(p['digit_same'] for p in parts) / n
+
+    def interval(self, num):
+        """(low, high) count interval of a tracked number, else a normal approximation"""
+        n = int(num)
+        where = np.nonzero(self.tracked == n)[0]
+        if len(where):
+            return tuple(float(v) for v in self.tracked_interval[where[0]])
+        z = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}.get(self.level, 1.96)
+        return (float(self.mean[n] - z * self.std[n]), float(self.mean[n] + z * self.std[n]))
+
+    def numbers(self, label: str) -> List[dict]:
+        numbers = self.hot if label == 'hot' else self.cold
+        stability = self.hot_stability if label == 'hot' else self.cold_stability
+        return [{'number': f"{n:04d}", 'count': int(self.counts[n]), 'interval': self.interval(n),
+                 'stability': float(stability[n])} for n in numbers]
+
+    def digits(self) -> List[dict]:
+        names = {1: 'hot', -1: 'cold', 0: 'neutral'}
+        return [{'digit': str(d), 'label': names[int(self.digit_labels[d])], 'count': int(self.digit_counts[d]),
+                 'interval': tuple(float(v) for v in self.digit_interval[d]),
+                 'stability': float(self.digit_stability[d])} for d in range(10)]
+
+
+def bootstrap_hot_cold(draws: np.ndarray, top_n: int = 30, n_resamples: int = 1000, workers: int = None,
+                       level: float = 0.95, seed: int = None, batch: int = 32) -> BootstrapResult:
+    """Resample whole draws with replacement and measure how stable hot / cold labels are
+
+    Hot / cold numbers are the top_n most / least frequent drawn numbers
+    (as in hot_cold_analysis_with_predictions); hot / cold digits use the
+    +/-20% rule of get_hot_cold_digits. Every batch of resamples gets its
+    own child seed and batches are split across a process pool (workers=1
+    runs in-process), so a seeded result does not depend on workers.
+    """
+    counts = number_histogram(draws)
+    seen = np.nonzero(counts)[0]
+    order = seen[np.argsort(counts[seen], kind='stable')]
+    hot, cold = order[::-1][:top_n], order[:top_n]
+    hot_cut = counts[hot[-1]] if len(hot) else 0
+    cold_cut = counts[cold[-1]] if len(cold) else 0
+
+    rows, cols = np.nonzero(draws >= 0)
+    digit_counts = draw_digit_counts(draws)
+    digit_total = digit_counts.sum(axis=0)
+    digit_labels = hot_cold_digit_labels(digit_total)
+    init_args = (draws[rows, cols].astype(np.int64), rows, digit_counts.astype(np.float64),
+                 np.concatenate([hot, cold]), hot_cut, cold_cut, digit_labels)
+
+    sizes = [min(batch, n_resamples - start) for start in range(0, n_resamples, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(sizes)))
+    # contiguous runs of batches per worker, so parts come back in batch order
+    bounds = [len(sizes) * i // workers for i in range(workers + 1)]
+    chunks = [slice(lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+
+    if workers == 1:
+        _init_worker(*init_args)
+        parts = [_run_resamples(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            parts = list(pool.map(_run_resamples, [seeds[c] for c in chunks], [sizes[c] for c in chunks]))
+
+    return BootstrapResult(counts, hot, cold, digit_total, digit_labels, parts, level)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+
+from toto_core import NUM_SPACE, number_histogram, digit_matrix
+from number_features import DIGITS, STRUCTURAL_PATTERNS
+from derived_graph import DerivedValues, draw_graph
+from joint_model import JointDigitDistribution
+from snapshot import Snapshot
+
+# Parity / repetition class of every number, used to score the class-based analyses
+_PARITY_CODE = ((DIGITS % 2) * np.array([8, 4, 2, 1])).sum(axis=1)
+_DIGIT_COUNTS = np.sort(np.stack([(DIGITS == v).sum(axis=1) for v in range(10)], axis=1), axis=1)[:, ::-1]
+_REPEAT_CLASS = np.unique(_DIGIT_COUNTS[:, :2] @ np.array([10, 1]), return_inverse=True)[1].ravel()
+_SUMS = DIGITS.sum(axis=1)
+
+# The five kinds of number analysis 7 builds (mirror and palindrome are both ABBA)
+ANALYSIS_PATTERNS = {
+    'Sequentially': STRUCTURAL_PATTERNS['1_Sequential_Up'],
+    'Mirror': STRUCTURAL_PATTERNS['4_Mirror_ABBA'],
+    'Palindrome': STRUCTURAL_PATTERNS['3_Palindrome'],
+    'Interspersed': np.isin(_PARITY_CODE, [0b0101, 0b1010]),
+    'Arithmetic': STRUCTURAL_PATTERNS['13_Aritmatika'],
+}
+
+# Statistics of a bare draw history (no dates), for walk-forward scoring
+_HISTORY = draw_graph()
+
+
+def history_statistics(draws: np.ndarray) -> DerivedValues:
+    """Derived statistics of `draws` alone, computed on first use like an analyzer's"""
+    return _HISTORY.values(Snapshot(draws=np.asarray(draws).view(), draw_dates=None))
+
+
+def _statistics(source) -> DerivedValues:
+    """Scorers read DerivedValues; a plain (n, 23) draw matrix is wrapped"""
+    return source if isinstance(source, DerivedValues) else history_statistics(source)
+
+
+def _class_share(counts: np.ndarray, classes: np.ndarray) -> np.ndarray:
+    """Observed / expected share of each number's class, from per-number counts"""
+    n_classes = int(classes.max()) + 1
+    observed = np.bincount(classes, weights=counts, minlength=n_classes)
+    expected = np.bincount(classes, minlength=n_classes).astype(np.float64)
+    ratio = (observed / max(observed.sum(), 1)) / (expected / NUM_SPACE)
+    return ratio[classes]
+
+
+def _positional_log_prob(positional: np.ndarray) -> np.ndarray:
+    """Sum of log P(digit at position) from (4, 10) positional digit counts"""
+    counts = positional + 1.0
+    log_p = np.log(counts / counts.sum(axis=1, keepdims=True))
+    return sum(log_p[pos][DIGITS[:, pos]] for pos in range(4))
+
+
+def pattern_lifts(counts: np.ndarray) -> Dict[str, float]:
+    """Historical share of each analysis-7 pattern over its share of all 10000 numbers"""
+    total = max(counts.sum(), 1)
+    return {name: float(counts[mask].sum() / total / mask.mean()) for name, mask in ANALYSIS_PATTERNS.items()}
+
+
+def digit_sum_moments(sum_counts: np.ndarray) -> Tuple[float, float]:
+    """(mean, std) of the digit sum of drawn numbers, from the (37,) digit-sum counts"""
+    total = max(sum_counts.sum(), 1)
+    sums = np.arange(len(sum_counts))
+    mean = (sums * sum_counts).sum() / total
+    return float(mean), float(np.sqrt(((sums - mean) ** 2 * sum_counts).sum() / total))
+
+
+def score_frequency(stats):
+    """Analysis 1 takes the most drawn numbers"""
+    return stats.get('number_counts').astype(np.float64)
+
+
+def score_digit(stats):
+    """Analysis 2 samples from the joint digit distribution: log P(number) under it
+
+    P(d1) P(d2|d1) P(d3d4|d1d2) is the number frequency up to smoothing, so
+    this ranks close to score_frequency (ties broken by the digit tables).
+    """
+    return np.log(JointDigitDistribution(stats.get('number_counts')).probabilities())
+
+
+def score_hot_cold(stats):
+    """Analysis 3 picks both extremes (2 hot + 2 cold): distance from the mean count"""
+    counts = stats.get('number_counts').astype(np.float64)
+    return np.abs(counts - counts.mean())
+
+
+def score_even_odd(stats):
+    """Analysis 4 builds numbers by parity pattern: lift of each number's pattern"""
+    return _class_share(stats.get('number_counts'), _PARITY_CODE)
+
+
+def score_digit_sum(stats):
+    """Analysis 5 builds numbers with the common digit sums: lift of each number's sum"""
+    observed = stats.get('digit_sum_counts').astype(np.float64)
+    expected = np.bincount(_SUMS, minlength=len(observed)).astype(np.float64)
+    ratio = (observed / max(observed.sum(), 1)) / (expected / NUM_SPACE)
+    return ratio[_SUMS]
+
+
+def score_repetition(stats):
+    """Analysis 6 builds numbers by digit-repetition class: lift of each number's class"""
+    return _class_share(stats.get('number_counts'), _REPEAT_CLASS)
+
+
+def score_pattern(stats):
+    """Analysis 7 builds patterned numbers: historical lift of the patterns a number has"""
+    lifts = pattern_lifts(stats.get('number_counts'))
+    return sum(mask * lifts[name] for name, mask in ANALYSIS_PATTERNS.items())
+
+
+def score_prize_position(stats):
+    """Analysis 8 takes digit p from prize column p"""
+    draws = stats.get('draws')
+    cols = np.where(draws[:, :4] >= 0, draws[:, :4], 0)
+    digits = np.stack([digit_matrix(cols[:, pos])[:, pos] for pos in range(4)], axis=1)
+    positional = np.stack([np.bincount(digits[:, pos], minlength=10) for pos in range(4)])
+    return _positional_log_prob(positional)
+
+
+def score_sliding_window(stats, window_size=20):
+    """Analysis 9 takes the most drawn numbers of the last draws; ties go to the most recent"""
+    counts = stats.get(stats.graph.window(window_size)).astype(np.float64)
+    recent = stats.get('draws')[-window_size:]
+    rows, cols = np.nonzero(recent >= 0)
+    last_row = np.zeros(NUM_SPACE)
+    last_row[recent[rows, cols]] = rows + 1             # rows ascend, so the last write wins
+    return counts + last_row / (window_size + 1)
+
+
+def score_statistics(stats):
+    """Analysis 10: positional digit marginals and how typical the number's digit sum is"""
+    mean, std = digit_sum_moments(stats.get('digit_sum_counts'))
+    typical = -0.5 * ((_SUMS - mean) / std) ** 2 if std > 0 else np.zeros(NUM_SPACE)
+    return _positional_log_prob(stats.get('positional_counts')) + typical
+
+
+def score_rarest(stats):
+    """Analysis 11 takes the least drawn numbers that were drawn at all"""
+    counts = stats.get('number_counts').astype(np.float64)
+    return np.where(counts > 0, -counts, -counts.max() - 1)
+
+
+# Every scorer reads the DerivedValues of a dataset (the statistics its analysis uses)
+SCORERS: Dict[str, Callable] = {
+    "1. Analysis Frequency": score_frequency,
+    "2. Analysis Digit": score_digit,
+    "3. Analysis Hot vs Cold Number": score_hot_cold,
+    "4. Analysis of Even & Odd Numbers": score_even_odd,
+    "5. Analysis of The Sum of Digitst": score_digit_sum,
+    "6. Analysis Digit Repetition": score_repetition,
+    "7. Analysis Pattern": score_pattern,
+    "8. Analysis of Prize Position": score_prize_position,
+    "9. Analysis Sliding Window": score_sliding_window,
+    "10. Analysis Comprehensive Statistical": score_statistics,
+    "11. Analysis of the Rarest Numbers": score_rarest,
+}
+
+
+# z-scores are clipped to this when combined: a small class far above its expected
+# share (the 10 AAAA numbers, say) would otherwise outvote every other analysis
+Z_CLIP = 3.0
+
+# Without explicit weights, score vectors correlated beyond this (either sign) are
+# one signal: 11. Rarest is -1. Frequency and 2. Digit tracks it at ~0.98
+REDUNDANT_CORRELATION = 0.9
+
+
+def standardize(scores: np.ndarray) -> np.ndarray:
+    """z-score, with constant vectors mapped to 0"""
+    std = scores.std()
+    return (scores - scores.mean()) / std if std > 0 else np.zeros_like(scores)
+
+
+def score_matrix(draws, names: List[str] = None) -> Tuple[List[str], np.ndarray]:
+    """(names, (k, 10000) standardized score vectors) for a history or its DerivedValues"""
+    names = list(SCORERS) if names is None else names
+    stats = _statistics(draws)
+    return names, np.stack([standardize(SCORERS[n](stats)) for n in names])
+
+
+def merge_redundant(matrix: np.ndarray) -> Tuple[List[List[int]], np.ndarray]:
+    """(groups of row indices, one row per group) for standardized score rows
+
+    A row joins the first group whose leader it correlates with beyond
+    REDUNDANT_CORRELATION, sign-aligned to that leader; a group's row is
+    the mean of its members, so a repeated or mirrored signal counts once
+    instead of being added twice or cancelling out.
+    """
+    corr = matrix @ matrix.T / matrix.shape[1]      # rows are z-scores (constant rows are 0)
+    groups = []
+    for i in range(len(matrix)):
+        for group in groups:
+            if abs(corr[group[0], i]) >= REDUNDANT_CORRELATION:
+                group.append(i)
+                break
+        else:
+            groups.append([i])
+    merged = np.stack([np.mean([np.sign(corr[g[0], i]) * matrix[i] for i in g], axis=0) for g in groups])
+    return groups, merged
+
+
+def consensus_scores(draws, weights: Dict[str, float] = None) -> np.ndarray:
+    """Weighted sum of the standardized score vectors, clipped to +-Z_CLIP
+
+    With explicit weights every named vector counts with its weight. By
+    default redundant vectors are merged first (see merge_redundant) and
+    every distinct signal counts once.
+    """
+    names = list(SCORERS) if weights is None else [n for n, w in weights.items() if w]
+    _, matrix = score_matrix(draws, names)
+    matrix = np.clip(matrix, -Z_CLIP, Z_CLIP)
+    if weights is None:
+        return merge_redundant(matrix)[1].sum(axis=0)
+    return np.array([weights[n] for n in names], dtype=np.float64) @ matrix
+
+
+def consensus_ranking(draws, weights: Dict[str, float] = None, top_n: int = 5) -> List[str]:
+    """Deterministic top-n numbers by consensus score (ties -> lower number)"""
+    scores = consensus_scores(draws, weights)
+    return [f"{n:04d}" for n in np.argsort(-scores, kind='stable')[:top_n]]
+
+
+def fit_weights(draws: np.ndarray, folds: int = 10, horizon: int = 50, top_k: int = 100,
+                names: List[str] = None) -> Dict[str, float]:
+    """Walk-forward weights: each analysis' top-k hit lift over the next `horizon` draws
+
+    At every cutoff the scores use only the draws before it. An analysis
+    gets weight proportional to how much better than chance its top-k did
+    (lift - 1, floored at 0); if none beats chance the weights are equal.
+    """
+    names = list(SCORERS) if names is None else names
+    n_draws = len(draws)
+    first = max(horizon * 2, n_draws - folds * horizon)
+    cutoffs = list(range(first, n_draws - horizon + 1, horizon))[-folds:]
+
+    lift = np.zeros(len(names))
+    for cut in cutoffs:
+        future = number_histogram(draws[cut:cut + horizon])
+        expected = future.sum() / NUM_SPACE * top_k
+        _, matrix = score_matrix(draws[:cut], names)
+        top = np.argsort(-matrix, axis=1, kind='stable')[:, :top_k]
+        lift += future[top].sum(axis=1) / max(expected, 1e-9)
+
+    lift /= max(len(cutoffs), 1)
+    edge = np.maximum(lift - 1.0, 0.0)
+    if edge.sum() == 0:
+        edge = np.ones(len(names))
+    edge /= edge.sum()
+    return {n: float(w) for n, w in zip(names, edge)}
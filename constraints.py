@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import re
+import operator
+import numpy as np
+from typing import Dict, List
+
+from toto_core import NUM_SPACE, number_histogram
+from number_features import DIGITS, STRUCTURAL_PATTERNS, hot_digit_counts
+
+
+def _pattern_alias(key: str) -> str:
+    """'3_Palindrome' -> 'palindrome', '7_All_Even' -> 'all_even'"""
+    return key.split('_', 1)[1].lower()
+
+
+PATTERN_ALIASES = {_pattern_alias(k): k for k in STRUCTURAL_PATTERNS}
+PATTERN_ALIASES.update({'arithmetic': '13_Aritmatika', 'geometric': '14_Geometri'})
+
+
+class NumberFeatures:
+    """Per-number feature arrays over 0000-9999 that constraints compile onto
+
+    Numeric features: d1..d4, sum, even, odd, small, big, distinct, count,
+    hot, cold. Flags: every structural pattern alias (palindrome, all_even,
+    triple, ...), plus drawn and never_drawn.
+    """
+
+    def __init__(self, draws: np.ndarray = None, hot_digits=None, cold_digits=None):
+        counts = number_histogram(draws) if draws is not None else np.zeros(NUM_SPACE, dtype=np.int64)
+
+        if (hot_digits is None or cold_digits is None) and draws is not None:
+            # same rule as get_hot_cold_digits(): +/-20% of the average digit frequency
+            valid = draws[draws >= 0]
+            digit_freq = np.zeros(10, dtype=np.int64)
+            for place in (1000, 100, 10, 1):
+                digit_freq += np.bincount((valid // place) % 10, minlength=10)
+            avg = digit_freq.sum() / 10
+            hot_digits = np.nonzero(digit_freq > avg * 1.2)[0] if hot_digits is None else hot_digits
+            cold_digits = np.nonzero(digit_freq < avg * 0.8)[0] if cold_digits is None else cold_digits
+
+        self.hot_digits = [] if hot_digits is None else list(hot_digits)
+        self.cold_digits = [] if cold_digits is None else list(cold_digits)
+
+        self.numeric = {
+            'number': np.arange(NUM_SPACE),
+            'd1': DIGITS[:, 0], 'd2': DIGITS[:, 1], 'd3': DIGITS[:, 2], 'd4': DIGITS[:, 3],
+            'sum': DIGITS.sum(axis=1),
+            'even': (DIGITS % 2 == 0).sum(axis=1),
+            'odd': (DIGITS % 2 == 1).sum(axis=1),
+            'small': (DIGITS <= 4).sum(axis=1),
+            'big': (DIGITS >= 5).sum(axis=1),
+            'distinct': (np.diff(np.sort(DIGITS, axis=1), axis=1) != 0).sum(axis=1) + 1,
+            'count': counts,
+            'hot': hot_digit_counts(self.hot_digits),
+            'cold': hot_digit_counts(self.cold_digits),
+        }
+        self.flags = {alias: STRUCTURAL_PATTERNS[key] for alias, key in PATTERN_ALIASES.items()}
+        self.flags['drawn'] = counts > 0
+        self.flags['never_drawn'] = counts == 0
+
+
+class Constraint:
+    """Composable mask expression; combine with &, | and ~"""
+
+    def __init__(self, fn, text: str):
+        self._fn = fn
+        self.text = text
+
+    def mask(self, features: NumberFeatures) -> np.ndarray:
+        return self._fn(features)
+
+    def __and__(self, other):
+        return Constraint(lambda f: self.mask(f) & other.mask(f), f"({self.text} and {other.text})")
+
+    def __or__(self, other):
+        return Constraint(lambda f: self.mask(f) | other.mask(f), f"({self.text} or {other.text})")
+
+    def __invert__(self):
+        return Constraint(lambda f: ~self.mask(f), f"not {self.text}")
+
+    def __repr__(self):
+        return f"Constraint({self.text})"
+
+
+class Field:
+    """Builder for numeric comparisons: Field('sum').between(10, 18), Field('hot') >= 2"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _compare(self, op, symbol, value):
+        name = self.name
+        return Constraint(lambda f: op(f.numeric[name], value), f"{name} {symbol} {value}")
+
+    def __eq__(self, value):
+        return self._compare(operator.eq, '==', value)
+
+    def __ne__(self, value):
+        return self._compare(operator.ne, '!=', value)
+
+    def __lt__(self, value):
+        return self._compare(operator.lt, '<', value)
+
+    def __le__(self, value):
+        return self._compare(operator.le, '<=', value)
+
+    def __gt__(self, value):
+        return self._compare(operator.gt, '>', value)
+
+    def __ge__(self, value):
+        return self._compare(operator.ge, '>=', value)
+
+    def between(self, low, high):
+        name = self.name
+        return Constraint(lambda f: (f.numeric[name] >= low) & (f.numeric[name] <= high),
+                          f"{name} between {low} and {high}")
+
+    def isin(self, values):
+        name = self.name
+        values = list(values)
+        return Constraint(lambda f: np.isin(f.numeric[name], values), f"{name} in {values}")
+
+
+def Flag(name: str) -> Constraint:
+    """Builder for boolean features: Flag('palindrome'), ~Flag('drawn')"""
+    return Constraint(lambda f: f.flags[name], name)
+
+
+_TOKEN = re.compile(r'\s*(>=|<=|==|!=|>|<|=|\(|\)|\[|\]|,|\.\.|-?\d+|[A-Za-z_][A-Za-z0-9_]*)')
+_OPS = {'>=': operator.ge, '<=': operator.le, '==': operator.eq, '=': operator.eq,
+        '!=': operator.ne, '>': operator.gt, '<': operator.lt}
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m:
+            raise ValueError(f"unexpected input at: {text[pos:]!r}")
+        tokens.append(m.group(1))
+        pos = m.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+    return tokens
+
+
+class _Parser:
+    """expr := term (or term)* ; term := factor (and factor)* ;
+    factor := not factor | ( expr ) | flag | field OP int
+            | field between int and int | field in int..int | field in [int, ...]
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos].lower() if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        if token is None or (expected is not None and token.lower() != expected):
+            raise ValueError(f"expected {expected or 'more input'}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def number(self) -> int:
+        token = self.take()
+        if not re.fullmatch(r'-?\d+', token):
+            raise ValueError(f"expected a number, got {token!r}")
+        return int(token)
+
+    def parse(self) -> Constraint:
+        result = self.expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected {self.tokens[self.pos]!r}")
+        return result
+
+    def expr(self):
+        result = self.term()
+        while self.peek() == 'or':
+            self.take()
+            result = result | self.term()
+        return result
+
+    def term(self):
+        result = self.factor()
+        while self.peek() == 'and':
+            self.take()
+            result = result & self.factor()
+        return result
+
+    def factor(self):
+        token = self.peek()
+        if token == 'not':
+            self.take()
+            return ~self.factor()
+        if token == '(':
+            self.take()
+            result = self.expr()
+            self.take(')')
+            return result
+
+        name = self.take().lower()
+        nxt = self.peek()
+
+        if nxt in _OPS:
+            symbol = self.take()
+            value = self.number()
+            return Field(name)._compare(_OPS[symbol], symbol, value)
+        if nxt == 'between':
+            self.take()
+            low = self.number()
+            self.take('and')
+            return Field(name).between(low, self.number())
+        if nxt == 'in':
+            self.take()
+            if self.peek() == '[':
+                self.take()
+                values = [self.number()]
+                while self.peek() == ',':
+                    self.take()
+                    values.append(self.number())
+                self.take(']')
+                return Field(name).isin(values)
+            low = self.number()
+            self.take('..')
+            return Field(name).between(low, self.number())
+
+        return Flag(name)
+
+
+def compile_query(text: str) -> Constraint:
+    """Compile e.g. 'all_even and sum between 10 and 18 and hot >= 2 and never_drawn and not palindrome'"""
+    return _Parser(_tokenize(text)).parse()
+
+
+class NumberFilter:
+    """Evaluate constraints over all 10000 numbers in one vectorized pass"""
+
+    def __init__(self, features: NumberFeatures):
+        self.features = features
+        self._compiled: Dict[str, Constraint] = {}
+
+    def _constraint(self, query) -> Constraint:
+        if isinstance(query, Constraint):
+            return query
+        if query not in self._compiled:
+            self._compiled[query] = compile_query(query)
+        return self._compiled[query]
+
+    def mask(self, query) -> np.ndarray:
+        constraint = self._constraint(query)
+        try:
+            return np.asarray(constraint.mask(self.features), dtype=bool)
+        except KeyError as e:
+            raise ValueError(f"unknown feature {e.args[0]!r}") from None
+
+    def numbers(self, query) -> List[str]:
+        return [f"{n:04d}" for n in np.nonzero(self.mask(query))[0]]
+
+    def count(self, query) -> int:
+        return int(np.count_nonzero(self.mask(query)))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from toto_core import NUM_SPACE, COLUMN_TIER, TIER_NAMES, date_parts
+
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+DIMENSIONS = ('weekday', 'month', 'year', 'tier', 'number')
+
+
+class CountCube:
+    """Sparse weekday x month x year x tier x number count cube
+
+    Only non-empty cells are stored (one row per cell, uint16 count), which
+    for 30+ years of draws is ~100k cells instead of a 150M-cell dense
+    array. Any slice-and-aggregate query is one boolean mask over the cells
+    followed by a bincount.
+    """
+
+    def __init__(self, dates: np.ndarray, draws: np.ndarray):
+        self.draw_count = len(draws)
+
+        weekday, month, year = date_parts(dates)
+        self.first_year = int(year.min()) if len(year) else 0
+        n_years = int(year.max()) - self.first_year + 1 if len(year) else 1
+
+        valid = draws >= 0
+        rows, cols = np.nonzero(valid)
+
+        code = weekday[rows]
+        code = code * 12 + (month[rows] - 1)
+        code = code * n_years + (year[rows] - self.first_year)
+        code = code * len(TIER_NAMES) + COLUMN_TIER[cols]
+        code = code * NUM_SPACE + draws[rows, cols]
+
+        cells, counts = np.unique(code, return_counts=True)
+
+        self.number = (cells % NUM_SPACE).astype(np.uint16)
+        cells //= NUM_SPACE
+        self.tier = (cells % len(TIER_NAMES)).astype(np.uint8)
+        cells //= len(TIER_NAMES)
+        self.year = (cells % n_years + self.first_year).astype(np.uint16)
+        cells //= n_years
+        self.month = (cells % 12 + 1).astype(np.uint8)
+        self.weekday = (cells // 12).astype(np.uint8)
+        self.count = counts.astype(np.uint16)
+
+        # Draw-count denominators, so rates can be compared across slices
+        draw_code = (weekday * 12 + (month - 1)) * n_years + (year - self.first_year)
+        self._draw_cells, self._draw_counts = np.unique(draw_code, return_counts=True)
+        self._n_years = n_years
+
+    @property
+    def cells(self) -> int:
+        return len(self.count)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.number, self.tier, self.year, self.month, self.weekday, self.count))
+
+    @staticmethod
+    def _match(column: np.ndarray, value) -> np.ndarray:
+        if isinstance(value, (list, tuple, set, range, np.ndarray)):
+            return np.isin(column, list(value))
+        return column == value
+
+    @staticmethod
+    def _normalize(weekday=None, tier=None):
+        if isinstance(weekday, str):
+            weekday = WEEKDAY_NAMES.index(weekday[:3].title())
+        elif isinstance(weekday, (list, tuple, set)):
+            weekday = [WEEKDAY_NAMES.index(w[:3].title()) if isinstance(w, str) else w for w in weekday]
+
+        if isinstance(tier, str):
+            tier = TIER_NAMES.index(tier)
+        elif isinstance(tier, (list, tuple, set)):
+            tier = [TIER_NAMES.index(t) if isinstance(t, str) else t for t in tier]
+
+        return weekday, tier
+
+    def mask(self, weekday=None, month=None, year=None, tier=None, number=None,
+             since: int = None, until: int = None) -> np.ndarray:
+        """Boolean mask over cells; each filter is a value or a collection of values"""
+        weekday, tier = self._normalize(weekday, tier)
+        mask = np.ones(self.cells, dtype=bool)
+
+        for column, value in ((self.weekday, weekday), (self.month, month), (self.year, year),
+                              (self.tier, tier), (self.number, number)):
+            if value is not None:
+                mask &= self._match(column, value)
+
+        if since is not None:
+            mask &= self.year >= since
+        if until is not None:
+            mask &= self.year <= until
+
+        return mask
+
+    def number_counts(self, **filters) -> np.ndarray:
+        """Counts of all 10000 numbers within the slice"""
+        m = self.mask(**filters)
+        return np.bincount(self.number[m], weights=self.count[m], minlength=NUM_SPACE).astype(np.int64)
+
+    def top_numbers(self, n: int = 10, **filters) -> List[Tuple[str, int]]:
+        """Most frequent numbers within the slice, e.g. top_numbers(10, weekday='Sun', month=12, since=2010)"""
+        counts = self.number_counts(**filters)
+        idx = np.argsort(-counts, kind='stable')[:n]
+        return [(f"{i:04d}", int(counts[i])) for i in idx if counts[i] > 0]
+
+    def rollup(self, dimension: str, **filters) -> Dict:
+        """Total count per value of one dimension within the slice"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+
+        m = self.mask(**filters)
+        column = getattr(self, dimension)[m].astype(np.int64)
+        weights = self.count[m]
+
+        if len(column) == 0:
+            return {}
+
+        offset = int(column.min())
+        totals = np.bincount(column - offset, weights=weights)
+        labels = {'weekday': lambda v: WEEKDAY_NAMES[v], 'tier': lambda v: TIER_NAMES[v]}.get(dimension, lambda v: v)
+
+        return {labels(int(i) + offset): int(c) for i, c in enumerate(totals) if c > 0}
+
+    def draws_in(self, weekday=None, month=None, since: int = None, until: int = None, year=None) -> int:
+        """Number of draws that fall in a calendar slice (tier/number do not apply)"""
+        weekday, _ = self._normalize(weekday)
+        cells = self._draw_cells
+        y = cells % self._n_years + self.first_year
+        m = (cells // self._n_years) % 12 + 1
+        wd = cells // self._n_years // 12
+
+        mask = np.ones(len(cells), dtype=bool)
+        for column, value in ((wd, weekday), (m, month), (y, year)):
+            if value is not None:
+                mask &= self._match(column, value)
+        if since is not None:
+            mask &= y >= since
+        if until is not None:
+            mask &= y <= until
+
+        return int(self._draw_counts[mask].sum())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import List, Tuple
+
+from toto_core import NUM_SPACE, digit_matrix
+
+
+class DecayFrequencyModel:
+    """Exponentially decayed frequency of all 10000 numbers and positional digits
+
+    A draw that is `half_life` draws old counts half as much as the latest
+    draw. Instead of multiplying all 10000 weights by the decay factor on
+    every draw, new hits are added with a growing weight (1/decay)**t and the
+    arrays are rescaled only when that weight gets large, so `update()` costs
+    O(23) per draw.
+    """
+
+    RESCALE_LIMIT = 1e200
+
+    def __init__(self, half_life: float = 500):
+        if half_life <= 0:
+            raise ValueError("half_life must be > 0")
+
+        self.half_life = float(half_life)
+        self.decay = 0.5 ** (1.0 / self.half_life)
+        self.number_weight = np.zeros(NUM_SPACE, dtype=np.float64)
+        self.digit_weight = np.zeros((4, 10), dtype=np.float64)
+        self.draw_count = 0
+        self._scale = 1.0
+
+    def rebuild(self, draws: np.ndarray):
+        """Recompute the model from a (draws, 23) matrix in one vectorized pass"""
+        n_draws = len(draws)
+        age = np.arange(n_draws - 1, -1, -1, dtype=np.float64)
+        weights = np.repeat(self.decay ** age, draws.shape[1]).reshape(draws.shape)
+
+        valid = draws >= 0
+        flat = draws[valid].astype(np.int64)
+        flat_w = weights[valid]
+
+        self.number_weight = np.bincount(flat, weights=flat_w, minlength=NUM_SPACE)
+
+        digits = digit_matrix(draws)[valid]
+        self.digit_weight = np.zeros((4, 10), dtype=np.float64)
+        for pos in range(4):
+            self.digit_weight[pos] = np.bincount(digits[:, pos], weights=flat_w, minlength=10)
+
+        self.draw_count = n_draws
+        self._scale = 1.0
+        return self
+
+    def update(self, draw_row: np.ndarray):
+        """Add one new draw (23 numbers) in O(23)"""
+        self._scale /= self.decay
+        if self._scale > self.RESCALE_LIMIT:
+            self.number_weight /= self._scale
+            self.digit_weight /= self._scale
+            self._scale = 1.0
+
+        row = np.asarray(draw_row, dtype=np.int64)
+        row = row[row >= 0]
+
+        np.add.at(self.number_weight, row, self._scale)
+        for pos, place in enumerate((1000, 100, 10, 1)):
+            np.add.at(self.digit_weight[pos], (row // place) % 10, self._scale)
+
+        self.draw_count += 1
+        return self
+
+    def number_scores(self) -> np.ndarray:
+        """Decayed weight of every number, in units of 'latest draw = 1'"""
+        return self.number_weight / self._scale
+
+    def digit_scores(self) -> np.ndarray:
+        """Decayed (4, 10) positional digit weights"""
+        return self.digit_weight / self._scale
+
+    def digit_probabilities(self) -> np.ndarray:
+        """Positional digit distribution, each row sums to 1"""
+        scores = self.digit_scores()
+        totals = scores.sum(axis=1, keepdims=True)
+        return np.divide(scores, totals, out=np.full_like(scores, 0.1), where=totals > 0)
+
+    def top(self, n: int = 10, seen_only: bool = True) -> List[Tuple[str, float]]:
+        """Hottest numbers by decayed weight"""
+        scores = self.number_scores()
+        idx = np.argsort(-scores, kind='stable')
+        if seen_only:
+            idx = idx[scores[idx] > 0]
+        return [(f"{i:04d}", float(scores[i])) for i in idx[:n]]
+
+    def bottom(self, n: int = 10, seen_only: bool = True) -> List[Tuple[str, float]]:
+        """Coldest numbers by decayed weight"""
+        scores = self.number_scores()
+        idx = np.argsort(scores, kind='stable')
+        if seen_only:
+            idx = idx[scores[idx] > 0]
+        return [(f"{i:04d}", float(scores[i])) for i in idx[:n]]
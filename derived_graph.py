@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import time
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Sequence
+
+from toto_core import number_histogram, digit_matrix, all_numbers
+from occurrence_index import OccurrenceIndex
+
+
+def _freeze(value):
+    """Node values are shared between dataset versions, so their arrays become read-only"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+class DerivedNode:
+    """One derived statistic: compute(*inputs) and, optionally, update(old, delta, *inputs)
+
+    `delta` maps every changed source to what was appended to it, e.g.
+    {'draws': (k, 23) new rows, 'draw_dates': (k,) new dates}; update
+    returns the new value without modifying `old`.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], compute: Callable, update: Callable = None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.compute = compute
+        self.update = update
+
+
+class DerivedGraph:
+    """Which derived statistic is computed from which inputs
+
+    Sources are raw fields of a dataset snapshot (draws, dates); every node
+    names the sources and nodes it reads, and must be added after them, so
+    the insertion order is a topological order. The graph holds no values:
+    a DerivedValues in the memo of each snapshot keeps them for that
+    dataset version.
+
+    Nodes can be added while readers use the graph (window() adds one on
+    first use): add() runs under a lock and swaps in a new `nodes` dict,
+    so a reader iterating the old one never sees it change.
+    """
+
+    def __init__(self, sources: Sequence[str]):
+        self.sources = tuple(sources)
+        self.nodes: Dict[str, DerivedNode] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, inputs: Sequence[str], compute: Callable, update: Callable = None) -> str:
+        with self._lock:
+            self._add(name, inputs, compute, update)
+        return name
+
+    def _add(self, name, inputs, compute, update):
+        if name in self.sources:
+            raise ValueError(f"{name!r} is a source")
+        for dep in inputs:
+            if dep not in self.sources and dep not in self.nodes:
+                raise ValueError(f"{name!r} reads unknown input {dep!r}")
+        self.nodes = {**self.nodes, name: DerivedNode(name, inputs, compute, update)}
+
+    def dependents(self, changed) -> set:
+        """Every node that reads one of `changed`, directly or through other nodes"""
+        dirty = set(changed)
+        for name, node in self.nodes.items():
+            if dirty.intersection(node.inputs):
+                dirty.add(name)
+        return dirty.difference(self.sources)
+
+    def values(self, snapshot) -> 'DerivedValues':
+        """The node values of a snapshot (kept in its memo, empty at first)"""
+        values = snapshot.memo.get('derived')
+        if values is None:
+            values = snapshot.memo.setdefault('derived', DerivedValues(self, snapshot))
+        return values
+
+    def carry(self, old, new, delta: Dict):
+        """Move the values `old` computed to the `new` snapshot built from it by `delta`; returns new"""
+        values = old.memo.get('derived')
+        if values is not None:
+            new.memo['derived'] = values.advance(new, delta)
+        return new
+
+    def window(self, size: int) -> str:
+        """Name of the node counting numbers over the last `size` draws (added on first use)"""
+        name = f"window_counts_{size}"
+        if name in self.nodes:
+            return name
+
+        def update(old, delta, draws):
+            k = len(delta['draws'])
+            if k >= size:
+                return number_histogram(draws[-size:])
+            # the k oldest draws of the window slide out as the k new ones come in
+            n = len(draws)
+            left = draws[max(n - size - k, 0):max(n - size, 0)]
+            return old + number_histogram(delta['draws']) - number_histogram(left)
+
+        with self._lock:
+            # another reader may have added it since the check above
+            if name not in self.nodes:
+                self._add(name, ['draws'], lambda draws: number_histogram(draws[-size:]), update)
+        return name
+
+
+class DerivedValues:
+    """Node values of one dataset version, each computed on first use
+
+    advance() carries the values to the next version after an append:
+    nodes the new draws cannot affect are kept as they are, nodes with an
+    incremental update are updated, and the rest are dropped and computed
+    again only if something reads them. `log` records every
+    (node, action, seconds), with action one of computed / updated /
+    reused / invalidated.
+    """
+
+    def __init__(self, graph: DerivedGraph, snapshot):
+        self.graph = graph
+        self.snapshot = snapshot
+        self.log = []
+        self._values = {}
+
+    def get(self, name: str):
+        if name in self.graph.sources:
+            return getattr(self.snapshot, name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        node = self.graph.nodes[name]
+        args = [self.get(dep) for dep in node.inputs]
+        start = time.perf_counter()
+        value = _freeze(node.compute(*args))
+        self.log.append((name, 'computed', time.perf_counter() - start))
+        # two readers racing on one node computed equal values, keep the first
+        return self._values.setdefault(name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def advance(self, snapshot, delta: Dict) -> 'DerivedValues':
+        """Values for the next dataset version, `delta` being {changed source: appended part}"""
+        new = DerivedValues(self.graph, snapshot)
+        dirty = self.graph.dependents(delta)
+        for name, node in list(self.graph.nodes.items()):
+            if name not in self._values:
+                continue
+            if name not in dirty:
+                new._values[name] = self._values[name]
+                new.log.append((name, 'reused', 0.0))
+            elif node.update is not None and all(dep in self.graph.sources or dep in new._values
+                                                 for dep in node.inputs):
+                args = [new.get(dep) for dep in node.inputs]
+                start = time.perf_counter()
+                new._values[name] = _freeze(node.update(self._values[name], delta, *args))
+                new.log.append((name, 'updated', time.perf_counter() - start))
+            else:
+                new.log.append((name, 'invalidated', 0.0))
+        return new
+
+    def report(self) -> List[Dict]:
+        return [{'node': name, 'action': action, 'seconds': seconds} for name, action, seconds in self.log]
+
+
+def derived_field(name: str, doc: str = None) -> property:
+    """Read-only attribute that resolves to a node of the analyzer's derived statistics"""
+    return property(lambda self: self.derived(name), doc=doc)
+
+
+def _number_frequencies(counts):
+    seen = np.nonzero(counts)[0]
+    return all_numbers()[seen], counts[seen]
+
+
+def _positional_counts(draws):
+    digits = digit_matrix(draws)[draws >= 0]
+    return np.stack([np.bincount(digits[:, pos], minlength=10) for pos in range(4)])
+
+
+def _digit_sum_counts(draws):
+    return np.bincount(digit_matrix(draws)[draws >= 0].sum(axis=1, dtype=np.int64), minlength=37)
+
+
+def draw_graph(dates: str = 'draw_dates') -> DerivedGraph:
+    """The statistics both analyzers derive from the draws (and the datetime64[D] field `dates`)
+
+    number_counts       (10000,) times each number was drawn
+    number_frequencies  (drawn numbers as U4, their counts), like np.unique of the numbers
+    number_order        np.argsort of those counts (hot/cold and rarest rankings)
+    positional_counts   (4, 10) digit counts per position
+    digit_totals        (10,) digit counts over all positions
+    digit_sum_counts    (37,) counts of each digit sum
+    occurrence_index    OccurrenceIndex postings
+    window_counts_N     counts over the last N draws, see DerivedGraph.window()
+    """
+    graph = DerivedGraph(['draws', dates])
+    graph.add('number_counts', ['draws'], number_histogram,
+              lambda old, delta, draws: old + number_histogram(delta['draws']))
+    graph.add('number_frequencies', ['number_counts'], _number_frequencies)
+    graph.add('number_order', ['number_frequencies'], lambda freq: np.argsort(freq[1]))
+    graph.add('positional_counts', ['draws'], _positional_counts,
+              lambda old, delta, draws: old + _positional_counts(delta['draws']))
+    graph.add('digit_totals', ['positional_counts'], lambda positional: positional.sum(axis=0),
+              lambda old, delta, positional: positional.sum(axis=0))
+    graph.add('digit_sum_counts', ['draws'], _digit_sum_counts,
+              lambda old, delta, draws: old + _digit_sum_counts(delta['draws']))
+    graph.add('occurrence_index', [dates, 'draws'], OccurrenceIndex)
+    return graph
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from toto_core import digit_matrix
+from number_features import DIGITS, pattern_matrix
+from histogram_stats import PrefixHistogram, chi_square_homogeneity, g_test, kl_divergence
+
+FEATURES = ('digit', 'sum', 'parity', 'pattern')
+
+
+def feature_codes(draws: np.ndarray, feature: str) -> Tuple[np.ndarray, int]:
+    """(draws, m) bin codes per draw (-1 = skip) and the number of bins
+
+    digit    positional digits, bin = position * 10 + digit (40 bins)
+    sum      digit sum of each number (37 bins)
+    parity   number of even digits in each number (5 bins)
+    pattern  membership in each structural pattern class (one bin per class)
+    """
+    valid = draws >= 0
+    numbers = np.where(valid, draws, 0).astype(np.int64)
+
+    if feature == 'digit':
+        codes = digit_matrix(numbers).astype(np.int64) + np.arange(4) * 10
+        codes[~valid] = -1
+        return codes.reshape(len(draws), -1), 40
+    if feature == 'sum':
+        return np.where(valid, DIGITS.sum(axis=1)[numbers], -1), 37
+    if feature == 'parity':
+        return np.where(valid, (DIGITS % 2 == 0).sum(axis=1)[numbers], -1), 5
+    if feature == 'pattern':
+        _, member = pattern_matrix()
+        k = member.shape[1]
+        hit = member[numbers] & valid[..., None]
+        codes = np.where(hit, np.arange(k), -1)
+        return codes.reshape(len(draws), -1), k
+    raise ValueError(f"unknown feature {feature!r}, expected one of {FEATURES}")
+
+
+class DriftDetector:
+    """Change-point tests over per-period histograms of digits, sums, parity and patterns
+
+    Each feature keeps a PrefixHistogram of cumulative counts, so the
+    histograms of any set of periods come from one lookup per boundary and
+    every test below is O(periods), independent of the number of draws.
+    Periods are calendar years ('Y'), months ('M') or blocks of N draws.
+    """
+
+    def __init__(self, dates: np.ndarray, draws: np.ndarray, features=FEATURES):
+        self.dates = np.asarray(dates).astype('datetime64[D]')
+        self.draw_count = len(draws)
+        self.histograms: Dict[str, PrefixHistogram] = {}
+        for feature in features:
+            codes, n_bins = feature_codes(draws, feature)
+            self.histograms[feature] = PrefixHistogram(codes, n_bins)
+
+    def boundaries(self, period='Y') -> Tuple[np.ndarray, np.ndarray]:
+        """(row boundaries, start date of each period); len(dates) == len(boundaries) - 1"""
+        if isinstance(period, (int, np.integer)):
+            rows = np.arange(0, self.draw_count, int(period))
+        else:
+            keys = self.dates.astype(f'datetime64[{period}]')
+            rows = np.nonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))[0]
+        bounds = np.append(rows, self.draw_count)
+        return bounds, self.dates[rows]
+
+    def period_histograms(self, feature: str, period='Y') -> Tuple[np.ndarray, np.ndarray]:
+        """(period start dates, (periods, bins) histograms)"""
+        bounds, starts = self.boundaries(period)
+        return starts, self.histograms[feature].between(bounds)
+
+    def windowed(self, feature: str, period='Y', window: int = 3, test: str = 'chi2',
+                 alpha: float = 1e-3) -> List[dict]:
+        """Compare the `window` periods before and after every period boundary
+
+        test='chi2' is Pearson's homogeneity test, test='kl' the G-test
+        (2 n KL to the pooled distribution). A boundary is reported when its
+        p-value is below `alpha` and its statistic is the largest within
+        `window` periods on either side.
+        """
+        bounds, starts = self.boundaries(period)
+        cum = self.histograms[feature].upto(bounds)
+        n_periods = len(starts)
+        cut = np.arange(1, n_periods)
+        lo = np.maximum(cut - window, 0)
+        hi = np.minimum(cut + window, n_periods)
+
+        before = cum[cut] - cum[lo]
+        after = cum[hi] - cum[cut]
+        if test == 'kl':
+            stat, df, p = g_test(before, after)
+        elif test == 'chi2':
+            stat, df, p = chi_square_homogeneity(before, after)
+        else:
+            raise ValueError("test must be 'chi2' or 'kl'")
+        divergence = kl_divergence(after, before)
+
+        results = []
+        for i in np.nonzero(p < alpha)[0]:
+            neighbours = stat[max(i - window, 0):i + window + 1]
+            if stat[i] < neighbours.max():
+                continue
+            results.append({'date': str(starts[cut[i]]), 'feature': feature, 'test': test,
+                            'statistic': float(stat[i]), 'df': int(df[i]), 'p_value': float(p[i]),
+                            'kl': float(divergence[i])})
+        return results
+
+    def cusum(self, feature: str, period='Y', drift: float = 0.5, threshold: float = 5.0,
+              reference: int = 5) -> List[dict]:
+        """Upper CUSUM of each period's standardized chi-square distance to a reference era
+
+        The first `reference` periods define the expected distribution; each
+        later period's Pearson homogeneity statistic X2 against it is
+        standardized as z = (X2 - df) / sqrt(2 df). S accumulates z - drift and an alarm
+        fires when S exceeds `threshold`. The change is dated to the period
+        after S last sat at zero, and monitoring restarts with the
+        `reference` periods from that date as the new reference era.
+        """
+        starts, hist = self.period_histograms(feature, period)
+        hist = hist.astype(np.float64)
+        n_periods = len(starts)
+
+        results = []
+        era = 0
+        while era + reference < n_periods:
+            ref = hist[era:era + reference].sum(axis=0)
+            s, last_zero, alarm = 0.0, era + reference - 1, None
+
+            # two-sample statistic, so the finite size of the reference era is accounted for
+            x2, df, p = chi_square_homogeneity(hist[era + reference:], np.broadcast_to(ref, hist[era + reference:].shape))
+            z = (x2 - df) / np.sqrt(2.0 * df)
+            for i, t in enumerate(range(era + reference, n_periods)):
+                s = max(0.0, s + z[i] - drift)
+                if s == 0.0:
+                    last_zero = t
+                elif s > threshold:
+                    alarm = i
+                    break
+
+            if alarm is None:
+                break
+            change = last_zero + 1
+            results.append({'date': str(starts[change]), 'alarm_date': str(starts[era + reference + alarm]),
+                            'feature': feature, 'test': 'cusum', 'statistic': float(s),
+                            'p_value': float(p[alarm])})
+            era = change
+        return results
+
+    def change_points(self, period='Y', method: str = 'cusum', features=None, **kwargs) -> List[dict]:
+        """All detections over the given features, sorted by date"""
+        features = list(self.histograms) if features is None else features
+        found = []
+        for feature in features:
+            if method == 'cusum':
+                found += self.cusum(feature, period, **kwargs)
+            else:
+                found += self.windowed(feature, period, test=method, **kwargs)
+        return sorted(found, key=lambda r: r['date'])
+
+    def change_dates(self, period='Y', method: str = 'cusum', **kwargs) -> List[str]:
+        return sorted({r['date'] for r in self.change_points(period, method, **kwargs)})
+
+    def stable_since(self, period='Y', method: str = 'cusum', **kwargs):
+        """Start date of the latest era (no detected change after it), or None"""
+        dates = self.change_dates(period, method, **kwargs)
+        return np.datetime64(dates[-1]) if dates else None
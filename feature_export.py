@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+from toto_core import NUM_SPACE, COLUMN_TIER, TIER_NAMES, read_draw_matrix, number_histogram, date_parts
+from number_features import DIGITS, pattern_matrix
+from occurrence_index import PERMUTATION_KEY
+from constraints import NumberFeatures
+from decay_model import DecayFrequencyModel
+
+
+def _previous_draw_repeats(draws: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Per draw, how many of its numbers' keys also occurred in the previous draw"""
+    n_draws = len(draws)
+    valid = draws >= 0
+    key = np.where(valid, keys[np.where(valid, draws, 0)], -1).astype(np.int64)
+    rows = np.broadcast_to(np.arange(n_draws)[:, None], draws.shape)
+
+    present = np.unique((rows * NUM_SPACE + key)[valid])
+    query = ((rows - 1) * NUM_SPACE + key)[valid & (rows > 0)]
+    pos = np.clip(np.searchsorted(present, query), 0, len(present) - 1)
+    found = present[pos] == query
+    return np.bincount(rows[valid & (rows > 0)][found], minlength=n_draws)
+
+
+def draw_feature_matrix(dates: np.ndarray, draws: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """(column names, (draws, features) float32) built in one vectorized pass
+
+    Per draw: calendar fields; digit-sum, parity and big/small totals over
+    all numbers and per prize tier; counts of numbers in each structural
+    pattern class; and repeats (exact and permutation) from the previous
+    draw. The data-dependent patterns 32-39 (hot/cold digits, lucky
+    numbers, recent neighbours, seasonal) are left out, since computing
+    them from the full history would leak future draws into past rows.
+    """
+    dates = np.asarray(dates).astype('datetime64[D]')
+    valid = draws >= 0
+    numbers = np.where(valid, draws, 0).astype(np.int64)
+    digits = DIGITS[numbers]                                    # (draws, 23, 4)
+
+    per_number = {
+        'count': valid.astype(np.int64),
+        'digit_sum': digits.sum(axis=2),
+        'even_digits': (digits % 2 == 0).sum(axis=2),
+        'big_digits': (digits >= 5).sum(axis=2),
+        'even_numbers': numbers % 2 == 0,
+        'big_numbers': numbers >= NUM_SPACE // 2,
+    }
+
+    names, columns = [], []
+
+    def add(name, values):
+        names.append(name)
+        columns.append(np.asarray(values, dtype=np.float32))
+
+    weekdays, months, years = date_parts(dates)
+    add('year', years)
+    add('month', months)
+    add('weekday', weekdays)
+
+    for feature, values in per_number.items():
+        add(feature, np.where(valid, values, 0).sum(axis=1))
+    add('odd_digits', 4 * valid.sum(axis=1) - per_number['even_digits'].sum(axis=1, where=valid))
+    add('small_digits', 4 * valid.sum(axis=1) - per_number['big_digits'].sum(axis=1, where=valid))
+    add('mean_digit_sum', np.divide(columns[names.index('digit_sum')], np.maximum(valid.sum(axis=1), 1)))
+
+    for tier, tier_name in enumerate(TIER_NAMES):
+        in_tier = valid & (COLUMN_TIER == tier)
+        label = tier_name.lower()
+        for feature in ('digit_sum', 'even_digits', 'big_digits'):
+            add(f"{label}_{feature}", np.where(in_tier, per_number[feature], 0).sum(axis=1))
+
+    pattern_names, member = pattern_matrix()
+    pattern_counts = (member[numbers] & valid[..., None]).sum(axis=1)
+    for i, name in enumerate(pattern_names):
+        add(f"pattern_{name}", pattern_counts[:, i])
+
+    add('repeats_prev', _previous_draw_repeats(draws, np.arange(NUM_SPACE)))
+    add('perm_repeats_prev', _previous_draw_repeats(draws, PERMUTATION_KEY))
+
+    return names, np.stack(columns, axis=1)
+
+
+def number_feature_matrix(draws: np.ndarray, half_life: float = 500) -> Tuple[List[str], np.ndarray]:
+    """(column names, (10000, features) float32) for every number 0000-9999
+
+    The NumberFeatures numeric fields and pattern flags, plus per-tier
+    counts, draws since last seen, mean repeat gap and a decayed frequency.
+    """
+    features = NumberFeatures(draws)
+    names = list(features.numeric)
+    columns = [features.numeric[n] for n in names]
+
+    valid = draws >= 0
+    flat = draws[valid].astype(np.int64)
+    tiers = np.broadcast_to(COLUMN_TIER, draws.shape)[valid]
+    for tier, tier_name in enumerate(TIER_NAMES):
+        names.append(f"count_{tier_name.lower()}")
+        columns.append(np.bincount(flat[tiers == tier], minlength=NUM_SPACE))
+
+    rows = np.broadcast_to(np.arange(len(draws))[:, None], draws.shape)[valid]
+    last_seen = np.full(NUM_SPACE, -1, dtype=np.int64)
+    order = np.argsort(rows, kind='stable')
+    last_seen[flat[order]] = rows[order]
+    counts = number_histogram(draws)
+    first_seen = np.full(NUM_SPACE, -1, dtype=np.int64)
+    first_seen[flat[order][::-1]] = rows[order][::-1]
+
+    names.append('draws_since_seen')
+    columns.append(np.where(last_seen >= 0, len(draws) - 1 - last_seen, len(draws)))
+    names.append('mean_gap')
+    span = (last_seen - first_seen).astype(np.float64)
+    columns.append(np.divide(span, counts - 1, out=np.full(NUM_SPACE, np.nan), where=counts > 1))
+    names.append('decayed_frequency')
+    columns.append(DecayFrequencyModel(half_life).rebuild(draws).number_scores())
+
+    for flag, mask in features.flags.items():
+        names.append(f"is_{flag}")
+        columns.append(mask)
+
+    return names, np.stack([np.asarray(c, dtype=np.float32) for c in columns], axis=1)
+
+
+def save_matrix(path: str, names: List[str], matrix: np.ndarray, index=None):
+    """Write a feature matrix as .npy (names in <path>.columns.json) or .parquet"""
+    if path.endswith('.parquet'):
+        frame = pd.DataFrame(matrix, columns=names, index=index)
+        try:
+            frame.to_parquet(path)
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs pyarrow or fastparquet; use a .npy path instead") from e
+    else:
+        np.save(path, matrix)
+        with open(os.path.splitext(path)[0] + '.columns.json', 'w') as f:
+            json.dump(names, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-draw and per-number feature matrices")
+    parser.add_argument('data', help="Draw_Date,01..23 data file")
+    parser.add_argument('draws_out', help="per-draw features (.npy or .parquet)")
+    parser.add_argument('--numbers', help="also write the per-number matrix (.npy or .parquet)")
+    parser.add_argument('--half-life', type=float, default=500, help="half-life of the decayed frequency")
+    args = parser.parse_args()
+
+    dates, draws = read_draw_matrix(args.data)
+
+    names, matrix = draw_feature_matrix(dates, draws)
+    save_matrix(args.draws_out, names, matrix, index=pd.DatetimeIndex(dates, name='Draw_Date'))
+    print(f"{matrix.shape[0]:,} draws x {matrix.shape[1]} features -> {args.draws_out}", file=sys.stderr)
+
+    if args.numbers:
+        names, matrix = number_feature_matrix(draws, args.half_life)
+        save_matrix(args.numbers, names, matrix, index=pd.Index([f"{n:04d}" for n in range(NUM_SPACE)], name='number'))
+        print(f"{matrix.shape[0]:,} numbers x {matrix.shape[1]} features -> {args.numbers}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
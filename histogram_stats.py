@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import math
+import numpy as np
+
+
+def chi2_sf(x, df):
+    """Upper tail of the chi-square distribution (Wilson-Hilferty approximation)
+
+    Good to a few percent of the p-value for df >= 3, which is plenty for
+    ranking and thresholding; avoids a scipy dependency.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    df = np.asarray(df, dtype=np.float64)
+    df = np.maximum(df, 1.0)
+    c = 2.0 / (9.0 * df)
+    z = (np.cbrt(np.maximum(x, 0.0) / df) - (1.0 - c)) / np.sqrt(c)
+    return 0.5 * np.vectorize(math.erfc)(z / math.sqrt(2.0))
+
+
+def chi_square_homogeneity(a: np.ndarray, b: np.ndarray):
+    """Pearson chi-square of two count vectors (or row-wise over (n, k) arrays)
+
+    Returns (statistic, df, p_value). Bins empty in both samples are dropped
+    from the degrees of freedom.
+    """
+    a = np.atleast_2d(a).astype(np.float64)
+    b = np.atleast_2d(b).astype(np.float64)
+    na = a.sum(axis=1, keepdims=True)
+    nb = b.sum(axis=1, keepdims=True)
+    pooled = (a + b) / np.maximum(na + nb, 1)
+
+    ea, eb = pooled * na, pooled * nb
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stat = (np.where(ea > 0, (a - ea) ** 2 / ea, 0.0) +
+                np.where(eb > 0, (b - eb) ** 2 / eb, 0.0)).sum(axis=1)
+    df = np.maximum((pooled > 0).sum(axis=1) - 1, 1)
+    return stat, df, chi2_sf(stat, df)
+
+
+def kl_divergence(p: np.ndarray, q: np.ndarray, pseudo: float = 0.5) -> np.ndarray:
+    """KL(p || q) in nats between count vectors, row-wise, with pseudo-counts"""
+    p = np.atleast_2d(p).astype(np.float64) + pseudo
+    q = np.atleast_2d(q).astype(np.float64) + pseudo
+    p /= p.sum(axis=1, keepdims=True)
+    q /= q.sum(axis=1, keepdims=True)
+    return (p * np.log(p / q)).sum(axis=1)
+
+
+def g_test(a: np.ndarray, b: np.ndarray):
+    """Likelihood-ratio (G) test of two count vectors, row-wise
+
+    G = 2 * (n_a * KL(a || pooled) + n_b * KL(b || pooled)), the KL form of
+    the chi-square homogeneity test. Returns (statistic, df, p_value).
+    """
+    a = np.atleast_2d(a).astype(np.float64)
+    b = np.atleast_2d(b).astype(np.float64)
+    na = a.sum(axis=1, keepdims=True)
+    nb = b.sum(axis=1, keepdims=True)
+    pooled = (a + b) / np.maximum(na + nb, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ga = np.where(a > 0, a * np.log(a / (pooled * na)), 0.0)
+        gb = np.where(b > 0, b * np.log(b / (pooled * nb)), 0.0)
+    stat = 2.0 * (ga + gb).sum(axis=1)
+    df = np.maximum((pooled > 0).sum(axis=1) - 1, 1)
+    return stat, df, chi2_sf(stat, df)
+
+
+class PrefixHistogram:
+    """Histogram of any draw range [start, stop) from cumulative counts
+
+    `codes` is a (draws, m) integer matrix of bin codes per draw (-1 = skip).
+    Cumulative histograms are stored at every `block`-th draw; a range costs
+    two checkpoint lookups plus at most 2 * block rows of bincount. With
+    block=1 (fine for small bin counts) every range is a pure subtraction.
+    """
+
+    def __init__(self, codes: np.ndarray, n_bins: int, block: int = 1):
+        codes = np.asarray(codes)
+        self.n_bins = n_bins
+        self.block = max(int(block), 1)
+        self.draw_count = len(codes)
+
+        valid = codes >= 0
+        self.flat = codes[valid].astype(np.int64)
+        self.row_offsets = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+
+        checkpoints = np.arange(0, self.draw_count + 1, self.block)
+        if checkpoints[-1] != self.draw_count:
+            checkpoints = np.append(checkpoints, self.draw_count)
+        self.checkpoints = checkpoints
+
+        per_block = np.zeros((len(checkpoints), n_bins), dtype=np.int32)
+        block_id = np.repeat(np.arange(len(codes)) // self.block, valid.sum(axis=1))
+        np.add.at(per_block, (block_id + 1, self.flat), 1)
+        self.cumulative = np.cumsum(per_block, axis=0, dtype=np.int64)
+
+    def upto(self, rows) -> np.ndarray:
+        """(len(rows), n_bins) histograms of draws [0, row) for every row"""
+        rows = np.clip(np.atleast_1d(np.asarray(rows, dtype=np.int64)), 0, self.draw_count)
+        base = rows // self.block
+        result = self.cumulative[base].copy()
+        if self.block > 1:
+            for i in np.nonzero(rows != base * self.block)[0]:
+                lo = self.row_offsets[base[i] * self.block]
+                hi = self.row_offsets[rows[i]]
+                result[i] += np.bincount(self.flat[lo:hi], minlength=self.n_bins)
+        return result
+
+    def range(self, start: int, stop: int) -> np.ndarray:
+        """Histogram of draws [start, stop)"""
+        ends = self.upto([start, stop])
+        return ends[1] - ends[0]
+
+    def between(self, boundaries) -> np.ndarray:
+        """(len(boundaries) - 1, n_bins) histograms between consecutive row boundaries"""
+        return np.diff(self.upto(boundaries), axis=0)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import json
+import time
+import cProfile
+import functools
+import tracemalloc
+import contextlib
+
+# What stage() returns while profiling is off: one shared no-op context
+_OFF = contextlib.nullcontext()
+
+
+def stage(metrics, name: str):
+    """metrics.stage(name), or a no-op context when metrics is None"""
+    return _OFF if metrics is None else metrics.stage(name)
+
+
+def timed(metrics, name: str, func):
+    """func wrapped in stage(metrics, name); func itself when metrics is None"""
+    if metrics is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with metrics.stage(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class Metrics:
+    """Wall time (and optionally peak memory) of the named stages of one run
+
+    Stages nest and repeated stages add up (calls, total and longest
+    time). With trace_memory, tracemalloc runs between start() and stop()
+    and every stage also records the peak of traced allocations above what
+    was allocated when it began. With profile_path, cProfile runs between
+    start() and stop() and its stats are dumped there (read them with
+    `python -m pstats`). Analyzers take `metrics=None` and then only pay for
+    a None check per stage. Not thread-safe: use one Metrics per thread.
+    """
+
+    def __init__(self, trace_memory: bool = False, profile_path: str = None):
+        self.trace_memory = trace_memory
+        self.profile_path = profile_path
+        self.stages = {}
+        self.total_seconds = None
+        self.peak_bytes = None
+        self._stack = []          # [bytes at start, highest peak seen] of every open stage
+        self._highest = 0         # stages reset the tracemalloc peak, so the run's peak is kept here
+        self._profiler = None
+        self._started = None
+        self._own_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        if self.profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self._started is None:
+            return self
+        self.total_seconds = time.perf_counter() - self._started
+        self._started = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_bytes = max(self._highest, tracemalloc.get_traced_memory()[1])
+            if self._own_tracing:
+                tracemalloc.stop()
+                self._own_tracing = False
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def add(self, name: str, seconds: float, peak_bytes: int = None):
+        """Record one call of a stage timed elsewhere"""
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        if peak_bytes is not None:
+            entry['peak_bytes'] = max(entry.get('peak_bytes', 0), peak_bytes)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak so far belongs to the enclosing stages; start a fresh one
+            for frame in self._stack:
+                frame[1] = max(frame[1], peak)
+            self._highest = max(self._highest, peak)
+            tracemalloc.reset_peak()
+            self._stack.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if tracing:
+                base, highest = self._stack.pop()
+                highest = max(highest, tracemalloc.get_traced_memory()[1])
+                for frame in self._stack:
+                    frame[1] = max(frame[1], highest)
+                self._highest = max(self._highest, highest)
+                peak_bytes = highest - base
+            self.add(name, seconds, peak_bytes)
+
+    def to_dict(self) -> dict:
+        return {
+            'total_seconds': self.total_seconds,
+            'peak_bytes': self.peak_bytes,
+            'profile': self.profile_path,
+            'stages': self.stages,
+        }
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def summary_lines(self, top: int = 15):
+        """The slowest stages, longest total time first"""
+        lines = []
+        if self.total_seconds is not None:
+            lines.append(f"⏱️  Total: {self.total_seconds:.3f} s"
+                         + (f", peak memory {self.peak_bytes / 2**20:.1f} MB" if self.peak_bytes is not None else ""))
+        ranked = sorted(self.stages.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        for name, entry in ranked[:top]:
+            memory = f", peak {entry['peak_bytes'] / 2**20:.1f} MB" if 'peak_bytes' in entry else ""
+            lines.append(f"   • {name}: {entry['seconds'] * 1000:.1f} ms ({entry['calls']} calls{memory})")
+        return lines
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+
+from toto_core import number_histogram
+
+
+def _normalize(table: np.ndarray) -> np.ndarray:
+    """Normalize over the last axis; empty rows become uniform"""
+    total = table.sum(axis=-1, keepdims=True)
+    uniform = np.full_like(table, 1.0 / table.shape[-1])
+    return np.divide(table, total, out=uniform, where=total > 0)
+
+
+def _stacked_cdf(table: np.ndarray) -> np.ndarray:
+    """Row CDFs shifted by the row index and flattened, so one searchsorted
+    call samples from any mix of rows: row r occupies (r, r + 1]"""
+    table = np.atleast_2d(table)
+    cdf = np.cumsum(table, axis=1)
+    cdf /= cdf[:, -1:]
+    cdf[:, -1] = 1.0
+    return (cdf + np.arange(len(table))[:, None]).ravel()
+
+
+def _sample_rows(stacked: np.ndarray, width: int, rows: np.ndarray, rng) -> np.ndarray:
+    """One inverse-CDF draw per entry of `rows` from a _stacked_cdf table"""
+    u = rows + rng.random(len(rows))
+    return np.searchsorted(stacked, u, side='right') - rows * width
+
+
+class JointDigitDistribution:
+    """Joint distribution of the 4 digits, factored as P(d1) P(d2|d1) P(d3d4|d1d2)
+
+    The joint 10^4 histogram is just the number histogram. Each factor is a
+    table built from it:
+      p_d1     (10,)       P(d1)
+      p_d2     (10, 10)    P(d2 | d1)
+      p_d34    (100, 100)  P(d3d4 | d1d2)
+    Smoothing:
+      'none'      raw relative frequencies (unseen contexts fall back to uniform)
+      'additive'  add `alpha` to every cell of every table
+      'backoff'   mix each conditional row with its marginal, weighting the
+                  row by n / (n + alpha) where n is the row's own count
+    Sampling and exact probabilities use the same tables, so
+    probability(n) is exactly the chance sample() returns n.
+    """
+
+    SMOOTHING = ('none', 'additive', 'backoff')
+
+    def __init__(self, counts: np.ndarray, smoothing: str = 'additive', alpha: float = 1.0):
+        if smoothing not in self.SMOOTHING:
+            raise ValueError(f"smoothing must be one of {self.SMOOTHING}")
+
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.smoothing = smoothing
+        self.alpha = float(alpha)
+
+        joint = self.counts.reshape(10, 10, 100)
+        d1 = joint.sum(axis=(1, 2))
+        d1d2 = joint.sum(axis=2)
+        d34 = joint.reshape(100, 100)
+
+        if smoothing == 'additive':
+            self.p_d1 = _normalize(d1 + self.alpha)
+            self.p_d2 = _normalize(d1d2 + self.alpha)
+            self.p_d34 = _normalize(d34 + self.alpha)
+        elif smoothing == 'backoff':
+            self.p_d1 = _normalize(d1 + self.alpha)
+            self.p_d2 = self._backoff(d1d2, d1d2.sum(axis=0))
+            self.p_d34 = self._backoff(d34, d34.sum(axis=0))
+        else:
+            self.p_d1 = _normalize(d1)
+            self.p_d2 = _normalize(d1d2)
+            self.p_d34 = _normalize(d34)
+
+        self._cdf_d1 = _stacked_cdf(self.p_d1)
+        self._cdf_d2 = _stacked_cdf(self.p_d2)
+        self._cdf_d34 = _stacked_cdf(self.p_d34)
+
+    @classmethod
+    def from_draws(cls, draws: np.ndarray, **kwargs):
+        return cls(number_histogram(draws), **kwargs)
+
+    def _backoff(self, table: np.ndarray, marginal_counts: np.ndarray) -> np.ndarray:
+        n = table.sum(axis=1, keepdims=True)
+        weight = n / (n + self.alpha) if self.alpha > 0 else np.ones_like(n)
+        marginal = _normalize(marginal_counts + self.alpha)
+        return weight * _normalize(table) + (1 - weight) * marginal
+
+    def conditional_d2(self, d1: int) -> np.ndarray:
+        """P(d2 | d1) over the 10 digits"""
+        return self.p_d2[d1]
+
+    def conditional_d34(self, d1: int, d2: int) -> np.ndarray:
+        """P(d3d4 | d1d2) over the 100 two-digit endings"""
+        return self.p_d34[d1 * 10 + d2]
+
+    def probabilities(self) -> np.ndarray:
+        """(10000,) exact probability of every number"""
+        head = (self.p_d1[:, None] * self.p_d2).reshape(100, 1)
+        return (head * self.p_d34).ravel()
+
+    def probability(self, numbers) -> np.ndarray:
+        """Exact probability lookup for numbers given as ints or '0123' strings"""
+        idx = np.array([int(n) for n in np.atleast_1d(numbers)], dtype=np.int64)
+        d1, d2, d34 = idx // 1000, (idx // 100) % 10, idx % 100
+        return self.p_d1[d1] * self.p_d2[d1, d2] * self.p_d34[d1 * 10 + d2, d34]
+
+    def sample(self, n: int = 1, seed=None) -> np.ndarray:
+        """(n,) numbers drawn by chaining the conditional tables, batched"""
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        d1 = _sample_rows(self._cdf_d1, 10, np.zeros(n, dtype=np.int64), rng)
+        d2 = _sample_rows(self._cdf_d2, 10, d1, rng)
+        d34 = _sample_rows(self._cdf_d34, 100, d1 * 10 + d2, rng)
+        return d1 * 1000 + d2 * 100 + d34
+
+    def top(self, n: int = 10) -> np.ndarray:
+        """Most probable numbers under the smoothed joint"""
+        return np.argsort(-self.probabilities(), kind='stable')[:n]
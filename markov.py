@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+
+from toto_core import NUM_SPACE, PRIZE_COLUMNS, PLACE, digit_matrix
+
+
+class DrawTransitionModel:
+    """Between-draw model: positional digit transitions and gaps to repeat
+
+    transitions[c, p, a, b] counts how often digit a at position p of prize
+    column c was followed by digit b in the same column/position of the
+    next draw. Every repeat is kept as (gap_number, gap_value): the number
+    and the draws since its previous appearance, so number_gap_counts()
+    gives the gap-to-repeat histogram of one number (through a CSR by
+    number built on first use) and gap_counts[g] pools them over all
+    numbers. Both are built with np.add.at over the whole history and
+    updated in O(23) per appended draw (plus appending the new repeats).
+    """
+
+    def __init__(self, smoothing: float = 1.0):
+        self.smoothing = smoothing
+        self.transitions = np.zeros((PRIZE_COLUMNS, 4, 10, 10), dtype=np.int64)
+        self.gap_counts = np.zeros(1, dtype=np.int64)
+        self.gap_number = np.zeros(0, dtype=np.int64)
+        self.gap_value = np.zeros(0, dtype=np.int64)
+        self._gap_csr = None
+        self.last_seen = np.full(NUM_SPACE, -1, dtype=np.int64)
+        self.last_row = None
+        self.draw_count = 0
+
+    def fit(self, draws: np.ndarray):
+        """Rebuild from a (draws, 23) matrix"""
+        self.__init__(self.smoothing)
+        if len(draws) == 0:
+            return self
+
+        digits = digit_matrix(draws)
+        valid = (draws[:-1] >= 0) & (draws[1:] >= 0)
+        t, c = np.nonzero(valid)
+        for p in range(4):
+            np.add.at(self.transitions, (c, p, digits[t, c, p], digits[t + 1, c, p]), 1)
+
+        # gaps between consecutive appearances of the same number
+        rows, cols = np.nonzero(draws >= 0)
+        nums = draws[rows, cols].astype(np.int64)
+        order = np.lexsort((rows, nums))
+        nums, rows = nums[order], rows[order]
+        same = nums[1:] == nums[:-1]
+        gaps = (rows[1:] - rows[:-1])[same]
+        repeated = gaps > 0
+        self.gap_number = nums[1:][same][repeated]
+        self.gap_value = gaps[repeated].astype(np.int64)
+        self.gap_counts = np.bincount(self.gap_value, minlength=2)
+
+        self.last_seen[nums] = rows  # sorted by row within a number, so the last write wins
+        self.last_row = draws[-1].copy()
+        self.draw_count = len(draws)
+        return self
+
+    def update(self, draw_row: np.ndarray):
+        """Append one draw (23 numbers) in O(23)"""
+        row = np.asarray(draw_row, dtype=np.int64)
+        t = self.draw_count
+
+        if self.last_row is not None:
+            ok = (self.last_row >= 0) & (row >= 0)
+            c = np.nonzero(ok)[0]
+            prev = digit_matrix(self.last_row[c])
+            new = digit_matrix(row[c])
+            for p in range(4):
+                np.add.at(self.transitions, (c, p, prev[:, p], new[:, p]), 1)
+
+        nums = np.unique(row[row >= 0])
+        seen = nums[self.last_seen[nums] >= 0]
+        gaps = t - self.last_seen[seen]
+        if len(gaps) and gaps.max() >= len(self.gap_counts):
+            self.gap_counts = np.concatenate([self.gap_counts, np.zeros(gaps.max() + 1 - len(self.gap_counts), np.int64)])
+        np.add.at(self.gap_counts, gaps, 1)
+        if len(gaps):
+            self.gap_number = np.concatenate([self.gap_number, seen])
+            self.gap_value = np.concatenate([self.gap_value, gaps])
+            self._gap_csr = None
+
+        self.last_seen[nums] = t
+        self.last_row = row.copy()
+        self.draw_count += 1
+        return self
+
+    def transition_probabilities(self) -> np.ndarray:
+        """(23, 4, 10, 10) P(next digit | current digit), additively smoothed"""
+        counts = self.transitions + self.smoothing
+        return counts / counts.sum(axis=-1, keepdims=True)
+
+    def sample_next(self, n: int = 1000, seed: int = None) -> np.ndarray:
+        """(n, 23) sampled next draws given the last draw, fully vectorized"""
+        rng = np.random.default_rng(seed)
+        probs = self.transition_probabilities()
+        last = digit_matrix(np.where(self.last_row >= 0, self.last_row, 0))
+
+        # per column and position, the row of the transition matrix we are in
+        rows = probs[np.arange(PRIZE_COLUMNS)[:, None], np.arange(4)[None, :], last]
+        cdf = np.cumsum(rows, axis=-1)
+        u = rng.random((n, PRIZE_COLUMNS, 4, 1))
+        digits = np.minimum((u > cdf).sum(axis=-1), 9)
+        return (digits * PLACE).sum(axis=-1)
+
+    def next_draw_probabilities(self) -> np.ndarray:
+        """(10000,) expected appearances of each number in the next draw
+
+        Exact, no sampling: sum over the 23 columns of the product of the
+        four positional transition probabilities out of the last draw.
+        """
+        probs = self.transition_probabilities()
+        last = digit_matrix(np.where(self.last_row >= 0, self.last_row, 0))
+        rows = probs[np.arange(PRIZE_COLUMNS)[:, None], np.arange(4)[None, :], last]  # (23, 4, 10)
+
+        digits = digit_matrix(np.arange(NUM_SPACE))
+        per_column = np.ones((PRIZE_COLUMNS, NUM_SPACE))
+        for p in range(4):
+            per_column *= rows[:, p, digits[:, p]]
+        return per_column.sum(axis=0)
+
+    def gap_distribution(self) -> np.ndarray:
+        """P(gap = g) over all repeats seen so far"""
+        total = self.gap_counts.sum()
+        return self.gap_counts / total if total else self.gap_counts.astype(np.float64)
+
+    def _number_gaps(self):
+        """(offsets, gaps sorted by number) - repeat gaps grouped by number, chronological within one"""
+        if self._gap_csr is None:
+            order = np.argsort(self.gap_number, kind='stable')
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(self.gap_number, minlength=NUM_SPACE))])
+            self._gap_csr = (offsets, self.gap_value[order])
+        return self._gap_csr
+
+    def number_gaps(self, num) -> np.ndarray:
+        """Draws between consecutive appearances of one number, oldest first"""
+        offsets, gaps = self._number_gaps()
+        n = int(num)
+        return gaps[offsets[n]:offsets[n + 1]]
+
+    def number_gap_counts(self, num) -> np.ndarray:
+        """Gap-to-repeat histogram of one number: counts[g] repeats exactly g draws apart"""
+        return np.bincount(self.number_gaps(num), minlength=2)
+
+    def number_gap_distribution(self, num) -> np.ndarray:
+        """P(gap = g) over the repeats of one number"""
+        counts = self.number_gap_counts(num)
+        total = counts.sum()
+        return counts / total if total else counts.astype(np.float64)
+
+    def repeat_hazard(self) -> np.ndarray:
+        """P(repeat at the next draw | not repeated for the current gap), per number
+
+        The hazard curve is pooled over all numbers (a single number has too
+        few repeats for its own); each number is read at its current gap.
+        """
+        counts = self.gap_counts.astype(np.float64)
+        survival = np.cumsum(counts[::-1])[::-1]
+        hazard = np.divide(counts, survival, out=np.zeros_like(counts), where=survival > 0)
+
+        gap_now = self.draw_count - self.last_seen
+        idx = np.clip(gap_now, 0, len(hazard) - 1)
+        return np.where(self.last_seen >= 0, hazard[idx], 0.0)
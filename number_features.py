@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from toto_core import NUM_SPACE, digit_matrix
+
+# Digits of every number 0000-9999, (10000, 4)
+DIGITS = digit_matrix(np.arange(NUM_SPACE, dtype=np.int16)).astype(np.int16)
+
+
+def _structural_patterns() -> Dict[str, np.ndarray]:
+    """Vectorized versions of the number-only v2 patterns, over all 10000 numbers
+
+    Keys match analyze_all_patterns_for_number(); each value is a (10000,)
+    bool mask. Patterns that depend on the data (hot/cold digits, history,
+    dates) are not included here.
+    """
+    d0, d1, d2, d3 = (DIGITS[:, i] for i in range(4))
+    diffs = np.diff(DIGITS, axis=1)
+    even = (DIGITS % 2 == 0).sum(axis=1)
+    small = (DIGITS <= 4).sum(axis=1)
+    total = DIGITS.sum(axis=1)
+    digit_counts = np.stack([(DIGITS == v).sum(axis=1) for v in range(10)], axis=1)
+    distinct = (digit_counts > 0).sum(axis=1)
+    first2 = d0 * 10 + d1
+    last2 = d2 * 10 + d3
+    number = np.arange(NUM_SPACE)
+
+    p = {}
+    p['1_Sequential_Up'] = (diffs % 10 == 1).all(axis=1)
+    p['2_Sequential_Down'] = (diffs % 10 == 9).all(axis=1)
+    p['3_Palindrome'] = (d0 == d3) & (d1 == d2)
+    p['4_Mirror_ABBA'] = (d0 == d3) & (d1 == d2)
+    p['5_Repeat_AABB'] = (d0 == d1) & (d2 == d3) & (d0 != d2)
+    p['6_Alternating_ABAB'] = (d0 == d2) & (d1 == d3) & (d0 != d1)
+    p['7_All_Even'] = even == 4
+    p['8_All_Odd'] = even == 0
+    p['9_Mixed_Even_Odd'] = (even >= 1) & (even <= 3)
+    p['10_Small_0_4'] = small == 4
+    p['11_Big_5_9'] = small == 0
+    p['12_Big_Small_Mix'] = (small >= 1) & (small <= 3)
+    p['13_Aritmatika'] = (diffs[:, 0] == diffs[:, 1]) & (diffs[:, 1] == diffs[:, 2]) & (diffs[:, 0] != 0)
+    # equal ratios of single digits == equal cross products (exact, no float tolerance needed)
+    p['14_Geometri'] = (DIGITS != 0).all(axis=1) & (d1 * d1 == d0 * d2) & (d2 * d2 == d1 * d3)
+    p['15_Fibonacci_Like'] = (d2 == (d0 + d1) % 10) & (d3 == (d1 + d2) % 10)
+    p['16_Birthday_Pattern'] = (((first2 >= 1) & (first2 <= 31) & (last2 >= 1) & (last2 <= 12)) |
+                                ((last2 >= 1) & (last2 <= 31) & (first2 >= 1) & (first2 <= 12)) |
+                                ((number >= 1900) & (number <= 2100)))
+    p['17_Mountain'] = (d0 < d1) & (d1 > d2) & (d2 > d3)
+    p['18_Valley'] = (d0 > d1) & (d1 < d2) & (d2 < d3)
+    p['19_Plateau'] = (d1 == d2) & (d0 != d1) & (d2 != d3)
+    p['20_Cliff'] = (np.abs(diffs) >= 5).any(axis=1)
+    p['21_Double_Pair'] = (distinct == 2) & (d0 == d1) & (d2 == d3)
+    p['22_Triple'] = (digit_counts == 3).any(axis=1) & (distinct == 2)
+    p['23_Quad'] = distinct == 1
+    p['24_All_Different'] = distinct == 4
+    p['25_First_Last_Same'] = d0 == d3
+    p['26_Middle_Same'] = d1 == d2
+    p['27_Bookend'] = (d0 == d3) & (d1 == d2) & (d0 != d1)
+    p['28_Small_Total'] = total <= 9
+    p['29_Medium_Total'] = (total >= 10) & (total <= 18)
+    p['30_Large_Total'] = (total >= 19) & (total <= 27)
+    p['31_Extreme_Total'] = total >= 28
+
+    special = (p['3_Palindrome'].astype(np.int8) + p['4_Mirror_ABBA'] + p['5_Repeat_AABB'] +
+               p['6_Alternating_ABAB'] + p['13_Aritmatika'] + p['15_Fibonacci_Like'])
+    p['40_Special_Combination'] = special >= 2
+    return p
+
+
+STRUCTURAL_PATTERNS = _structural_patterns()
+
+
+def pattern_matrix(names: List[str] = None) -> Tuple[List[str], np.ndarray]:
+    """(names, (10000, k) bool) matrix of structural pattern membership"""
+    names = list(STRUCTURAL_PATTERNS) if names is None else names
+    return names, np.stack([STRUCTURAL_PATTERNS[n] for n in names], axis=1)
+
+
+def digit_sums() -> np.ndarray:
+    return DIGITS.sum(axis=1)
+
+
+def hot_digit_counts(hot_digits) -> np.ndarray:
+    """How many of each number's 4 digits are in the given digit set"""
+    member = np.zeros(10, dtype=bool)
+    member[[int(d) for d in hot_digits]] = True
+    return member[DIGITS].sum(axis=1)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import List, Tuple
+
+from toto_core import NUM_SPACE, PLACE, COLUMN_TIER, TIER_NAMES, digit_matrix
+
+# Permutation group of every number: its digits sorted ascending (4211 -> 1124)
+PERMUTATION_KEY = (np.sort(digit_matrix(np.arange(NUM_SPACE, dtype=np.int16)), axis=1).astype(np.int64)
+                   @ PLACE.astype(np.int64))
+
+
+def ragged_gather(offsets: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of every entry of CSR rows `keys`, and which query each came from"""
+    starts = offsets[keys]
+    lengths = offsets[keys + 1] - starts
+    total = int(lengths.sum())
+
+    query = np.repeat(np.arange(len(keys)), lengths)
+    # position inside each row = running index minus the row's first output slot
+    first_slot = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + (np.arange(total) - first_slot)
+    return positions, query
+
+
+class OccurrenceIndex:
+    """Number -> (draw, prize column) postings over the whole history
+
+    Occurrences are sorted by number (chronological within a number) and
+    addressed through a CSR `offsets` array, so all hits of any set of
+    numbers are gathered without scanning the draws.
+    """
+
+    def __init__(self, dates: np.ndarray, draws: np.ndarray):
+        self.dates = dates.astype('datetime64[D]')
+        self.draw_count = len(draws)
+
+        rows, cols = np.nonzero(draws >= 0)
+        nums = draws[rows, cols].astype(np.int64)
+        order = np.argsort(nums, kind='stable')
+
+        self.number = nums[order].astype(np.int16)
+        self.draw = rows[order].astype(np.int32)
+        self.column = cols[order].astype(np.uint8)
+        self.counts = np.bincount(self.number, minlength=NUM_SPACE)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+        self._perm_order = None
+        self._perm_offsets = None
+
+    @property
+    def tier(self) -> np.ndarray:
+        return COLUMN_TIER[self.column]
+
+    def seen(self) -> np.ndarray:
+        """All numbers that have been drawn at least once"""
+        return np.nonzero(self.counts)[0]
+
+    def gather(self, numbers) -> Tuple[np.ndarray, np.ndarray]:
+        """(occurrence positions, query position) for every hit of `numbers`"""
+        numbers = np.atleast_1d(np.asarray(numbers, dtype=np.int64))
+        return ragged_gather(self.offsets, numbers)
+
+    def gather_permutations(self, numbers) -> Tuple[np.ndarray, np.ndarray]:
+        """Like gather(), but a hit is any number with the same digits (i-box)"""
+        if self._perm_order is None:
+            keys = PERMUTATION_KEY[self.number]
+            self._perm_order = np.argsort(keys, kind='stable')
+            self._perm_offsets = np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=NUM_SPACE))])
+
+        numbers = np.atleast_1d(np.asarray(numbers, dtype=np.int64))
+        positions, query = ragged_gather(self._perm_offsets, PERMUTATION_KEY[numbers])
+        return self._perm_order[positions], query
+
+    def hits(self, num) -> List[Tuple[str, str]]:
+        """(date, tier) of every time one number was drawn"""
+        n = int(num)
+        sl = slice(self.offsets[n], self.offsets[n + 1])
+        return [(str(d), TIER_NAMES[t]) for d, t in zip(self.dates[self.draw[sl]], COLUMN_TIER[self.column[sl]])]
+
+    def window(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Number histogram restricted to draws[start:stop]"""
+        stop = self.draw_count if stop is None else stop
+        m = (self.draw >= start) & (self.draw < stop)
+        return np.bincount(self.number[m], minlength=NUM_SPACE)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import re
+import fnmatch
+import numpy as np
+from typing import Dict, List
+
+from toto_core import NUM_SPACE, TIER_NAMES, COLUMN_TIER, digit_matrix
+from occurrence_index import OccurrenceIndex
+
+_ALL = np.arange(NUM_SPACE, dtype=np.int64)
+_DIGITS = digit_matrix(_ALL.astype(np.int16)).astype(np.int64)
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n_keys: int):
+    """Sorted posting lists of `values` grouped by `keys`"""
+    order = np.lexsort((values, keys))
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n_keys))])
+    return offsets, values[order]
+
+
+def _build_positional():
+    """For position p and digit d: every number with digit d at p"""
+    postings = []
+    for pos in range(4):
+        postings.append(_csr(_DIGITS[:, pos], _ALL, 10))
+    return postings
+
+
+def _build_substrings():
+    """For every 1/2/3-digit string: every number that contains it"""
+    postings = {}
+    for length in (1, 2, 3):
+        grams = []
+        owners = []
+        for start in range(5 - length):
+            gram = np.zeros(NUM_SPACE, dtype=np.int64)
+            for k in range(length):
+                gram = gram * 10 + _DIGITS[:, start + k]
+            grams.append(gram)
+            owners.append(_ALL)
+
+        # one posting per (gram, number) even if the gram repeats ("1111")
+        pairs = np.unique(np.concatenate(grams) * NUM_SPACE + np.concatenate(owners))
+        postings[length] = _csr(pairs // NUM_SPACE, pairs % NUM_SPACE, 10 ** length)
+    return postings
+
+
+_POSITIONAL = _build_positional()
+_SUBSTRINGS = _build_substrings()
+
+
+def positional_posting(position: int, digit: int) -> np.ndarray:
+    """Numbers with `digit` at 0-based `position`"""
+    offsets, values = _POSITIONAL[position]
+    return values[offsets[digit]:offsets[digit + 1]]
+
+
+def substring_posting(digits: str) -> np.ndarray:
+    """Numbers that contain the digit string anywhere"""
+    if len(digits) == 4:
+        return np.array([int(digits)], dtype=np.int64)
+    offsets, values = _SUBSTRINGS[len(digits)]
+    key = int(digits)
+    return values[offsets[key]:offsets[key + 1]]
+
+
+def match_numbers(pattern: str) -> np.ndarray:
+    """All numbers 0000-9999 matching a wildcard pattern
+
+    '?' is exactly one digit and '*' any run of digits, e.g. '1?8?',
+    '*168*', '??7?'. Candidates come from intersecting posting lists;
+    only patterns that cannot be resolved from the lists alone are
+    confirmed with a regex on the (small) candidate set.
+    """
+    pattern = pattern.strip()
+    if not re.fullmatch(r'[0-9?*]+', pattern):
+        raise ValueError(f"invalid pattern '{pattern}' (use digits, ? and *)")
+
+    # A single '*' in a 4-digit world has a fixed width: '9*' == '9???'
+    if pattern.count('*') == 1 and len(pattern) <= 5:
+        pattern = pattern.replace('*', '?' * (5 - len(pattern)))
+
+    if '*' not in pattern:
+        if len(pattern) != 4:
+            return np.empty(0, dtype=np.int64)
+        result = _ALL
+        for pos, ch in enumerate(pattern):
+            if ch != '?':
+                result = np.intersect1d(result, positional_posting(pos, int(ch)), assume_unique=True)
+        return result
+
+    # Narrow with the literal digit runs, then confirm the full shape
+    result = _ALL
+    for run in re.findall(r'[0-9]+', pattern):
+        if len(run) > 4:
+            return np.empty(0, dtype=np.int64)
+        result = np.intersect1d(result, substring_posting(run), assume_unique=True)
+
+    if re.fullmatch(r'\*[0-9]{1,4}\*', pattern):
+        return result
+
+    regex = re.compile(fnmatch.translate(pattern))
+    return np.array([n for n in result if regex.match(f"{n:04d}")], dtype=np.int64)
+
+
+class PatternIndex:
+    """Wildcard / substring queries answered from posting lists
+
+    The positional and substring posting lists are over the 10000-number
+    space and shared by every dataset; the history side is an
+    OccurrenceIndex, so the cost of a query is the size of the posting
+    lists plus the hits returned, not the number of draws.
+    """
+
+    def __init__(self, occurrences: OccurrenceIndex):
+        self.occurrences = occurrences
+
+    def numbers(self, pattern: str, drawn_only: bool = True) -> np.ndarray:
+        nums = match_numbers(pattern)
+        if drawn_only:
+            nums = nums[self.occurrences.counts[nums] > 0]
+        return nums
+
+    def counts(self, pattern: str) -> Dict[str, int]:
+        """Historical count of every drawn number matching the pattern"""
+        nums = self.numbers(pattern)
+        return {f"{n:04d}": int(self.occurrences.counts[n]) for n in nums}
+
+    def query(self, pattern: str, limit: int = None) -> List[Dict]:
+        """Matching numbers with count, dates and tiers, most frequent first"""
+        occ = self.occurrences
+        nums = self.numbers(pattern)
+        nums = nums[np.argsort(-occ.counts[nums], kind='stable')]
+        if limit is not None:
+            nums = nums[:limit]
+
+        positions, query = occ.gather(nums)
+        dates = occ.dates[occ.draw[positions]].astype(str).tolist()
+        tiers = COLUMN_TIER[occ.column[positions]].tolist()
+        bounds = np.searchsorted(query, np.arange(len(nums) + 1))
+
+        results = []
+        for i, n in enumerate(nums):
+            sl = slice(bounds[i], bounds[i + 1])
+            results.append({
+                'number': f"{n:04d}",
+                'count': int(occ.counts[n]),
+                'hits': [(d, TIER_NAMES[t]) for d, t in zip(dates[sl], tiers[sl])],
+            })
+        return results
+
+    def digit_at(self, position: int, digit: int, limit: int = None) -> List[Dict]:
+        """Query for 'digit D in position P' (1-based position)"""
+        pattern = ['?'] * 4
+        pattern[position - 1] = str(digit)
+        return self.query(''.join(pattern), limit)
+
+
+def contains_any_mask(substrings) -> np.ndarray:
+    """Boolean mask over 0000-9999: number contains any of the digit strings"""
+    mask = np.zeros(NUM_SPACE, dtype=bool)
+    for sub in substrings:
+        mask[substring_posting(sub)] = True
+    return mask
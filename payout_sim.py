@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import sys
+import argparse
+import numpy as np
+from typing import Dict, List
+
+from toto_core import NUM_SPACE, COLUMN_TIER, read_draw_matrix
+
+# Prize per RM1 stake by tier: 1st, 2nd, 3rd, Special, Consolation
+DEFAULT_PRIZES = {
+    'big': [2500, 1000, 500, 180, 60],
+    'small': [3500, 2000, 1000, 0, 0],
+}
+
+
+def stake_vectors(tickets, big=1.0, small=0.0):
+    """Aggregate a ticket portfolio into (big, small) stake arrays over 0000-9999
+
+    `tickets` is a sequence of numbers, and `big` / `small` are either one
+    stake for every ticket or one stake per ticket. Repeated numbers add up.
+    """
+    numbers = np.array([int(t) for t in tickets], dtype=np.int64)
+    big = np.broadcast_to(np.asarray(big, dtype=np.float64), numbers.shape)
+    small = np.broadcast_to(np.asarray(small, dtype=np.float64), numbers.shape)
+
+    big_stake = np.bincount(numbers, weights=big, minlength=NUM_SPACE)
+    small_stake = np.bincount(numbers, weights=small, minlength=NUM_SPACE)
+    return big_stake, small_stake
+
+
+def read_stake_lines(source) -> Dict[str, list]:
+    """Parse 'number[,big[,small]]' lines from a path or '-' (stdin)"""
+    handle = sys.stdin if source == '-' else open(source, 'r')
+    tickets, big, small = [], [], []
+
+    try:
+        for line in handle:
+            parts = [p.strip() for p in line.replace(';', ',').split(',') if p.strip()]
+            if not parts or not parts[0].isdigit() or len(parts[0]) > 4:
+                continue
+            tickets.append(parts[0].zfill(4))
+            big.append(float(parts[1]) if len(parts) > 1 else 1.0)
+            small.append(float(parts[2]) if len(parts) > 2 else 0.0)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+    return {'tickets': tickets, 'big': big, 'small': small}
+
+
+class PayoutResult:
+    """Per-draw cost / payout of a portfolio and its derived P&L series"""
+
+    def __init__(self, dates, cost, payout, expected, period='Y'):
+        self.dates = dates
+        self.cost = cost
+        self.payout = payout
+        self.expected_payout = expected
+        self.pnl = payout - cost
+        self.cumulative = np.cumsum(self.pnl)
+        self.drawdown = np.maximum.accumulate(np.maximum(self.cumulative, 0)) - self.cumulative
+        self.period = period
+
+    @property
+    def total_cost(self) -> float:
+        return float(self.cost.sum())
+
+    @property
+    def total_payout(self) -> float:
+        return float(self.payout.sum())
+
+    @property
+    def max_drawdown(self) -> float:
+        return float(self.drawdown.max()) if len(self.drawdown) else 0.0
+
+    @property
+    def actual_return(self) -> float:
+        return self.total_payout / self.total_cost - 1 if self.total_cost else 0.0
+
+    @property
+    def expected_return(self) -> float:
+        """Return under uniformly random draws (the analytic house edge)"""
+        return float(self.expected_payout.sum()) / self.total_cost - 1 if self.total_cost else 0.0
+
+    def by_period(self) -> List[Dict]:
+        """Cost, payout, P&L and return per calendar period ('Y' or 'M')"""
+        periods = self.dates.astype(f'datetime64[{self.period}]')
+        labels, group = np.unique(periods, return_inverse=True)
+        cost = np.bincount(group, weights=self.cost, minlength=len(labels))
+        payout = np.bincount(group, weights=self.payout, minlength=len(labels))
+        hits = np.bincount(group, weights=self.payout > 0, minlength=len(labels))
+
+        return [{
+            'period': str(label),
+            'cost': float(c),
+            'payout': float(p),
+            'pnl': float(p - c),
+            'return': float(p / c - 1) if c else 0.0,
+            'winning_draws': int(h),
+        } for label, c, p, h in zip(labels, cost, payout, hits)]
+
+    def summary(self) -> Dict:
+        return {
+            'draws': len(self.cost),
+            'total_cost': self.total_cost,
+            'total_payout': self.total_payout,
+            'pnl': self.total_payout - self.total_cost,
+            'actual_return': self.actual_return,
+            'expected_return': self.expected_return,
+            'max_drawdown': self.max_drawdown,
+            'winning_draws': int((self.payout > 0).sum()),
+        }
+
+
+def simulate(dates: np.ndarray, draws: np.ndarray, big_stake: np.ndarray, small_stake: np.ndarray,
+             prizes: Dict[str, list] = None, period: str = 'Y') -> PayoutResult:
+    """Replay a portfolio over every draw without a Python loop over draws
+
+    Stakes are (10000,) arrays, so the cost is one gather of the stakes at
+    the (draws, 23) drawn numbers times the per-column prize, regardless
+    of how many tickets the portfolio holds.
+    """
+    prizes = prizes or DEFAULT_PRIZES
+    big_col = np.asarray(prizes['big'], dtype=np.float64)[COLUMN_TIER]
+    small_col = np.asarray(prizes['small'], dtype=np.float64)[COLUMN_TIER]
+
+    valid = draws >= 0
+    nums = np.where(valid, draws, 0)
+
+    won = big_stake[nums] * big_col + small_stake[nums] * small_col
+    payout = np.where(valid, won, 0.0).sum(axis=1)
+
+    per_draw_cost = float(big_stake.sum() + small_stake.sum())
+    cost = np.full(len(draws), per_draw_cost)
+
+    # Each prize column is (marginally) a uniform number out of 10000
+    expected = (big_stake.sum() * big_col.sum() + small_stake.sum() * small_col.sum()) / NUM_SPACE
+    return PayoutResult(dates, cost, payout, np.full(len(draws), expected), period)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a ticket portfolio over the draw history")
+    parser.add_argument('data', help="Draw_Date,01..23 data file")
+    parser.add_argument('tickets', nargs='?', default='-', help="'number[,big[,small]]' lines, '-' for stdin")
+    parser.add_argument('--period', choices=['Y', 'M'], default='Y')
+    args = parser.parse_args()
+
+    dates, draws = read_draw_matrix(args.data)
+    portfolio = read_stake_lines(args.tickets)
+    big_stake, small_stake = stake_vectors(portfolio['tickets'], portfolio['big'], portfolio['small'])
+    result = simulate(dates, draws, big_stake, small_stake, period=args.period)
+
+    s = result.summary()
+    print(f"Tickets: {len(portfolio['tickets']):,} | Draws: {s['draws']:,}")
+    print(f"Cost: RM{s['total_cost']:,.2f} | Payout: RM{s['total_payout']:,.2f} | P&L: RM{s['pnl']:,.2f}")
+    print(f"Return: {s['actual_return']:.2%} (uniform random expectation {s['expected_return']:.2%})")
+    print(f"Max drawdown: RM{s['max_drawdown']:,.2f} | Winning draws: {s['winning_draws']:,}")
+    print("\nperiod,cost,payout,pnl,return")
+    for row in result.by_period():
+        print(f"{row['period']},{row['cost']:.2f},{row['payout']:.2f},{row['pnl']:.2f},{row['return']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import List
+
+from toto_core import NUM_SPACE
+from drift import feature_codes
+from histogram_stats import PrefixHistogram
+
+
+class Comparison:
+    """Per-bin differences between two periods A and B
+
+    Rates are per drawn number (so periods of different lengths compare);
+    for positional digits that is the share of numbers with that digit there.
+    The test statistic conditions on each bin's total c = a + b: under "no
+    change" b ~ Binomial(c, share of B in the total exposure), and z is the
+    standardized excess of b. rate_ratio uses a 0.5 continuity correction.
+    """
+
+    def __init__(self, counts_a: np.ndarray, counts_b: np.ndarray, labels,
+                 exposure_a: int = None, exposure_b: int = None):
+        self.counts_a = counts_a.astype(np.int64)
+        self.counts_b = counts_b.astype(np.int64)
+        self.labels = labels
+        self.exposure_a = max(int(self.counts_a.sum() if exposure_a is None else exposure_a), 1)
+        self.exposure_b = max(int(self.counts_b.sum() if exposure_b is None else exposure_b), 1)
+
+        self.rate_a = self.counts_a / self.exposure_a
+        self.rate_b = self.counts_b / self.exposure_b
+        self.difference = self.rate_b - self.rate_a
+        self.rate_ratio = ((self.counts_b + 0.5) / self.exposure_b) / ((self.counts_a + 0.5) / self.exposure_a)
+
+        share_b = self.exposure_b / (self.exposure_a + self.exposure_b)
+        total = self.counts_a + self.counts_b
+        var = total * share_b * (1 - share_b)
+        self.z = np.divide(self.counts_b - total * share_b, np.sqrt(var),
+                           out=np.zeros(len(total)), where=var > 0)
+
+    def top_movers(self, n: int = 10, direction: str = 'both') -> List[dict]:
+        """Largest |z| ('both'), largest rises ('up') or largest falls ('down')"""
+        key = {'both': -np.abs(self.z), 'up': -self.z, 'down': self.z}[direction]
+        return [self.row(i) for i in np.argsort(key, kind='stable')[:n]]
+
+    def row(self, i: int) -> dict:
+        return {'label': self.labels[i], 'count_a': int(self.counts_a[i]), 'count_b': int(self.counts_b[i]),
+                'rate_a': float(self.rate_a[i]), 'rate_b': float(self.rate_b[i]),
+                'rate_ratio': float(self.rate_ratio[i]), 'z': float(self.z[i])}
+
+
+class PeriodComparator:
+    """Compare any two date ranges over all 10000 numbers and all positional digits
+
+    Number histograms are checkpointed every `block` draws and digit
+    histograms at every draw, so a comparison costs four checkpoint lookups
+    plus at most 4 * block draws of bincount, regardless of range length.
+    """
+
+    def __init__(self, dates: np.ndarray, draws: np.ndarray, block: int = 64):
+        self.dates = np.asarray(dates).astype('datetime64[D]')
+        self.numbers = PrefixHistogram(draws, NUM_SPACE, block)
+        digit_codes, n_bins = feature_codes(draws, 'digit')
+        self.digits = PrefixHistogram(digit_codes, n_bins)
+        self.number_labels = [f"{n:04d}" for n in range(NUM_SPACE)]
+        self.digit_labels = [f"pos{p + 1}={d}" for p in range(4) for d in range(10)]
+
+    def rows(self, start=None, stop=None):
+        """Draw rows [first, last) for dates start <= date <= stop"""
+        first = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), 'left'))
+        last = len(self.dates) if stop is None else int(np.searchsorted(self.dates, np.datetime64(stop, 'D'), 'right'))
+        return first, max(first, last)
+
+    def compare(self, period_a, period_b):
+        """(numbers Comparison, positional digits Comparison) for two (start, stop) date ranges
+
+        Either bound may be None for the start / end of the history.
+        """
+        a, b = self.rows(*period_a), self.rows(*period_b)
+        numbers = Comparison(self.numbers.range(*a), self.numbers.range(*b), self.number_labels)
+        digits = Comparison(self.digits.range(*a), self.digits.range(*b), self.digit_labels,
+                            numbers.exposure_a, numbers.exposure_b)
+        return numbers, digits
+
+    def before_after(self, date):
+        """Compare everything before `date` with everything from `date` on"""
+        cut = np.datetime64(date, 'D')
+        return self.compare((None, cut - np.timedelta64(1, 'D')), (cut, None))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict, List
+
+from toto_core import NUM_SPACE
+from occurrence_index import PERMUTATION_KEY
+from number_features import digit_sums, pattern_matrix
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        as_bytes = words.view(np.uint8).reshape(words.shape[:-1] + (-1,))
+        return _BYTE_BITS[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def _pack_bits(member: np.ndarray) -> np.ndarray:
+    """(10000, k) bool -> (10000, ceil(k / 64)) uint64 bitsets"""
+    k = member.shape[1]
+    words = (k + 63) // 64
+    padded = np.zeros((member.shape[0], words * 64), dtype=bool)
+    padded[:, :k] = member
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view(np.uint64)
+
+
+class CoverageOptimizer:
+    """Pick N tickets that cover as many criteria elements as possible
+
+    Elements are grouped by criterion:
+      permutation  the 715 digit-multiset groups (1234 == 4321)
+      digit_sum    digit-sum buckets (default one per sum 0-36)
+      pattern      the structural v2 pattern classes
+      hot          each of the given hot numbers
+    Every number is a bitset over all elements; greedy selection and swap
+    local search evaluate all 10000 candidates at once with AND-NOT and
+    popcount over those bitsets.
+    """
+
+    CRITERIA = ('permutation', 'digit_sum', 'pattern', 'hot')
+
+    def __init__(self, hot_numbers=None, weights: Dict[str, float] = None,
+                 sum_buckets=None, criteria=CRITERIA):
+        self.criteria = [c for c in criteria if c != 'hot' or hot_numbers is not None]
+        self.weights = {c: 1.0 for c in self.criteria}
+        self.weights.update(weights or {})
+
+        members = {}
+        if 'permutation' in self.criteria:
+            groups, inverse = np.unique(PERMUTATION_KEY, return_inverse=True)
+            members['permutation'] = np.eye(len(groups), dtype=bool)[inverse]
+
+        if 'digit_sum' in self.criteria:
+            edges = np.arange(37) if sum_buckets is None else np.asarray(sum_buckets)
+            bucket = np.searchsorted(edges, digit_sums(), side='right') - 1
+            members['digit_sum'] = np.eye(len(edges), dtype=bool)[np.clip(bucket, 0, len(edges) - 1)]
+
+        if 'pattern' in self.criteria:
+            self.pattern_names, members['pattern'] = pattern_matrix()
+
+        if 'hot' in self.criteria:
+            hot = np.array([int(n) for n in hot_numbers], dtype=np.int64)
+            hot_member = np.zeros((NUM_SPACE, len(hot)), dtype=bool)
+            hot_member[hot, np.arange(len(hot))] = True
+            members['hot'] = hot_member
+
+        self.sizes = {c: members[c].shape[1] for c in self.criteria}
+        self.bits = {c: _pack_bits(members[c]) for c in self.criteria}
+
+    def _gains(self, covered: Dict[str, np.ndarray]) -> np.ndarray:
+        gain = np.zeros(NUM_SPACE, dtype=np.float64)
+        for c in self.criteria:
+            gain += self.weights[c] * _popcount(self.bits[c] & ~covered[c])
+        return gain
+
+    def _cover(self, tickets) -> Dict[str, np.ndarray]:
+        covered = {}
+        for c in self.criteria:
+            words = self.bits[c][list(tickets)] if len(tickets) else np.zeros((1,) + self.bits[c].shape[1:], np.uint64)
+            covered[c] = np.bitwise_or.reduce(words, axis=0)
+        return covered
+
+    def coverage(self, tickets) -> Dict[str, float]:
+        """Fraction of each criterion's elements covered by the tickets"""
+        covered = self._cover([int(t) for t in tickets])
+        return {c: int(_popcount(covered[c])) / self.sizes[c] for c in self.criteria}
+
+    def score(self, tickets) -> float:
+        covered = self._cover([int(t) for t in tickets])
+        return float(sum(self.weights[c] * _popcount(covered[c]) for c in self.criteria))
+
+    def optimize(self, n_tickets: int = 100, budget: float = None, stake: float = 1.0,
+                 candidates=None, local_search_passes: int = 2) -> List[str]:
+        """Greedy max-coverage, then swap moves until no swap improves the score"""
+        if budget is not None:
+            n_tickets = min(n_tickets, int(budget // stake))
+
+        allowed = np.zeros(NUM_SPACE, dtype=bool)
+        allowed[np.arange(NUM_SPACE) if candidates is None else [int(c) for c in candidates]] = True
+
+        chosen = []
+        covered = self._cover([])
+        for _ in range(min(n_tickets, int(allowed.sum()))):
+            gain = np.where(allowed, self._gains(covered), -1.0)
+            best = int(np.argmax(gain))
+            chosen.append(best)
+            allowed[best] = False
+            for c in self.criteria:
+                covered[c] |= self.bits[c][best]
+
+        for _ in range(local_search_passes):
+            improved = False
+            for i in range(len(chosen)):
+                rest = chosen[:i] + chosen[i + 1:]
+                rest_cover = self._cover(rest)
+                gain = self._gains(rest_cover)
+                current = gain[chosen[i]]
+                gain = np.where(allowed, gain, -1.0)
+                best = int(np.argmax(gain))
+                if gain[best] > current:
+                    allowed[chosen[i]] = True
+                    allowed[best] = False
+                    chosen[i] = best
+                    improved = True
+            if not improved:
+                break
+
+        return [f"{n:04d}" for n in chosen]
@@ -10,22 +10,93 @@ import os
 import sys
 from io import StringIO
 import gc
+import copy
+from toto_core import frame_to_draw_matrix, all_numbers
+from decay_model import DecayFrequencyModel
+from ticket_checker import check_tickets, clean_tickets
+from payout_sim import stake_vectors, simulate
+from portfolio import CoverageOptimizer
+import consensus
+from markov import DrawTransitionModel
+from joint_model import JointDigitDistribution
+from drift import DriftDetector
+from period_compare import PeriodComparator
+from repeat_analysis import RepeatAnalysis
+from bootstrap import bootstrap_hot_cold
+from feature_export import draw_feature_matrix, number_feature_matrix, save_matrix
+import baseline_model
+from result_cache import (ResultCache, DatasetHasher, DEFAULT_CACHE_DIR, DEFAULT_CACHE_BYTES, file_hash, tee_stdout,
+                          optional_cache)
+from snapshot import Snapshot, SnapshotStore, reads, snapshot_field
+from derived_graph import draw_graph, derived_field
+from instrumentation import Metrics, stage, timed
 warnings.filterwarnings('ignore')
 
 class TOTO4DAnalyzer:
-    def __init__(self, data_file=None, chunk_size=10000):
-        """Initialize the TOTO 4D Analyzer"""
-        self.data = None
-        self.all_numbers_flat = []
-        self.digit_data = []
-        self.recent_data = None
+    # Dataset state lives in one immutable Snapshot; loads and appends build a
+    # new one and swap it in, so readers never see a half-built dataset
+    data = snapshot_field('data')
+    recent_data = snapshot_field('recent_data')
+    all_numbers_flat = snapshot_field('all_numbers_flat')
+    digit_data = snapshot_field('digit_data')
+    draws = snapshot_field('draws')
+    draw_dates = snapshot_field('draw_dates')
+    decay_model = snapshot_field('decay_model')
+    transition_model = snapshot_field('transition_model')
+    dataset_hash = snapshot_field('dataset_hash')
+    
+    # Statistics derived from the draws: computed on first use, then carried
+    # across append_draw() (kept, updated incrementally or recomputed)
+    DERIVED = draw_graph()
+    DERIVED.add('period_comparator', ['draw_dates', 'draws'], PeriodComparator)
+    occurrence_index = derived_field('occurrence_index')
+    period_comparator = derived_field('period_comparator')
+    
+    EMPTY = Snapshot(data=None, recent_data=None, all_numbers_flat=[], digit_data=[], draws=None, draw_dates=None,
+                     decay_model=None, transition_model=None, dataset_hasher=None, dataset_hash=None)
+    
+    def __init__(self, data_file=None, chunk_size=10000, half_life=None, cache=None, metrics=None):
+        """Initialize the TOTO 4D Analyzer (cache: optional ResultCache, metrics: optional Metrics)"""
         self.chunk_size = chunk_size
+        self.half_life = half_life
+        self.cache = cache
+        self.metrics = metrics
+        self._store = SnapshotStore(self.EMPTY)
         
         if data_file:
             self.load_data_large(data_file)
     
-    def load_data_large(self, file_path):
-        """Load historical data"""
+    @property
+    def snapshot(self):
+        """The dataset version this thread / task is reading"""
+        return self._store.current()
+    
+    def snapshot_pinned(self):
+        """Context manager: every call inside the block reads the same snapshot"""
+        return self._store.pin()
+    
+    def derived(self, name):
+        """A derived statistic of the (pinned) snapshot, see derived_graph.draw_graph()"""
+        snapshot = self._store.current()
+        if snapshot.draws is None:
+            return None
+        return self.DERIVED.values(snapshot).get(name)
+    
+    @reads
+    def recompute_report(self):
+        """Which derived statistics this dataset version computed, updated, reused or dropped"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        report = self.DERIVED.values(self.snapshot).report()
+        print(f"\n🔁 DERIVED STATISTICS ({len(self.draws):,} draws):")
+        for row in report:
+            print(f"   • {row['node']}: {row['action']} ({row['seconds'] * 1000:.2f} ms)")
+        return report
+    
+    def load_data_large(self, file_path, sketch=None):
+        """Load historical data (optionally feeding each chunk to a DrawStreamSketch)"""
         try:
             if not os.path.exists(file_path):
                 print(f"❌ File '{file_path}' Not Found!")
@@ -33,29 +104,52 @@ class TOTO4DAnalyzer:
             
             print(f"📂 Load Data From : {file_path}")
             
+            load_key = None
+            if self.cache is not None and sketch is None:
+                with stage(self.metrics, 'load.cache_read'):
+                    load_key = self.cache.key(file_hash(file_path), 'TOTO4DAnalyzer.snapshot',
+                                              {'chunk_size': self.chunk_size})
+                    cached = self.cache.get(load_key)
+                if cached is not None:
+                    snapshot = cached.replace(decay_model=self._decay_model(cached.draws),
+                                              dataset_hasher=DatasetHasher(cached.draw_dates, cached.draws))
+                    self._store.swap(snapshot)
+                    print(f"✅ Data Loaded From Cache : {len(snapshot.data):,} Record")
+                    return True
+            
             # Read data
             chunks = []
             chunk_count = 0
             
-            for chunk in pd.read_csv(file_path, chunksize=self.chunk_size):
-                chunk_count += 1
-                chunks.append(chunk)
+            with stage(self.metrics, 'load.read_csv'):
+                for chunk in pd.read_csv(file_path, chunksize=self.chunk_size):
+                    chunk_count += 1
+                    chunks.append(chunk)
+                    
+                    if sketch is not None:
+                        chunk_columns = [col for col in chunk.columns if col != 'Draw_Date']
+                        sketch.consume(frame_to_draw_matrix(chunk, chunk_columns))
+                    
+                    if chunk_count % 10 == 0:
+                        print(f"   Chunk {chunk_count}...")
+                    
+                    if chunk_count > 100:
+                        break
                 
-                if chunk_count % 10 == 0:
-                    print(f"   Chunk {chunk_count}...")
+                data = pd.concat(chunks, ignore_index=True)
                 
-                if chunk_count > 100:
-                    break
+                del chunks
+                gc.collect()
             
-            self.data = pd.concat(chunks, ignore_index=True)
-            
-            del chunks
-            gc.collect()
-            
-            print(f"✅ Data Loaded Successfull : {len(self.data):,} Record")
+            print(f"✅ Data Loaded Successfull : {len(data):,} Record")
             
             # Preprocessing
-            success = self.preprocess_data_large()
+            with stage(self.metrics, 'load.preprocess'):
+                success = self.preprocess_data_large(data)
+            if success and load_key is not None:
+                # the hasher cannot be pickled and the decay model depends on the half-life
+                with stage(self.metrics, 'load.cache_write'):
+                    self.cache.put(load_key, self.snapshot.replace(decay_model=None, dataset_hasher=None))
             return success
             
         except Exception as e:
@@ -64,56 +158,74 @@ class TOTO4DAnalyzer:
             traceback.print_exc()
             return False
     
-    def preprocess_data_large(self):
-        """Preprocess data"""
+    def preprocess_data_large(self, data=None):
+        """Preprocess data (default: the current snapshot's) into a new snapshot and swap it in"""
         try:
-            if 'Draw_Date' in self.data.columns:
-                self.data['Draw_Date'] = pd.to_datetime(self.data['Draw_Date'], errors='coerce')
-                self.data = self.data[self.data['Draw_Date'].notna()]
-                self.data = self.data.sort_values('Draw_Date', ascending=True)
+            data = (self.data if data is None else data).copy()
+            if 'Draw_Date' in data.columns:
+                data['Draw_Date'] = pd.to_datetime(data['Draw_Date'], errors='coerce')
+                data = data[data['Draw_Date'].notna()]
+                data = data.sort_values('Draw_Date', ascending=True)
                 
-                print(f"📊 Total Voting Results : {len(self.data):,}")
+                print(f"📊 Total Voting Results : {len(data):,}")
                 
-                self.recent_data = self.data.tail(1000).copy() if len(self.data) >= 1000 else self.data.copy()
+                recent_data = data.tail(1000).copy() if len(data) >= 1000 else data.copy()
             else:
                 print("❌ Columns 'Draw_Date' Not Found!")
                 return False
             
             # Process numbers
-            number_columns = [col for col in self.data.columns if col != 'Draw_Date']
+            number_columns = [col for col in data.columns if col != 'Draw_Date']
             
             print(f"🔢 Processing {len(number_columns)} Columns...")
             
-            self.all_numbers_flat = []
-            self.digit_data = []
-            
-            # Process in batches
-            batch_size = 5000
-            total_batches = (len(self.data) + batch_size - 1) // batch_size
-            
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min((batch_idx + 1) * batch_size, len(self.data))
-                
-                batch_data = self.data.iloc[start_idx:end_idx]
+            with stage(self.metrics, 'preprocess.numbers'):
+                all_numbers_flat = []
+                digit_data = []
                 
-                for _, row in batch_data.iterrows():
-                    for col in number_columns:
-                        num_str = str(row[col]).strip()
-                        if num_str and num_str != 'nan' and num_str != 'None':
-                            num_str = num_str.zfill(4)[:4]
-                            if len(num_str) == 4 and num_str.isdigit():
-                                self.all_numbers_flat.append(num_str)
-                                self.digit_data.append([int(d) for d in num_str])
+                # Process in batches
+                batch_size = 5000
+                total_batches = (len(data) + batch_size - 1) // batch_size
                 
-                if batch_idx % 20 == 0:
-                    print(f"   Progress: {(end_idx/len(self.data)*60):.1f}%")
+                for batch_idx in range(total_batches):
+                    start_idx = batch_idx * batch_size
+                    end_idx = min((batch_idx + 1) * batch_size, len(data))
+                    
+                    batch_data = data.iloc[start_idx:end_idx]
+                    
+                    for _, row in batch_data.iterrows():
+                        for col in number_columns:
+                            num_str = str(row[col]).strip()
+                            if num_str and num_str != 'nan' and num_str != 'None':
+                                num_str = num_str.zfill(4)[:4]
+                                if len(num_str) == 4 and num_str.isdigit():
+                                    all_numbers_flat.append(num_str)
+                                    digit_data.append([int(d) for d in num_str])
+                    
+                    if batch_idx % 20 == 0:
+                        print(f"   Progress: {(end_idx/len(data)*60):.1f}%")
             
-            print(f"✅ Total Number Processed : {len(self.all_numbers_flat):,}")
+            print(f"✅ Total Number Processed : {len(all_numbers_flat):,}")
             
-            # Convert to numpy for efficiency
-            self.all_numbers_flat = np.array(self.all_numbers_flat, dtype='U4')
-            self.digit_data = np.array(self.digit_data, dtype=np.uint8)
+            # Numeric (draws, 23) matrix for the vectorized models
+            with stage(self.metrics, 'preprocess.models'):
+                draws = frame_to_draw_matrix(data, number_columns)
+                draw_dates = data['Draw_Date'].to_numpy().astype('datetime64[D]')
+                hasher = DatasetHasher(draw_dates, draws)
+                
+                self._store.swap(Snapshot(
+                    data=data,
+                    recent_data=recent_data,
+                    # numpy for efficiency
+                    all_numbers_flat=np.array(all_numbers_flat, dtype='U4'),
+                    digit_data=np.array(digit_data, dtype=np.uint8),
+                    draws=draws,
+                    draw_dates=draw_dates,
+                    decay_model=self._decay_model(draws),
+                    transition_model=DrawTransitionModel().fit(draws),
+                    dataset_hasher=hasher,
+                    dataset_hash=hasher.hexdigest(),
+                ))
             
             return True
             
@@ -123,10 +235,384 @@ class TOTO4DAnalyzer:
             traceback.print_exc()
             return False
     
+    def _decay_model(self, draws):
+        if self.half_life and draws is not None:
+            return DecayFrequencyModel(self.half_life).rebuild(draws)
+        return None
+    
+    def set_half_life(self, half_life=None):
+        """Switch hot/cold and predictions to recency weighting (None = plain counts)"""
+        self.half_life = half_life
+        snapshot = self._store.update(lambda snap: self.DERIVED.carry(
+            snap, snap.replace(decay_model=self._decay_model(snap.draws)), {}))
+        return snapshot.decay_model
+    
+    @reads
+    def cached(self, name, compute, params=None, seed=None):
+        """compute() through the result cache, keyed by the current dataset (no cache: just compute)"""
+        if self.cache is None or self.dataset_hash is None:
+            return compute()
+        return self.cache.cached(self.dataset_hash, name, compute, params, seed)
+    
+    def append_draw(self, draw_row, draw_date):
+        """Add one new draw (23 numbers, -1 = missing) drawn on draw_date as a new snapshot
+        
+        The date is required: period comparisons, the count cube and drift
+        boundaries are keyed by date. The recency and transition models are
+        copied and updated in O(23), derived statistics are carried over (see
+        recompute_report()); the dataset hash moves on, so results cached for
+        the old history are not reused. Readers that pinned the old snapshot
+        keep it.
+        """
+        row = np.asarray(draw_row, dtype=np.int16).reshape(-1)
+        date = np.datetime64(draw_date, 'D') if draw_date is not None else np.datetime64('NaT', 'D')
+        if np.isnat(date):
+            raise ValueError("append_draw needs the draw date")
+        
+        def grow(snap):
+            if snap.draws is None:
+                return snap
+            
+            decay_model = copy.deepcopy(snap.decay_model)
+            if decay_model is not None:
+                decay_model.update(row)
+            transition_model = copy.deepcopy(snap.transition_model)
+            transition_model.update(row)
+            
+            numbers = [f"{n:04d}" for n in row if n >= 0]
+            number_columns = [col for col in snap.data.columns if col != 'Draw_Date']
+            new_row = {'Draw_Date': pd.Timestamp(date)}
+            new_row.update({col: (int(n) if n >= 0 else np.nan) for col, n in zip(number_columns, row)})
+            data = pd.concat([snap.data, pd.DataFrame([new_row])], ignore_index=True)
+            draws = np.vstack([snap.draws, row[None, :]])
+            draw_dates = np.append(snap.draw_dates, date)
+            hasher = snap.dataset_hasher.copy().append(date, row)
+            
+            return self.DERIVED.carry(snap, snap.replace(
+                data=data,
+                recent_data=data.tail(1000).copy(),
+                all_numbers_flat=np.concatenate([snap.all_numbers_flat, np.array(numbers, dtype='U4')]),
+                digit_data=np.concatenate([snap.digit_data, np.array([[int(d) for d in n] for n in numbers],
+                                                                     dtype=np.uint8).reshape(-1, 4)]),
+                draws=draws,
+                draw_dates=draw_dates,
+                decay_model=decay_model,
+                transition_model=transition_model,
+                dataset_hasher=hasher,
+                dataset_hash=hasher.hexdigest(),
+            ), {'draws': row[None, :], 'draw_dates': np.array([date])})
+        
+        self._store.update(grow)
+    
+    @reads
+    def ticket_history_check(self, tickets, permutation=False):
+        """How would these tickets have done? Hits per tier for every ticket"""
+        if self.occurrence_index is None:
+            print("❌ Data Not Yet Processed!")
+            return None
+        
+        # same rule as read_tickets: 1-4 digit numbers only
+        tickets = clean_tickets(tickets)
+        hits = check_tickets(self.occurrence_index, tickets, np.array(tickets, dtype=np.int64), permutation)
+        summary = hits.summary()
+        
+        mode = "i-box" if permutation else "exact"
+        print(f"\n🎫 {len(tickets):,} Tickets Checked ({mode}): {len(hits):,} Historical Hits")
+        for ticket, row in list(zip(tickets, summary))[:20]:
+            print(f"   • {ticket}: {row.sum()} hits (1st {row[0]}, 2nd {row[1]}, 3rd {row[2]}, "
+                  f"special {row[3]}, consolation {row[4]})")
+        
+        return hits
+    
+    @reads
+    def payout_simulation(self, tickets, big=1.0, small=0.0, prizes=None, period='Y'):
+        """What would these tickets have paid over every draw? (Big/Small in RM)"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return None
+        
+        big_stake, small_stake = stake_vectors(tickets, big, small)
+        result = simulate(self.draw_dates, self.draws, big_stake, small_stake, prizes, period)
+        summary = result.summary()
+        
+        print(f"\n💰 Historical Payout ({len(tickets):,} tickets, {summary['draws']:,} draws):")
+        print(f"   • Cost: RM{summary['total_cost']:,.2f}")
+        print(f"   • Payout: RM{summary['total_payout']:,.2f}")
+        print(f"   • Return: {summary['actual_return']:.2%} (random expectation {summary['expected_return']:.2%})")
+        print(f"   • Max Drawdown: RM{summary['max_drawdown']:,.2f}")
+        
+        return result
+    
+    @reads
+    def coverage_portfolio(self, n_tickets=100, budget=None, stake=1.0, hot_n=100, weights=None):
+        """N tickets covering permutation groups, digit sums, patterns and hot numbers"""
+        if len(self.all_numbers_flat) == 0:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        unique_values, counts = self._number_frequencies()
+        hot = unique_values[np.argsort(-counts, kind='stable')[:hot_n]]
+        
+        optimizer = CoverageOptimizer(hot_numbers=hot, weights=weights)
+        tickets = optimizer.optimize(n_tickets, budget, stake)
+        
+        print(f"\n🎯 COVERAGE PORTFOLIO ({len(tickets)} tickets):")
+        for name, share in optimizer.coverage(tickets).items():
+            print(f"   • {name}: {share:.1%} covered")
+        print(f"   {', '.join(tickets[:20])}{' ...' if len(tickets) > 20 else ''}")
+        
+        return tickets
+    
+    @reads
+    def score_vector(self, name):
+        """Standardized score of all 10000 numbers for one of the 11 analyses (from its derived statistics)"""
+        return consensus.standardize(consensus.SCORERS[name](self.DERIVED.values(self.snapshot)))
+    
+    def _consensus(self, top_n, weights, fit_weights):
+        """(top_n numbers, their scores, weights used) of the weighted consensus"""
+        if fit_weights:
+            weights = self.cached('consensus.fit_weights', lambda: consensus.fit_weights(self.draws))
+        scores = consensus.consensus_scores(self.DERIVED.values(self.snapshot), weights)
+        ranked = np.argsort(-scores, kind='stable')[:top_n]
+        return ranked, scores[ranked], weights
+    
+    def _print_weights(self, weights):
+        if weights:
+            for name, weight in weights.items():
+                if weight:
+                    print(f"   • {name}: weight {weight:.2f}")
+    
+    @reads
+    def consensus_recommendation(self, top_n=5, weights=None, fit_weights=False):
+        """Deterministic recommendation from the weighted sum of all 11 score vectors"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        ranked, scores, weights = self._consensus(top_n, weights, fit_weights)
+        
+        print(f"\n🎯 {top_n} CONSENSUS RECOMMENDATION (all 10000 numbers scored):")
+        self._print_weights(weights)
+        for i, (n, score) in enumerate(zip(ranked, scores), 1):
+            print(f"   {i}. {n:04d} (score {score:.2f})")
+        
+        return [f"{n:04d}" for n in ranked]
+    
+    @reads
+    def transition_predictions(self, top_n=5):
+        """Next-draw candidates from the last draw via positional digit transitions"""
+        if self.transition_model is None:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        model = self.transition_model
+        scores = model.next_draw_probabilities()
+        ranked = np.argsort(-scores, kind='stable')[:top_n]
+        hazard = model.repeat_hazard()
+        gaps = model.gap_distribution()
+        
+        print(f"\n🔁 {top_n} TRANSITION PREDICTIONS (from the last draw):")
+        for i, n in enumerate(ranked, 1):
+            own = model.number_gaps(n)
+            median = f", median gap {int(np.median(own))} over {len(own)} repeats" if len(own) else ""
+            print(f"   {i}. {n:04d} (expected {scores[n]:.5f} per draw, repeat hazard {hazard[n]:.4f}{median})")
+        if gaps.sum() > 0:
+            print(f"   • Median gap to repeat: {int(np.searchsorted(np.cumsum(gaps), 0.5))} draws")
+        
+        return [f"{n:04d}" for n in ranked]
+    
+    @reads
+    def drift_report(self, period='Y', method='cusum', **kwargs):
+        """Detected distribution changes in digits, sums, parity and patterns"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        changes = self.cached('drift.change_points',
+                              lambda: DriftDetector(self.draw_dates, self.draws).change_points(period, method, **kwargs),
+                              {'period': period, 'method': method, **kwargs})
+        
+        print(f"\n📉 DRIFT DETECTION ({method}, period {period}):")
+        if not changes:
+            print("   • No distribution change detected")
+        for change in changes:
+            print(f"   • {change['date']}: {change['feature']} (p={change['p_value']:.2e})")
+        
+        return changes
+    
+    @reads
+    def compare_periods(self, period_a, period_b, top_n=10):
+        """Compare two (start, stop) date ranges over all numbers and positional digits"""
+        if self.period_comparator is None:
+            print("❌ Data Not Yet Processed!")
+            return None, None
+        
+        numbers, digits = self.period_comparator.compare(period_a, period_b)
+        
+        print(f"\n⚖️  PERIOD COMPARISON: {period_a[0] or 'start'}..{period_a[1] or 'end'} "
+              f"vs {period_b[0] or 'start'}..{period_b[1] or 'end'}")
+        print(f"   • Numbers drawn: {numbers.exposure_a:,} vs {numbers.exposure_b:,}")
+        print(f"\n   Top {top_n} number movers:")
+        for row in numbers.top_movers(top_n):
+            print(f"   • {row['label']}: {row['count_a']} -> {row['count_b']} "
+                  f"(ratio {row['rate_ratio']:.2f}, z {row['z']:+.2f})")
+        print(f"\n   Top 5 positional digit movers:")
+        for row in digits.top_movers(5):
+            print(f"   • {row['label']}: {row['rate_a']:.2%} -> {row['rate_b']:.2%} (z {row['z']:+.2f})")
+        
+        return numbers, digits
+    
+    @reads
+    def repeat_analysis(self, ks=(1, 5, 10, 50, 100, 500), max_lag=5):
+        """Do numbers repeat sooner than chance? Plus draw-to-draw autocorrelation"""
+        if self.occurrence_index is None:
+            print("❌ Data Not Yet Processed!")
+            return None
+        
+        analysis = RepeatAnalysis(self.occurrence_index, self.draws)
+        
+        print(f"\n🔂 REPEAT WITHIN K DRAWS (vs uniform random):")
+        for k, row in analysis.within_k_distribution(ks).items():
+            print(f"   • k={k}: {row['count']:,} repeats ({row['observed']:.2%}, expected {row['expected']:.2%})")
+        
+        correlations = analysis.autocorrelations(max_lag)
+        print(f"\n   Autocorrelation (lags 1-{max_lag}, ±{2 * correlations['expected_se'][0]:.3f} is chance):")
+        print(f"   • Digit sum: {', '.join(f'{c:+.3f}' for c in correlations['sum'])}")
+        print(f"   • Even count: {', '.join(f'{c:+.3f}' for c in correlations['even'])}")
+        
+        return analysis
+    
+    @reads
+    def hot_cold_confidence(self, top_n=10, n_resamples=1000, workers=None, seed=None):
+        """Bootstrap intervals and stability for the hot / cold numbers and digits"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return None
+        
+        compute = lambda: bootstrap_hot_cold(self.draws, top_n, n_resamples, workers, seed=seed)
+        if seed is None:
+            result = compute()
+        else:
+            # seeded per batch of resamples, so the worker count is not part of the key
+            result = self.cached('bootstrap_hot_cold', compute,
+                                 {'top_n': top_n, 'n_resamples': n_resamples}, seed)
+        
+        print(f"\n📏 HOT / COLD CONFIDENCE ({result.resamples:,} draw resamples, {result.level:.0%} intervals):")
+        for label, icon in (('hot', '🔥'), ('cold', '❄️ ')):
+            print(f"\n{icon} {label.upper()}:")
+            for row in result.numbers(label):
+                low, high = row['interval']
+                print(f"   • {row['number']}: {row['count']} times [{low:.0f}-{high:.0f}], "
+                      f"stable {row['stability']:.0%}")
+        print(f"\n🔢 DIGITS:")
+        for row in result.digits():
+            low, high = row['interval']
+            print(f"   • {row['digit']} ({row['label']}): {row['count']:,} [{low:,.0f}-{high:,.0f}], "
+                  f"stable {row['stability']:.0%}")
+        
+        return result
+    
+    @reads
+    def export_features(self, draws_path, numbers_path=None):
+        """Write the per-draw (and optionally per-number) feature matrix to .npy / .parquet"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return False
+        
+        names, matrix = draw_feature_matrix(self.draw_dates, self.draws)
+        save_matrix(draws_path, names, matrix, index=pd.DatetimeIndex(self.draw_dates, name='Draw_Date'))
+        print(f"💾 {matrix.shape[0]:,} draws x {matrix.shape[1]} features -> {draws_path}")
+        
+        if numbers_path:
+            names, matrix = number_feature_matrix(self.draws, self.half_life or 500)
+            save_matrix(numbers_path, names, matrix, index=pd.Index(all_numbers(), name='number'))
+            print(f"💾 {matrix.shape[0]:,} numbers x {matrix.shape[1]} features -> {numbers_path}")
+        
+        return True
+    
+    def exclude_before(self, since):
+        """Drop draws before `since` (e.g. the last drift date) and rebuild every model"""
+        with self._store.writing() as snap:
+            if snap.data is None:
+                print("❌ Data Not Yet Processed!")
+                return False
+            
+            print(f"✂️  Keeping draws since {pd.Timestamp(since).date()}")
+            return self.preprocess_data_large(snap.data[snap.data['Draw_Date'] >= pd.Timestamp(since)])
+    
+    @reads
+    def joint_distribution(self, smoothing='additive', alpha=1.0):
+        """Joint 4-digit distribution over the (decayed, if a half-life is set) number histogram
+        
+        alpha is in units of one drawn number; decayed weights total far less
+        than the raw counts, so alpha shrinks with them and the smoothing keeps
+        the same weight relative to the data.
+        """
+        counts = self.derived('number_counts')
+        if self.decay_model is not None:
+            raw_total = counts.sum()
+            counts = self.decay_model.number_scores()
+            if raw_total:
+                alpha = alpha * counts.sum() / raw_total
+        return JointDigitDistribution(counts, smoothing=smoothing, alpha=alpha)
+    
+    @reads
+    def baseline_predictions(self, top_n=5, horizon=50, run_backtest=False):
+        """Walk-forward logistic regression over per-number features, optionally backtested"""
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return []
+        
+        probabilities = self.cached('baseline_model.probabilities', lambda: baseline_model.LogisticBaseline(
+            horizon=horizon).fit(self.draws).probabilities(self.draws), {'horizon': horizon})
+        ranked = np.argsort(-probabilities, kind='stable')[:top_n]
+        
+        print(f"\n🤖 {top_n} BASELINE MODEL PREDICTIONS (P(drawn within {horizon} draws)):")
+        for i, n in enumerate(ranked, 1):
+            print(f"   {i}. {n:04d} ({probabilities[n]:.2%})")
+        
+        if run_backtest:
+            print(f"\n   Backtest top-100 lift (1.00 = chance):")
+            lifts = self.cached('baseline_model.backtest',
+                                lambda: baseline_model.backtest(self.draws, horizon=horizon), {'horizon': horizon})
+            for name, lift in lifts.items():
+                print(f"   • {name}: {lift:.3f}")
+        
+        return [f"{n:04d}" for n in ranked]
+    
+    def _number_frequencies(self):
+        """(unique numbers, counts) or decayed weights when a half-life is set"""
+        if self.decay_model is not None:
+            scores = self.decay_model.number_scores()
+            seen = np.nonzero(scores > 0)[0]
+            return all_numbers()[seen], scores[seen]
+        return self.derived('number_frequencies')
+    
+    def _number_order(self, counts):
+        """np.argsort(counts) of _number_frequencies() (shared while the dataset is unchanged)"""
+        if self.decay_model is not None:
+            return np.argsort(counts)
+        return self.derived('number_order')
+    
+    def _positional_probabilities(self, pos):
+        """(digits, probabilities) for one position, decayed when a half-life is set"""
+        if self.decay_model is not None:
+            return np.arange(10), self.decay_model.digit_probabilities()[pos]
+        counts = self.derived('positional_counts')[pos]
+        unique_d = np.nonzero(counts)[0]
+        return unique_d, counts[unique_d] / counts[unique_d].sum()
+    
+    def _format_freq(self, freq):
+        """Counts print as 'N times', decayed weights as 'weight W'"""
+        if self.decay_model is not None:
+            return f"weight {freq:.4f}"
+        return f"{freq} times"
+    
     # ============================================
     # analysis FUNCTIONS (simplified for export)
     # ============================================
     
+    @reads
     def frequency_analysis_with_predictions(self):
         """analysis Kekerapan + 5 Predictions"""
         if len(self.all_numbers_flat) == 0:
@@ -137,8 +623,8 @@ class TOTO4DAnalyzer:
         print("1. ANALYSES FREQUENCY + 5 PREDICTIONS")
         print("="*60)
         
-        # Get frequencies
-        unique_values, counts = np.unique(self.all_numbers_flat, return_counts=True)
+        # Get frequencies (recency weighted when a half-life is set)
+        unique_values, counts = self._number_frequencies()
         total_numbers = len(self.all_numbers_flat)
         
         print(f"\n📊 Statistics :")
@@ -149,7 +635,7 @@ class TOTO4DAnalyzer:
         predictions = []
         
         # Get top 5 numbers
-        top_indices = np.argsort(counts)[-5:][::-1]
+        top_indices = self._number_order(counts)[-5:][::-1]
         for pos in top_indices[:3]:
             predictions.append(unique_values[pos])
         
@@ -163,10 +649,11 @@ class TOTO4DAnalyzer:
         for i, pred in enumerate(predictions[:5], 1):
             idx = np.where(unique_values == pred)[0]
             freq = counts[idx[0]] if len(idx) > 0 else 0
-            print(f"   {i}. {pred} (appear {freq} times)")
+            print(f"   {i}. {pred} (appear {self._format_freq(freq)})")
         
         return predictions[:5], unique_values
     
+    @reads
     def digit_analysis_with_predictions(self):
         """analysis Digit + 5 Predictions"""
         if len(self.digit_data) == 0:
@@ -180,20 +667,11 @@ class TOTO4DAnalyzer:
         # Generate 5 predictions
         predictions = []
         
-        for _ in range(5):
-            suggestion = ''
-            for pos in range(4):
-                pos_digits = self.digit_data[:, pos]
-                unique_d, digit_counts = np.unique(pos_digits, return_counts=True)
-                
-                # Weighted selection
-                if len(unique_d) > 0:
-                    probabilities = digit_counts / digit_counts.sum()
-                    suggestion += str(np.random.choice(unique_d, p=probabilities))
-                else:
-                    suggestion += str(np.random.randint(0, 10))
-            
-            predictions.append(suggestion)
+        # Sample whole numbers from the joint digit distribution, so the
+        # dependence between positions is kept (P(d1) P(d2|d1) P(d3d4|d1d2))
+        joint = self.joint_distribution()
+        for number in joint.sample(5, np.random.randint(2**31)):
+            predictions.append(f"{number:04d}")
         
         print(f"\n🎯 5 PREDICTIONS:")
         for i, pred in enumerate(predictions[:5], 1):
@@ -201,6 +679,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], []
     
+    @reads
     def hot_cold_analysis_with_predictions(self, top_n=30):
         """Hot vs Cold + 5 Predictions"""
         if len(self.all_numbers_flat) == 0:
@@ -211,34 +690,38 @@ class TOTO4DAnalyzer:
         print("3. ANALYSES HOT vs COLD NUMBER + 5 PREDICTIONS")
         print("="*60)
         
-        unique_values, counts = np.unique(self.all_numbers_flat, return_counts=True)
+        if self.decay_model is not None:
+            print(f"\n⏳ Recency weighted (half-life {self.half_life:g} draws)")
+        
+        unique_values, counts = self._number_frequencies()
+        order = self._number_order(counts)
         
         # Get detailed hot and cold numbers
-        hot_indices = np.argsort(counts)[-top_n:][::-1]
-        cold_indices = np.argsort(counts)[:top_n]
+        hot_indices = order[-top_n:][::-1]
+        cold_indices = order[:top_n]
         
         hot_numbers = [(unique_values[i], counts[i]) for i in hot_indices[:10]]
         cold_numbers = [(unique_values[i], counts[i]) for i in cold_indices[:10]]
         
         print(f"\n🔥 TOP {min(10, len(hot_numbers))} HOT NUMBERS (go out often):")
         for i, (num, freq) in enumerate(hot_numbers[:10], 1):
-            print(f"   {i:2d}. {num}: {freq} times")
+            print(f"   {i:2d}. {num}: {self._format_freq(freq)}")
         
         print(f"\n❄️  TOP {min(10, len(cold_numbers))} COLD NUMBERS (rarely go out):")
         for i, (num, freq) in enumerate(cold_numbers[:10], 1):
-            print(f"   {i:2d}. {num}: {freq} times")
+            print(f"   {i:2d}. {num}: {self._format_freq(freq)}")
         
         # Generate 5 predictions
         predictions = []
         
         # 2 hot numbers
-        hot_indices = np.argsort(counts)[-5:][::-1]
+        hot_indices = order[-5:][::-1]
         for pos in hot_indices[:2]:
             predictions.append(unique_values[pos])
         
         # 2 cold numbers
         if len(unique_values) > 5:
-            cold_indices = np.argsort(counts)[:5]
+            cold_indices = order[:5]
             for pos in cold_indices[:2]:
                 predictions.append(unique_values[pos])
         
@@ -260,7 +743,7 @@ class TOTO4DAnalyzer:
             else:
                 status = "🎲 RANDOM"
             
-            print(f"   {i}. {pred} - {status} ({freq} times)")
+            print(f"   {i}. {pred} - {status} ({self._format_freq(freq)})")
         
         # Return hot and cold numbers for reference
         hot_cold_info = {
@@ -271,6 +754,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], hot_cold_info  # Kembalikan 2 values saja
     
+    @reads
     def even_odd_analysis_with_predictions(self):
         """Genap & Ganjil + 5 Predictions"""
         if len(self.digit_data) == 0:
@@ -302,6 +786,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], []
     
+    @reads
     def digit_sum_analysis_with_predictions(self):
         """Jumlah Digit + 5 Predictions"""
         if len(self.digit_data) == 0:
@@ -313,8 +798,9 @@ class TOTO4DAnalyzer:
         print("="*60)
         
         # Calculate common sums
-        digit_sums = np.sum(self.digit_data, axis=1)
-        unique_sums, sum_counts = np.unique(digit_sums, return_counts=True)
+        all_sums = self.derived('digit_sum_counts')
+        unique_sums = np.nonzero(all_sums)[0]
+        sum_counts = all_sums[unique_sums]
         
         predictions = []
         
@@ -346,6 +832,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], []
     
+    @reads
     def digit_repetition_analysis_with_predictions(self):
         """Ulangan Digit + 5 Predictions"""
         if len(self.digit_data) == 0:
@@ -400,6 +887,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], {}
     
+    @reads
     def pattern_analysis_with_predictions(self):
         """Corak + 5 Predictions"""
         if len(self.digit_data) == 0:
@@ -452,8 +940,14 @@ class TOTO4DAnalyzer:
         for i, pred in enumerate(predictions[:5], 1):
             print(f"   {i}. {pred} ({pattern_names.get(i-1, 'General')})")
         
+        # How often each kind of pattern was drawn (the consensus score of this analysis)
+        print(f"\n📊 Historical Lift (1.00 = chance):")
+        for name, lift in consensus.pattern_lifts(self.derived('number_counts')).items():
+            print(f"   • {name}: {lift:.2f}")
+        
         return predictions[:5], {}
     
+    @reads
     def prize_position_analysis_with_predictions(self):
         """Posisi Hadiah + 5 Predictions"""
         if self.data is None:
@@ -495,6 +989,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], []
     
+    @reads
     def sliding_window_analysis_with_predictions(self, window_size=20):
         """Sliding Window + 5 Predictions"""
         if self.data is None or len(self.data) < window_size:
@@ -505,22 +1000,14 @@ class TOTO4DAnalyzer:
         print(f"9. ANALYSES SLIDING WINDOW ({window_size}) + 5 PREDICTIONS")
         print("="*60)
         
-        number_columns = [col for col in self.data.columns if col != 'Draw_Date']
-        
-        # Get recent data
-        recent_data = self.data.tail(window_size)
-        recent_numbers = []
-        
-        for _, row in recent_data.iterrows():
-            for col in number_columns:
-                num_str = str(row[col]).strip().zfill(4)[:4]
-                if num_str.isdigit():
-                    recent_numbers.append(num_str)
+        # Counts over the recent draws
+        window_counts = self.derived(self.DERIVED.window(window_size))
+        seen = np.nonzero(window_counts)[0]
         
         predictions = []
         
-        if recent_numbers:
-            unique_recent, recent_counts = np.unique(recent_numbers, return_counts=True)
+        if len(seen):
+            unique_recent, recent_counts = all_numbers()[seen], window_counts[seen]
             
             # Add trending numbers
             if len(unique_recent) > 0:
@@ -539,6 +1026,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], []
     
+    @reads
     def statistics_analysis_with_predictions(self):
         """Statistik + 5 Predictions"""
         if len(self.all_numbers_flat) == 0:
@@ -552,9 +1040,12 @@ class TOTO4DAnalyzer:
         total_draws = len(self.data)
         total_numbers = len(self.all_numbers_flat)
         
+        mean_sum, std_sum = consensus.digit_sum_moments(self.derived('digit_sum_counts'))
+        
         print(f"\n📊 Basic Statistics:")
         print(f"   • Vote: {total_draws:,}")
         print(f"   • Numbers: {total_numbers:,}")
+        print(f"   • Digit Sum: mean {mean_sum:.2f}, std {std_sum:.2f}")
         
         predictions = []
         
@@ -562,12 +1053,10 @@ class TOTO4DAnalyzer:
         for _ in range(5):
             suggestion = ''
             for pos in range(4):
-                pos_digits = self.digit_data[:, pos]
-                unique_d, digit_counts = np.unique(pos_digits, return_counts=True)
+                unique_d, probabilities = self._positional_probabilities(pos)
                 
                 if len(unique_d) > 0:
                     # Weight towards common digits
-                    probabilities = digit_counts / digit_counts.sum()
                     suggestion += str(np.random.choice(unique_d, p=probabilities))
                 else:
                     suggestion += str(np.random.randint(0, 10))
@@ -582,6 +1071,7 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], {}
     
+    @reads
     def new_numbers_analysis_with_predictions(self):
         """Nombor Paling Jarang Keluar (Cold Numbers) + 5 Predictions"""
         if len(self.all_numbers_flat) == 0:
@@ -593,14 +1083,14 @@ class TOTO4DAnalyzer:
         print("="*60)
         
         # Hitung frekuensi semua angka
-        unique_values, counts = np.unique(self.all_numbers_flat, return_counts=True)
+        unique_values, counts = self.derived('number_frequencies')
         
         if len(unique_values) == 0:
             print("❌ No Frequency Data Available!")
             return [], []
         
         # Ambil 5 angka dengan frekuensi terendah
-        cold_indices = np.argsort(counts)[:5]  # Ambil 5 terbawah
+        cold_indices = self.derived('number_order')[:5]  # Ambil 5 terbawah
         
         predictions = []
         cold_numbers_info = []
@@ -641,8 +1131,15 @@ class TOTO4DAnalyzer:
         
         return predictions[:5], cold_numbers_info
     
-    def predictions_populer_analysis(self, all_predictions_dict):
-        """analysis Predictions Populer dari semua metode"""
+    @reads
+    def predictions_populer_analysis(self, all_predictions_dict, weights=None, fit_weights=False):
+        """analysis Predictions Populer dari semua metode
+        
+        The tiers only show where the analyses' own picks overlap; the final
+        recommendation is the weighted consensus of their score vectors over
+        all 10000 numbers (see consensus_recommendation), so it does not
+        depend on the random picks.
+        """
         #print("\n" + "="*60)
         #print("analysis PREDICTIONS POPULER")
         #print("="*60)
@@ -673,15 +1170,12 @@ class TOTO4DAnalyzer:
         # Kategorikan predictions
         sangat_populer = []  # muncul >= 3 analysis
         populer = []        # muncul 2 analysis
-        unique = []          # muncul 1 analysis
         
         for pred, count in pred_counter.items():
             if count >= 3:
                 sangat_populer.append((pred, count))
             elif count == 2:
                 populer.append((pred, count))
-            else:
-                unique.append((pred, count))
         
         # Urutkan berdasarkan frekuensi
         sangat_populer.sort(key=lambda x: x[1], reverse=True)
@@ -701,63 +1195,87 @@ class TOTO4DAnalyzer:
         else:
             print("   There are no predictions that appear 2 times")
         
-        # Rekomendasi akhir
-        print(f"\n💡 FINAL RECOMMENDATION:")
-        
-        rekomendasi_akhir = []
+        # Rekomendasi akhir: konsensus skor semua 10000 nombor (deterministik)
+        if self.draws is None:
+            print("❌ Data Not Yet Processed!")
+            return []
         
-        # Prioritaskan predictions sangat populer
-        if sangat_populer:
-            print(f"   ⭐ HIGH RECOMMENDATION (Top Priority):")
-            for pred, count in sangat_populer[:5]:
-                rekomendasi_akhir.append(pred)
-                print(f"      • {pred} - {count} analysis")
-        
-        # Tambahkan predictions populer jika kurang dari 5
-        if len(rekomendasi_akhir) < 5 and populer:
-            print(f"\n   ⭐ MEDIUM RECOMMENDATION (Extra):")
-            for pred, count in populer[:5-len(rekomendasi_akhir)]:
-                if pred not in rekomendasi_akhir:
-                    rekomendasi_akhir.append(pred)
-                    print(f"      • {pred} - {count} analysis")
-        
-        # Tambahkan random dari unique jika masih kurang
-        if len(rekomendasi_akhir) < 5 and unique:
-            print(f"\n   ⭐ BASIC RECOMMENDATION (Filling):")
-            import random
-            selected = random.sample(unique, min(5-len(rekomendasi_akhir), len(unique)))
-            for pred, count in selected:
-                rekomendasi_akhir.append(pred)
-                print(f"      • {pred} - {count} analysis")
+        ranked, scores, weights = self._consensus(5, weights, fit_weights)
+        rekomendasi_akhir = [f"{n:04d}" for n in ranked]
         
         # Tampilkan rekomendasi akhir
-        print(f"\n🎯 5 FINAL RECOMMENDATION (Based on Consensus):")
-        for i, pred in enumerate(rekomendasi_akhir[:5], 1):
-            count = pred_counter.get(pred, 0)
-            confidence = "High" if count >= 3 else "medium" if count == 2 else "Base"
-            print(f"   {i}. {pred} (confidence: {confidence}, appear: {count} analysis)")
+        print(f"\n🎯 5 FINAL RECOMMENDATION (Based on Consensus of all 10000 numbers):")
+        self._print_weights(weights)
+        for i, (pred, score) in enumerate(zip(rekomendasi_akhir, scores), 1):
+            print(f"   {i}. {pred} (score: {score:.2f}, appear: {pred_counter.get(pred, 0)} analysis)")
         
-        return rekomendasi_akhir[:5]
+        return rekomendasi_akhir
     
+    def analysis_functions(self):
+        """The 11 analyses as (name, function) pairs, in menu order (timed when metrics are on)"""
+        analyses = [
+            ("1. Analysis Frequency", self.frequency_analysis_with_predictions),
+            ("2. Analysis Digit", self.digit_analysis_with_predictions),
+            ("3. Analysis Hot vs Cold Number", lambda: self.hot_cold_analysis_with_predictions(30)),
+            ("4. Analysis of Even & Odd Numbers", self.even_odd_analysis_with_predictions),
+            ("5. Analysis of The Sum of Digitst", self.digit_sum_analysis_with_predictions),
+            ("6. Analysis Digit Repetition", self.digit_repetition_analysis_with_predictions),
+            ("7. Analysis Pattern", self.pattern_analysis_with_predictions),
+            ("8. Analysis of Prize Position", self.prize_position_analysis_with_predictions),
+            ("9. Analysis Sliding Window", lambda: self.sliding_window_analysis_with_predictions(20)),
+            ("10. Analysis Comprehensive Statistical", self.statistics_analysis_with_predictions),
+            ("11. Analysis of the Rarest Numbers", self.new_numbers_analysis_with_predictions)
+        ]
+        return [(name, timed(self.metrics, f"analysis.{name}", func)) for name, func in analyses]
+    
+    @reads
+    def run_analyses(self, selected=None, seed=None):
+        """Run the selected analyses (numbers 1-11, default all) without any prompts
+        
+        Returns ({name: predictions}, {name: error message}). With a seed the
+        run is reproducible, so it is served from the result cache (console
+        output included) when the same dataset was analyzed before.
+        """
+        def run():
+            all_predictions, errors = {}, {}
+            with tee_stdout() as console:
+                for i, (name, analysis_func) in enumerate(self.analysis_functions(), 1):
+                    if selected is not None and i not in selected:
+                        continue
+                    try:
+                        predictions, _ = analysis_func()
+                        all_predictions[name] = [str(p) for p in predictions]
+                    except Exception as e:
+                        errors[name] = str(e)
+            return all_predictions, errors, console.getvalue()
+        
+        if seed is None:
+            all_predictions, errors, _ = run()
+            return all_predictions, errors
+        
+        computed = []
+        
+        def compute():
+            # seeded only when really run, so a cache hit leaves the global RNG alone
+            computed.append(True)
+            np.random.seed(seed)
+            return run()
+        
+        params = {'selected': sorted(selected) if selected is not None else None, 'half_life': self.half_life}
+        with stage(self.metrics, 'run_analyses'):
+            all_predictions, errors, console = self.cached('run_analyses', compute, params, seed)
+        if not computed:
+            sys.stdout.write(console)     # replay the cached run's console output
+        return all_predictions, errors
+    
+    @reads
     def run_all_analyses_with_predictions(self, export_mode=False):
         """Jalankan semua analysis"""
         if export_mode:
             # In export mode, just run analyses without interaction
             all_predictions = {}
             
-            analyses = [
-                ("1. Analysis Frequency", self.frequency_analysis_with_predictions),
-                ("2. Analysis Digit", self.digit_analysis_with_predictions),
-                ("3. Analysis Hot vs Cold Number", lambda: self.hot_cold_analysis_with_predictions(30)),
-                ("4. Analysis of Even & Odd Numbers", self.even_odd_analysis_with_predictions),
-                ("5. Analysis of The Sum of Digitst", self.digit_sum_analysis_with_predictions),
-                ("6. Analysis Digit Repetition", self.digit_repetition_analysis_with_predictions),
-                ("7. Analysis Pattern", self.pattern_analysis_with_predictions),
-                ("8. Analysis of Prize Position", self.prize_position_analysis_with_predictions),
-                ("9. Analysis Sliding Window", lambda: self.sliding_window_analysis_with_predictions(20)),
-                ("10. Analysis Comprehensive Statistical", self.statistics_analysis_with_predictions),
-                ("11. Analysis of the Rarest Numbers", self.new_numbers_analysis_with_predictions)
-            ]
+            analyses = self.analysis_functions()
             
             for name, analysis_func in analyses:
                 try:
@@ -815,19 +1333,7 @@ class TOTO4DAnalyzer:
             
             all_predictions = {}
             
-            analyses = [
-                ("1. Analysis Frequency", self.frequency_analysis_with_predictions),
-                ("2. Analysis Digit", self.digit_analysis_with_predictions),
-                ("3. Analysis Hot vs Cold Number", lambda: self.hot_cold_analysis_with_predictions(30)),
-                ("4. Analysis of Even & Odd Numbers", self.even_odd_analysis_with_predictions),
-                ("5. Analysis of The Sum of Digitst", self.digit_sum_analysis_with_predictions),
-                ("6. Analysis Digit Repetition", self.digit_repetition_analysis_with_predictions),
-                ("7. Analysis Pattern", self.pattern_analysis_with_predictions),
-                ("8. Analysis of Prize Position", self.prize_position_analysis_with_predictions),
-                ("9. Analysis Sliding Window", lambda: self.sliding_window_analysis_with_predictions(20)),
-                ("10. Analysis Comprehensive Statistical", self.statistics_analysis_with_predictions),
-                ("11. Analysis of the Rarest Numbers", self.new_numbers_analysis_with_predictions)
-            ]
+            analyses = self.analysis_functions()
             
             for name, analysis_func in analyses:
                 #print(f"\n▶️  {name}")
@@ -891,7 +1397,8 @@ def main():
     print("🎯 MALAYSIA - 4D [TOTO] SPORTSTOTO / [88] SABAH 88 - ALL ANALYSES WITH PREDICTIONS")
     print("="*60)
     
-    analyzer = TOTO4DAnalyzer()
+    # results are cached on disk only when asked to (TOTO_CACHE_DIR)
+    analyzer = TOTO4DAnalyzer(cache=optional_cache())
     
     while True:
         print("\n" + "="*60)
@@ -1030,7 +1537,229 @@ def main():
             input("\n⏸️  Press Enter to Return...")
 
 
+# ============================================
+# HEADLESS COMMAND LINE (cron / batch use)
+# ============================================
+
+CLI_COMMANDS = ('load', 'run-all', 'run-one', 'popular', 'export')
+
+
+def build_cli_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='prediction_4d.py',
+        description="Non-interactive 4D analyses. Without arguments the interactive menu starts.")
+    parser.add_argument('command', choices=CLI_COMMANDS)
+    parser.add_argument('data', nargs='+', help="one or more Draw_Date,01..23 data files")
+    fmt = parser.add_mutually_exclusive_group()
+    fmt.add_argument('--json', action='store_true', help="machine-readable JSON (no console formatting)")
+    fmt.add_argument('--csv', action='store_true', help="machine-readable CSV (no console formatting)")
+    parser.add_argument('--analysis', type=int, action='append', choices=range(1, 12), metavar='N',
+                        help="analysis number 1-11 for run-one (repeatable)")
+    parser.add_argument('--output', '-o', help="write to this file instead of stdout "
+                        "(export: per data file, '{name}' is replaced by the data file's name)")
+    parser.add_argument('--seed', type=int, help="seed the random parts of the analyses")
+    parser.add_argument('--half-life', type=float, help="recency weighting half-life in draws")
+    parser.add_argument('--fit-weights', action='store_true',
+                        help="weight the consensus recommendation by a walk-forward backtest of each analysis")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="data files processed in parallel")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="result cache directory")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_BYTES / 2**20,
+                        help="result cache size limit in MB (least recently used entries are evicted)")
+    parser.add_argument('--no-cache', action='store_true', help="neither read nor write the result cache")
+    parser.add_argument('--profile', metavar='METRICS.json',
+                        help="time the load stages and every analysis, write the metrics as JSON here")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile: also record peak memory per stage (tracemalloc, slower)")
+    parser.add_argument('--profile-cprofile', metavar='PSTATS',
+                        help="with --profile: dump cProfile stats here ('{name}' is replaced by the data file's name)")
+    return parser
+
+
+def _cli_job(command, path, options):
+    """Run one command on one data file in a fresh analyzer; returns a plain dict"""
+    if not options.get('profile'):
+        return _cli_run(command, path, options, None)
+    
+    name = os.path.splitext(os.path.basename(path))[0]
+    cprofile = options.get('profile_cprofile')
+    metrics = Metrics(trace_memory=options.get('profile_memory', False),
+                      profile_path=cprofile.replace('{name}', name) if cprofile else None)
+    with metrics:
+        result = _cli_run(command, path, options, metrics)
+    result['metrics'] = metrics.to_dict()
+    return result
+
+
+def _cli_run(command, path, options, metrics):
+    import contextlib
+    import io
+    
+    cache = None
+    if options.get('cache_dir') and os.path.exists(path):
+        cache = ResultCache(options['cache_dir'], options['cache_bytes'])
+    
+    # a whole job is reproducible only when seeded (load has no random part)
+    job_key = None
+    if cache is not None and (command == 'load' or options.get('seed') is not None):
+        params = {'analysis': sorted(options['analysis'] or []), 'half_life': options.get('half_life'),
+                  'fit_weights': options.get('fit_weights', False),
+                  'report': not (options['json'] or options['csv'])}
+        job_key = cache.key(file_hash(path), 'cli:' + command, params, options.get('seed'))
+        hit = cache.get(job_key)
+        if hit is not None:
+            hit['file'] = path
+            sys.stdout.write(hit.pop('console', ''))      # replay the cached job's console report
+            return hit
+    
+    # text export captures the console report; machine output suppresses it;
+    # otherwise it is printed and also recorded for the job cache
+    capture = options['machine'] or command == 'export'
+    result = {'file': path, 'ok': False}
+    with (contextlib.redirect_stdout(io.StringIO()) if capture else tee_stdout()) as console:
+        analyzer = TOTO4DAnalyzer(chunk_size=10000, half_life=options.get('half_life'), cache=cache,
+                                  metrics=metrics)
+        with stage(metrics, 'load'):
+            loaded = analyzer.load_data_large(path)
+        if not loaded:
+            result['error'] = f"could not load {path}"
+            return result
+        
+        result.update(draws=int(len(analyzer.draws)), numbers=int(len(analyzer.all_numbers_flat)),
+                      first_date=str(analyzer.draw_dates[0]), last_date=str(analyzer.draw_dates[-1]))
+        
+        if command in ('run-all', 'run-one', 'popular', 'export'):
+            selected = set(options['analysis']) if command == 'run-one' and options['analysis'] else None
+            if command == 'run-one' and selected is None:
+                result['error'] = "run-one needs --analysis N"
+                return result
+            result['analyses'], result['errors'] = analyzer.run_analyses(selected, options.get('seed'))
+            if command != 'run-one':
+                with stage(metrics, 'popular'):
+                    result['popular'] = [str(p) for p in analyzer.predictions_populer_analysis(
+                        result['analyses'], fit_weights=options.get('fit_weights', False))]
+    
+    if metrics is not None:
+        # derived statistics time themselves when they are computed or updated
+        for row in analyzer.DERIVED.values(analyzer.snapshot).report():
+            if row['action'] in ('computed', 'updated'):
+                metrics.add(f"derived.{row['node']}", row['seconds'])
+    
+    result['ok'] = True
+    if command == 'export' and not (options['json'] or options['csv']):
+        result['report'] = console.getvalue()
+    if job_key is not None:
+        cache.put(job_key, result if capture else {**result, 'console': console.getvalue()})
+    return result
+
+
+def _cli_rows(result):
+    """CSV rows: file, analysis, rank, number (load gives one summary row)"""
+    if 'analyses' not in result:
+        return [[result['file'], 'summary', key, result.get(key, '')]
+                for key in ('draws', 'numbers', 'first_date', 'last_date', 'error') if key in result]
+    rows = [[result['file'], name, rank, number]
+            for name, predictions in result['analyses'].items()
+            for rank, number in enumerate(predictions, 1)]
+    rows += [[result['file'], 'popular', rank, number] for rank, number in enumerate(result.get('popular', []), 1)]
+    rows += [[result['file'], 'error', name, message] for name, message in result.get('errors', {}).items()]
+    return rows
+
+
+def _atomic_write(path, text):
+    """Write via a temp file in the same directory, so concurrent cron runs never see partial output"""
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _cli_render(results, options):
+    import csv
+    import io
+    import json
+    
+    if options['json']:
+        return json.dumps(results if len(results) > 1 else results[0], indent=2) + "\n"
+    if options['csv']:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['file', 'analysis', 'rank', 'number'])
+        for result in results:
+            writer.writerows(_cli_rows(result))
+        return out.getvalue()
+    return ""
+
+
+def cli_main(argv=None):
+    """Headless entry point; returns the process exit code (non-zero if any file failed)"""
+    from concurrent.futures import ProcessPoolExecutor
+    
+    args = build_cli_parser().parse_args(argv)
+    options = {'json': args.json, 'csv': args.csv, 'machine': args.json or args.csv,
+               'analysis': args.analysis, 'seed': args.seed, 'half_life': args.half_life,
+               'fit_weights': args.fit_weights,
+               'cache_dir': None if args.no_cache else args.cache_dir, 'cache_bytes': int(args.cache_size * 2**20),
+               'profile': args.profile, 'profile_memory': args.profile_memory, 'profile_cprofile': args.profile_cprofile}
+    if (args.profile_memory or args.profile_cprofile) and not args.profile:
+        print("error: --profile-memory and --profile-cprofile need --profile METRICS.json", file=sys.stderr)
+        return 2
+    
+    if args.jobs > 1 and len(args.data) > 1:
+        # console output of parallel jobs would interleave, so they report as JSON
+        if not options['machine'] and args.command != 'export':
+            options['json'] = True
+        options['machine'] = True
+        with ProcessPoolExecutor(min(args.jobs, len(args.data))) as pool:
+            results = list(pool.map(_cli_job, [args.command] * len(args.data), args.data,
+                                    [options] * len(args.data)))
+    else:
+        results = [_cli_job(args.command, path, options) for path in args.data]
+    
+    if args.profile:
+        import json
+        profiles = [{'file': result['file'], **result.pop('metrics')} for result in results if 'metrics' in result]
+        _atomic_write(args.profile, json.dumps({'command': args.command, 'files': profiles}, indent=2) + "\n")
+        for profile in profiles:
+            print(f"⏱️  {profile['file']}: {profile['total_seconds']:.3f} s", file=sys.stderr)
+        print(f"📈 Metrics -> {args.profile}", file=sys.stderr)
+    
+    if args.command == 'export':
+        for result in results:
+            name = os.path.splitext(os.path.basename(result['file']))[0]
+            target = (args.output or 'predictions_report_{name}.txt').replace('{name}', name)
+            if 'report' in result:
+                header = ("=" * 60 + "\nREPORT MALAYSIA - 4D [TOTO] SPORTSTOTO / [88] SABAH 88 \n" + "=" * 60 +
+                          f"\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nData: {result['file']}\n" + "=" * 60 + "\n")
+                text = header + result.pop('report')
+            else:
+                text = _cli_render([result], options)
+            if result['ok']:
+                _atomic_write(target, text)
+                print(f"{result['file']} -> {target}", file=sys.stderr)
+    else:
+        text = _cli_render(results, options)
+        if args.output:
+            _atomic_write(args.output, text)
+        elif text:
+            sys.stdout.write(text)
+    
+    for result in results:
+        if not result['ok']:
+            print(f"error: {result['file']}: {result.get('error', 'failed')}", file=sys.stderr)
+    return 0 if all(r['ok'] for r in results) else 1
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli_main(sys.argv[1:]))
     try:
         main()
     except KeyboardInterrupt:
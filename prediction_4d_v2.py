@@ -9,57 +9,190 @@ import itertools
 from typing import List, Dict, Tuple, Set
 import warnings
 import math
+import os
 import sys
+from toto_core import parse_number
+from count_cube import CountCube
+from pattern_index import PatternIndex, contains_any_mask
+from similarity import HammingEngine, hamming_counts
+from constraints import NumberFeatures, NumberFilter
+from bootstrap import bootstrap_hot_cold
+from prediction_results import PredictionResults, DETAIL_KEYS
+from result_cache import ResultCache, DatasetHasher, file_hash, optional_cache
+from snapshot import Snapshot, SnapshotStore, reads, snapshot_field
+from derived_graph import draw_graph, derived_field
+from instrumentation import Metrics, stage
 warnings.filterwarnings('ignore')
 
 class TOTOPredictor40Analisis:
-    def __init__(self, file_path: str):
+    # Dataset state lives in one immutable Snapshot; loading and append_draw()
+    # build a new one and swap it in, so readers never see a half-built dataset
+    data = snapshot_field('data')
+    numbers_4d = snapshot_field('numbers_4d')
+    draw_dates = snapshot_field('draw_dates')
+    draws = snapshot_field('draws')
+    dataset_hash = snapshot_field('dataset_hash')
+    
+    # Indexes and counts derived from the draws: built on first use, then
+    # carried across append_draw() (kept, updated incrementally or rebuilt)
+    DERIVED = draw_graph(dates='draw_days')
+    DERIVED.add('count_cube', ['draw_days', 'draws'], CountCube)
+    DERIVED.add('pattern_index', ['occurrence_index'], PatternIndex)
+    DERIVED.add('hamming', ['draw_days', 'draws'], HammingEngine)
+    occurrence_index = derived_field('occurrence_index')
+    count_cube = derived_field('count_cube')
+    pattern_index = derived_field('pattern_index')
+    hamming = derived_field('hamming')
+    # lazily computed per-snapshot statistics
+    all_pattern_stats = property(lambda self: self._store.current().memo)
+    
+    EMPTY = Snapshot(data=None, numbers_4d=None, draw_dates=None, draw_days=None, draws=None, dataset_hasher=None,
+                     dataset_hash=None)
+    
+    def __init__(self, file_path: str, cache: ResultCache = None, metrics: Metrics = None):
         self.file_path = file_path
-        self.data = None
-        self.numbers_4d = None
-        self.draw_dates = None
-        self.digits_counter = None
-        self.all_pattern_stats = {}
+        self.cache = cache
+        self.metrics = metrics
+        self.last_results = None
+        self._store = SnapshotStore(self.EMPTY)
         self.load_data()
     
+    @property
+    def snapshot(self) -> Snapshot:
+        """The dataset version this thread / task is reading"""
+        return self._store.current()
+    
+    def snapshot_pinned(self):
+        """Context manager: every call inside the block reads the same snapshot"""
+        return self._store.pin()
+    
+    def derived(self, name: str):
+        """A derived statistic of the (pinned) snapshot, see derived_graph.draw_graph()"""
+        snapshot = self._store.current()
+        if snapshot.draws is None:
+            return None
+        return self.DERIVED.values(snapshot).get(name)
+    
+    @reads
+    def recompute_report(self) -> List[Dict]:
+        """Which derived statistics this dataset version computed, updated, reused or dropped"""
+        if self.draws is None:
+            return []
+        
+        report = self.DERIVED.values(self.snapshot).report()
+        print(f"\n🔁 Derived statistics ({len(self.draws)} draws):")
+        for row in report:
+            print(f"  {row['node']}: {row['action']} ({row['seconds'] * 1000:.2f} ms)")
+        return report
+    
+    @staticmethod
+    def _build_snapshot(number_dates: List[str], dates_list: List[datetime], all_numbers: List[str],
+                        draw_rows) -> Snapshot:
+        """One dataset version (number_dates: the draw date of each number)"""
+        data = pd.DataFrame({
+            'date': number_dates,
+            'number': all_numbers,
+            'draw_date': number_dates
+        })
+        
+        # Numeric (draws, 23) matrix; the indexes over it are derived on first use
+        draws = np.array(draw_rows, dtype=np.int16).reshape(-1, 23)
+        dates = np.array(dates_list, dtype='datetime64[D]')
+        hasher = DatasetHasher(dates, draws)
+        return Snapshot(
+            data=data,
+            numbers_4d=tuple(all_numbers),
+            draw_dates=tuple(dates_list),
+            draw_days=dates,
+            draws=draws,
+            dataset_hasher=hasher,
+            dataset_hash=hasher.hexdigest(),
+        )
+    
     def load_data(self):
-        """Load and preprocess data"""
+        """Load and preprocess data (from the result cache when the file is unchanged)"""
         try:
-            with open(self.file_path, 'r') as f:
-                lines = f.readlines()
+            load_key = None
+            if self.cache is not None:
+                with stage(self.metrics, 'load.cache_read'):
+                    load_key = self.cache.key(file_hash(self.file_path), 'TOTOPredictor40Analisis.snapshot')
+                    snapshot = self.cache.get(load_key)
+                if snapshot is not None:
+                    snapshot = snapshot.replace(dataset_hasher=DatasetHasher(snapshot.draw_days, snapshot.draws))
+                    self._store.swap(snapshot)
+                    print(f"✓ Data loaded: {len(snapshot.draw_dates)} draws, {len(snapshot.numbers_4d)} numbers (cached)")
+                    return
             
-            all_numbers = []
-            draw_dates = []
-            dates_list = []
-            
-            for line in lines:
-                if line.startswith('Draw_Date') or line.strip() == '':
-                    continue
-                    
-                parts = line.strip().split(',')
-                if len(parts) >= 24:
-                    date_str = parts[0]
-                    draw_dates.append(date_str)
-                    dates_list.append(datetime.strptime(date_str, '%Y-%m-%d'))
-                    
-                    for num in parts[1:24]:
-                        if len(num) == 4 and num.isdigit():
-                            all_numbers.append(num)
-            
-            self.data = pd.DataFrame({
-                'date': draw_dates * 23,
-                'number': all_numbers,
-                'draw_date': draw_dates * 23
-            })
+            with stage(self.metrics, 'load.read_file'):
+                with open(self.file_path, 'r') as f:
+                    lines = f.readlines()
+                
+                all_numbers = []
+                number_dates = []
+                draw_dates = []
+                dates_list = []
+                draw_rows = []
+                
+                for line in lines:
+                    if line.startswith('Draw_Date') or line.strip() == '':
+                        continue
+                        
+                    parts = line.strip().split(',')
+                    if len(parts) >= 24:
+                        date_str = parts[0]
+                        draw_dates.append(date_str)
+                        dates_list.append(datetime.strptime(date_str, '%Y-%m-%d'))
+                        draw_rows.append([parse_number(num) for num in parts[1:24]])
+                        
+                        for num in parts[1:24]:
+                            if len(num) == 4 and num.isdigit():
+                                all_numbers.append(num)
+                                number_dates.append(date_str)
             
-            self.numbers_4d = all_numbers
-            self.draw_dates = dates_list
-            self.digits_counter = Counter(''.join(all_numbers))
+            with stage(self.metrics, 'load.snapshot'):
+                snapshot = self._build_snapshot(number_dates, dates_list, all_numbers, draw_rows)
+                self._store.swap(snapshot)
+            if load_key is not None:
+                with stage(self.metrics, 'load.cache_write'):
+                    self.cache.put(load_key, snapshot.replace(dataset_hasher=None))
             
             print(f"✓ Data loaded: {len(draw_dates)} draws, {len(all_numbers)} numbers")
             
         except Exception as e:
             print(f"Error: {e}")
+    
+    def append_draw(self, draw_row, draw_date: datetime):
+        """Add one new draw (23 numbers, -1 = missing) as a new snapshot
+        
+        The new row is appended to the existing arrays and frame and the
+        dataset hash is extended by one draw, so an append costs no Python
+        work over the history. Derived statistics are carried over (see
+        recompute_report()). Readers that pinned the old snapshot keep using
+        it until they finish.
+        """
+        row = np.asarray(draw_row, dtype=np.int16).reshape(1, 23)
+        day = np.array([draw_date], dtype='datetime64[D]')
+        date_str = draw_date.strftime('%Y-%m-%d')
+        new_numbers = [f"{n:04d}" for n in row[0] if n >= 0]
+        
+        def grow(snap):
+            if snap.draws is None:
+                return self._build_snapshot([date_str] * len(new_numbers), [draw_date], new_numbers, row)
+            
+            added = pd.DataFrame({'date': [date_str] * len(new_numbers), 'number': new_numbers,
+                                  'draw_date': [date_str] * len(new_numbers)})
+            hasher = snap.dataset_hasher.copy().update(day, row)
+            return self.DERIVED.carry(snap, snap.replace(
+                data=pd.concat([snap.data, added], ignore_index=True) if new_numbers else snap.data,
+                numbers_4d=snap.numbers_4d + tuple(new_numbers),
+                draw_dates=snap.draw_dates + (draw_date,),
+                draw_days=np.concatenate([snap.draw_days, day]),
+                draws=np.concatenate([snap.draws, row]),
+                dataset_hasher=hasher,
+                dataset_hash=hasher.hexdigest(),
+            ), {'draws': row, 'draw_days': day})
+        
+        self._store.update(grow)
 
     # ==================== 40 ANALISIS CORAK ====================
     
@@ -244,29 +377,46 @@ class TOTOPredictor40Analisis:
         total = sum(int(d) for d in num)
         return 28 <= total <= 36
     
+    @reads
     def get_hot_cold_digits(self) -> Dict:
         """Get hot and cold digits"""
-        if not self.digits_counter:
+        totals = self.derived('digit_totals')
+        if totals is None or not totals.any():
             return {'hot': [], 'cold': [], 'all': {}}
         
-        avg_freq = sum(self.digits_counter.values()) / 10
-        digits_freq = {str(i): self.digits_counter.get(str(i), 0) for i in range(10)}
+        avg_freq = int(totals.sum()) / 10
+        digits_freq = {str(i): int(totals[i]) for i in range(10)}
         
         hot = [d for d, f in digits_freq.items() if f > avg_freq * 1.2]
         cold = [d for d, f in digits_freq.items() if f < avg_freq * 0.8]
         
         return {'hot': hot, 'cold': cold, 'all': digits_freq}
     
+    @reads
+    def get_hot_cold_digits_confidence(self, n_resamples: int = 1000, workers: int = None,
+                                       seed: int = None) -> List[Dict]:
+        """get_hot_cold_digits() labels with bootstrap intervals and stability per digit"""
+        if self.draws is None:
+            return []
+        compute = lambda: bootstrap_hot_cold(self.draws, n_resamples=n_resamples, workers=workers, seed=seed).digits()
+        if seed is None or self.cache is None:
+            return compute()
+        return self.cache.cached(self.dataset_hash, 'bootstrap_hot_cold.digits', compute,
+                                 {'n_resamples': n_resamples}, seed)
+    
+    @reads
     def analyze_32_hot_digits(self, num: str) -> bool:
         """32. Hot Digits"""
         hot_digits = self.get_hot_cold_digits()['hot']
         return sum(1 for d in num if d in hot_digits) >= 3
     
+    @reads
     def analyze_33_cold_digits(self, num: str) -> bool:
         """33. Cold Digits"""
         cold_digits = self.get_hot_cold_digits()['cold']
         return sum(1 for d in num if d in cold_digits) >= 3
     
+    @reads
     def analyze_34_balanced_digits(self, num: str) -> bool:
         """34. Balanced Digits"""
         hc = self.get_hot_cold_digits()
@@ -274,25 +424,48 @@ class TOTOPredictor40Analisis:
         cold_count = sum(1 for d in num if d in hc['cold'])
         return 1 <= hot_count <= 2 and 1 <= cold_count <= 2
     
+    LUCKY_NUMBERS = ['1688', '1314', '8888', '9999', '1111', '2222',
+                     '3333', '4444', '5555', '6666', '7777', '5200',
+                     '3344', '1133', '2233', '1122', '1221', '1331']
+    LUCKY_SUBSTRINGS = ['168', '131', '888', '999']
+    _LUCKY_MASK = contains_any_mask(LUCKY_NUMBERS + LUCKY_SUBSTRINGS)
+    
     def analyze_35_lucky_number(self, num: str) -> bool:
         """35. Lucky Number"""
-        lucky_numbers = {'1688', '1314', '8888', '9999', '1111', '2222', 
-                        '3333', '4444', '5555', '6666', '7777', '5200', 
-                        '3344', '1133', '2233', '1122', '1221', '1331'}
-        return num in lucky_numbers or any(lucky in num for lucky in ['168', '131', '888', '999'])
+        return bool(self._LUCKY_MASK[int(num)])
     
+    @reads
+    def recent_neighbour_counts(self, last_n: int = 10) -> np.ndarray:
+        """(10000, 3) recent numbers at Hamming distance 0/1/2 from every number"""
+        key = ('recent_neighbours', last_n)
+        if key not in self.all_pattern_stats:
+            recent = np.array([int(n) for n in self.numbers_4d[-last_n:]], dtype=np.int64)
+            self.all_pattern_stats[key] = hamming_counts(np.bincount(recent, minlength=10000))
+        return self.all_pattern_stats[key]
+    
+    @reads
     def analyze_36_historical_pattern(self, num: str) -> bool:
         """36. Historical Pattern"""
         if len(self.numbers_4d) < 10:
             return False
         
-        recent = self.numbers_4d[-10:]
-        for recent_num in recent:
-            same_digits = sum(1 for a, b in zip(num, recent_num) if a == b)
-            if same_digits >= 3:
-                return True
-        return False
+        # 3+ same digits == Hamming distance <= 1 from one of the last 10
+        near = self.recent_neighbour_counts(10)[int(num)]
+        return bool(near[0] + near[1] > 0)
+    
+    @reads
+    def get_seasonal_numbers(self, month: int, weekday: int = None, top_n: int = 10) -> List[str]:
+        """Numbers drawn most often in this month (and weekday) of past years"""
+        if self.count_cube is None:
+            return []
+        
+        key = (month, weekday, top_n)
+        if key not in self.all_pattern_stats.setdefault('seasonal', {}):
+            top = self.count_cube.top_numbers(top_n, month=month, weekday=weekday)
+            self.all_pattern_stats['seasonal'][key] = [num for num, _ in top]
+        return self.all_pattern_stats['seasonal'][key]
     
+    @reads
     def analyze_37_seasonal_pattern(self, num: str, date_str: str = None) -> bool:
         """37. Seasonal Pattern"""
         try:
@@ -302,6 +475,10 @@ class TOTOPredictor40Analisis:
             else:
                 month = datetime.now().month
             
+            # Historically hot in this month
+            if num in self.get_seasonal_numbers(month):
+                return True
+            
             # Seasonal patterns
             seasonal_numbers = {
                 1: ['1111', '2222', '0101', '0110', '1001'],
@@ -350,6 +527,7 @@ class TOTOPredictor40Analisis:
         except:
             return False
     
+    @reads
     def analyze_39_not_appeared(self, num: str) -> bool:
         """39. Nombor yang belum keluar"""
         all_numbers_set = set(self.numbers_4d)
@@ -375,8 +553,45 @@ class TOTOPredictor40Analisis:
         
         return pattern_count >= 2
     
+    @reads
+    def query_history_pattern(self, pattern: str, limit: int = 10) -> List[Dict]:
+        """Historical numbers matching a wildcard ('1?8?', '*168*', '??7?')"""
+        if self.pattern_index is None:
+            return []
+        
+        results = self.pattern_index.query(pattern, limit)
+        total = len(self.pattern_index.numbers(pattern))
+        
+        print(f"\n🔎 Pattern {pattern}: {total} numbers drawn before")
+        for res in results:
+            last_date, last_tier = res['hits'][-1]
+            print(f"  {res['number']}: {res['count']} times (last {last_date}, {last_tier})")
+        
+        return results
+    
+    @property
+    @reads
+    def number_filter(self) -> NumberFilter:
+        """Constraint filter over the snapshot's numbers, built on first use"""
+        memo = self.all_pattern_stats
+        if 'number_filter' not in memo:
+            hc = self.get_hot_cold_digits()
+            features = NumberFeatures(self.draws, hot_digits=hc['hot'], cold_digits=hc['cold'])
+            memo['number_filter'] = NumberFilter(features)
+        return memo['number_filter']
+    
+    @reads
+    def filter_numbers(self, query, show: int = 20) -> List[str]:
+        """All numbers matching e.g. 'all_even and sum between 10 and 18 and never_drawn'"""
+        matches = self.number_filter.numbers(query)
+        print(f"\n🔎 {len(matches)} numbers match: {query}")
+        if matches:
+            print(f"  {', '.join(matches[:show])}{' ...' if len(matches) > show else ''}")
+        return matches
+    
     # ==================== ANALISIS SEMUA CORAK ====================
     
+    @reads
     def analyze_all_patterns_for_number(self, num: str, date_str: str = None) -> Dict:
         """Analyze all 40 patterns for a single number"""
         patterns = {}
@@ -433,6 +648,7 @@ class TOTOPredictor40Analisis:
     
     # ==================== GENERATE PREDICTIONS ====================
     
+    @reads
     def generate_predictions_for_pattern(self, pattern_id: int, count: int = 2) -> List[str]:
         """Generate 2 predictions for each pattern"""
         predictions = []
@@ -712,14 +928,10 @@ class TOTOPredictor40Analisis:
         
         elif pattern_id == 36:  # Historical Pattern
             if len(self.numbers_4d) >= 5:
-                recent = self.numbers_4d[-5:]
-                for num in recent:
-                    for pos in range(4):
-                        for change in [-1, 1]:
-                            new_digit = (int(num[pos]) + change) % 10
-                            new_num = list(num)
-                            new_num[pos] = str(new_digit)
-                            predictions.append(''.join(new_num))
+                # One digit away from the last 5 numbers, most shared first
+                near = self.recent_neighbour_counts(5)[:, 1]
+                ranked = np.argsort(-near, kind='stable')
+                predictions = [f"{n:04d}" for n in ranked[near[ranked] > 0]]
             else:
                 predictions = ['1234', '5678', '9876']
         
@@ -743,6 +955,11 @@ class TOTOPredictor40Analisis:
                 predictions = seasonal[current_month]
             else:
                 predictions = [f"{current_month:02d}{i:02d}" for i in range(10, 20)]
+            
+            # Prefer numbers that actually came out most in this month
+            hot_in_month = self.get_seasonal_numbers(current_month)
+            if hot_in_month:
+                predictions = hot_in_month
         
         elif pattern_id == 38:  # Date-based
             today = datetime.now()
@@ -754,6 +971,8 @@ class TOTOPredictor40Analisis:
                 f"{today.day:02d}{today.year % 100:02d}",
                 f"{today.year % 100:02d}{today.day:02d}"
             ]
+            # Plus the most drawn numbers on this weekday in this month
+            predictions += self.get_seasonal_numbers(today.month, today.weekday(), 5)
         
         elif pattern_id == 39:  # Not Appeared
             all_numbers_set = set(self.numbers_4d)
@@ -808,351 +1027,253 @@ class TOTOPredictor40Analisis:
         np.random.shuffle(predictions)
         return predictions[:count]
     
-    def generate_all_predictions(self) -> Dict[str, List[str]]:
-        """Generate 2 predictions for each of the 40 patterns"""
-        print("\n" + "="*80)
-        print("TOTO 4D MALAYSIA - 40 PATTERN ANALYSIS WITH 2 PREDICTIONS EACH ANALYSIS")
-        print("="*80)
-        
-        all_predictions = {}
-        
-        # Fixed pattern names list with exactly 40 items
-        pattern_names = [
-            "1.  Sequential_Up",
-            "2.  Sequential_Down",
-            "3.  Palindrome",
-            "4.  Mirror_ABBA",
-            "5.  Repeat_AABB",
-            "6.  Alternating_ABAB",
-            "7.  All_Even",
-            "8.  All_Odd",
-            "9.  Mixed_Even_Odd",
-            "10. Small_0_4",
-            "11. Big_5_9",
-            "12. Big_Small_Mix",
-            "13. Aritmatika",
-            "14. Geometri",
-            "15. Fibonacci_Like",
-            "16. Birthday_Pattern",
-            "17. Mountain",
-            "18. Valley",
-            "19. Plateau",
-            "20. Cliff",
-            "21. Double_Pair",
-            "22. Triple",
-            "23. Quad",
-            "24. All_Different",
-            "25. First_Last_Same",
-            "26. Middle_Same",
-            "27. Bookend",
-            "28. Small_Total",
-            "29. Medium_Total",
-            "30. Large_Total",
-            "31. Extreme_Total",
-            "32. Hot_Digits",
-            "33. Cold_Digits",
-            "34. Balanced_Digits",
-            "35. Lucky_Number",
-            "36. Historical_Pattern",
-            "37. Seasonal_Pattern",
-            "38. Date_Based",
-            "39. Not_Appeared",
-            "40. Special_Combination"
-        ]
-        
-        # Verify we have exactly 40 pattern names
-        print(f"Total pattern names: {len(pattern_names)}")
-        assert len(pattern_names) == 40, f"Expected 40 pattern names, got {len(pattern_names)}"
-        
-        for pattern_id in range(1, 41):
-            try:
-                predictions = self.generate_predictions_for_pattern(pattern_id, 2)
-                pattern_name = pattern_names[pattern_id - 1]
-                all_predictions[pattern_name] = predictions
-                
-                print(f"\n{pattern_name}:")
-                for i, pred in enumerate(predictions, 1):
-                    # Analyze this prediction
-                    analysis = self.analyze_all_patterns_for_number(pred)
-                    
-                    # Get analysis info
-                    info_parts = []
-                    total = sum(int(d) for d in pred)
-                    info_parts.append(f"Total: {total}")
-                    
-                    # Check if prediction matches its own pattern
-                    pattern_match = False
-                    pattern_desc = ""
-                    
-                    # Map pattern_id to analysis key
-                    pattern_mapping = {
-                        1: '1_Sequential_Up',
-                        2: '2_Sequential_Down',
-                        3: '3_Palindrome',
-                        4: '4_Mirror_ABBA',
-                        5: '5_Repeat_AABB',
-                        6: '6_Alternating_ABAB',
-                        7: '7_All_Even',
-                        8: '8_All_Odd',
-                        9: '9_Mixed_Even_Odd',
-                        10: '10_Small_0_4',
-                        11: '11_Big_5_9',
-                        12: '12_Big_Small_Mix',
-                        13: '13_Aritmatika',
-                        14: '14_Geometri',
-                        15: '15_Fibonacci_Like',
-                        16: '16_Birthday_Pattern',
-                        17: '17_Mountain',
-                        18: '18_Valley',
-                        19: '19_Plateau',
-                        20: '20_Cliff',
-                        21: '21_Double_Pair',
-                        22: '22_Triple',
-                        23: '23_Quad',
-                        24: '24_All_Different',
-                        25: '25_First_Last_Same',
-                        26: '26_Middle_Same',
-                        27: '27_Bookend',
-                        28: '28_Small_Total',
-                        29: '29_Medium_Total',
-                        30: '30_Large_Total',
-                        31: '31_Extreme_Total',
-                        32: '32_Hot_Digits',
-                        33: '33_Cold_Digits',
-                        34: '34_Balanced_Digits',
-                        35: '35_Lucky_Number',
-                        36: '36_Historical_Pattern',
-                        37: '37_Seasonal_Pattern',
-                        38: '38_Date_Based',
-                        39: '39_Not_Appeared',
-                        40: '40_Special_Combination'
-                    }
-                    
-                    if pattern_id in pattern_mapping:
-                        analysis_key = pattern_mapping[pattern_id]
-                        if analysis_key in analysis and analysis[analysis_key]:
-                            pattern_match = True
-                            pattern_desc = f"✓ {pattern_names[pattern_id-1].split('. ')[1]}"
-                            
-                            # Add special info for certain patterns
-                            if pattern_id == 13 and analysis['13_Aritmatika_Difference']:
-                                pattern_desc += f" (Difference {analysis['13_Aritmatika_Difference']})"
-                            elif pattern_id == 14 and analysis['14_Geometri_Ratio']:
-                                pattern_desc += f" (ratio {analysis['14_Geometri_Ratio']:.1f})"
-                            elif pattern_id == 16 and analysis['16_Birthday_Pattern']:
-                                pattern_desc += f" ({analysis['16_Birthday_Pattern']})"
-                    
-                    if not pattern_match:
-                        pattern_desc = "Various patterns"
-                    
-                    # Hot/cold analysis
-                    hc = self.get_hot_cold_digits()
-                    hot_count = sum(1 for d in pred if d in hc['hot'])
-                    cold_count = sum(1 for d in pred if d in hc['cold'])
-                    
-                    if hot_count > 0:
-                        info_parts.append(f"Hot: {hot_count}")
-                    if cold_count > 0:
-                        info_parts.append(f"Cold: {cold_count}")
-                    
-                    info_str = " | ".join(info_parts)
-                    print(f"  Prediction {i}: {pred} - {pattern_desc} [{info_str}]")
-                    
-            except Exception as e:
-                print(f"Error generating predictions for pattern {pattern_id}: {e}")
-                all_predictions[pattern_names[pattern_id - 1]] = ["0000", "1111"]
-        
-        # Summary statistics
-        print("\n" + "="*80)
-        print("STATISTIK ANALISIS:")
-        print("-"*80)
-        
-        # Hot/Cold digits
-        hc = self.get_hot_cold_digits()
-        print(f"Digit HOT (often appear): {', '.join(hc['hot']) if hc['hot'] else 'None'}")
-        print(f"Digit COLD (rarely appears): {', '.join(hc['cold']) if hc['cold'] else 'None'}")
-        
-        # Frequency of digits
-        print(f"\nFrekuensi Digit (0-9):")
-        for digit in range(10):
-            freq = hc['all'].get(str(digit), 0)
-            percentage = (freq / len(self.numbers_4d) * 100) if len(self.numbers_4d) > 0 else 0
-            print(f"  {digit}: {freq} times ({percentage:.1f}%)")
-        
-        # Most common patterns in historical data
-        print(f"\nMOST FREQUENT PATTERNS IN HISTORICAL DATA (first 100 numbers):")
-        pattern_counts = defaultdict(int)
-        sample_size = min(100, len(self.numbers_4d))
-        for num in self.numbers_4d[:sample_size]:
-            analysis = self.analyze_all_patterns_for_number(num)
-            for key, value in analysis.items():
-                if value and key not in ['13_Aritmatika_Difference', '14_Geometri_Ratio', '16_Birthday_Pattern']:
-                    pattern_name = key.replace('_', ' ')
-                    pattern_counts[pattern_name] += 1
-        
-        top_patterns = sorted(pattern_counts.items(), key=lambda x: x[1], reverse=True)[:8]
-        for pattern, count in top_patterns:
-            percentage = (count / sample_size * 100)
-            print(f"  {pattern}: {count} times ({percentage:.1f}%)")
-        
-        # Generate top 10 overall recommendations
-        print("\n" + "="*80)
-        print("10 MAIN RECOMMENDATIONS BASED ON ALL ANALYSI:")
-        print("-"*80)
-        
-        all_recommended = []
-        for preds in all_predictions.values():
-            all_recommended.extend(preds)
-        
-        # Score each number
-        scored_numbers = []
-        for num in set(all_recommended):
-            if num == "0000":  # Skip placeholder
-                continue
-                
-            score = 0
-            analysis = self.analyze_all_patterns_for_number(num)
-            
-            # Bonus for historical patterns
-            if analysis['36_Historical_Pattern']:
-                score += 3
-            
-            # Bonus for not appeared
-            if analysis['39_Not_Appeared']:
-                score += 2
-            
-            # Bonus for sum 10-18 (most common range)
-            total = sum(int(d) for d in num)
-            if 10 <= total <= 18:
-                score += 2
-            
-            # Bonus for having 2-3 hot digits
-            hc = self.get_hot_cold_digits()
-            hot_count = sum(1 for d in num if d in hc['hot'])
-            if 2 <= hot_count <= 3:
-                score += hot_count
-            
-            # Bonus for all different digits
-            if analysis['24_All_Different']:
-                score += 1
-            
-            # Bonus for lucky numbers
-            if analysis['35_Lucky_Number']:
-                score += 2
-            
-            # Bonus for special combination
-            if analysis['40_Special_Combination']:
-                score += 3
+    # Display names and analyze_all_patterns_for_number() keys of the 40 patterns
+    PATTERN_NAMES = [
+        "1.  Sequential_Up",
+        "2.  Sequential_Down",
+        "3.  Palindrome",
+        "4.  Mirror_ABBA",
+        "5.  Repeat_AABB",
+        "6.  Alternating_ABAB",
+        "7.  All_Even",
+        "8.  All_Odd",
+        "9.  Mixed_Even_Odd",
+        "10. Small_0_4",
+        "11. Big_5_9",
+        "12. Big_Small_Mix",
+        "13. Aritmatika",
+        "14. Geometri",
+        "15. Fibonacci_Like",
+        "16. Birthday_Pattern",
+        "17. Mountain",
+        "18. Valley",
+        "19. Plateau",
+        "20. Cliff",
+        "21. Double_Pair",
+        "22. Triple",
+        "23. Quad",
+        "24. All_Different",
+        "25. First_Last_Same",
+        "26. Middle_Same",
+        "27. Bookend",
+        "28. Small_Total",
+        "29. Medium_Total",
+        "30. Large_Total",
+        "31. Extreme_Total",
+        "32. Hot_Digits",
+        "33. Cold_Digits",
+        "34. Balanced_Digits",
+        "35. Lucky_Number",
+        "36. Historical_Pattern",
+        "37. Seasonal_Pattern",
+        "38. Date_Based",
+        "39. Not_Appeared",
+        "40. Special_Combination",
+    ]
+    PATTERN_KEYS = [
+        '1_Sequential_Up',
+        '2_Sequential_Down',
+        '3_Palindrome',
+        '4_Mirror_ABBA',
+        '5_Repeat_AABB',
+        '6_Alternating_ABAB',
+        '7_All_Even',
+        '8_All_Odd',
+        '9_Mixed_Even_Odd',
+        '10_Small_0_4',
+        '11_Big_5_9',
+        '12_Big_Small_Mix',
+        '13_Aritmatika',
+        '14_Geometri',
+        '15_Fibonacci_Like',
+        '16_Birthday_Pattern',
+        '17_Mountain',
+        '18_Valley',
+        '19_Plateau',
+        '20_Cliff',
+        '21_Double_Pair',
+        '22_Triple',
+        '23_Quad',
+        '24_All_Different',
+        '25_First_Last_Same',
+        '26_Middle_Same',
+        '27_Bookend',
+        '28_Small_Total',
+        '29_Medium_Total',
+        '30_Large_Total',
+        '31_Extreme_Total',
+        '32_Hot_Digits',
+        '33_Cold_Digits',
+        '34_Balanced_Digits',
+        '35_Lucky_Number',
+        '36_Historical_Pattern',
+        '37_Seasonal_Pattern',
+        '38_Date_Based',
+        '39_Not_Appeared',
+        '40_Special_Combination',
+    ]
+    
+    @reads
+    def compute_prediction_results(self, predictions: Dict[str, List[str]] = None) -> PredictionResults:
+        """Run the 40 generators (unless `predictions` is given) and every derived statistic once
+        
+        Each distinct predicted number is analyzed once; hot/cold digits, the
+        historical pattern sample and the recommendation scores are computed
+        once and shared by the console output and every report format.
+        """
+        results = PredictionResults(self.PATTERN_NAMES, len(self.draw_dates or []), len(self.numbers_4d or []),
+                                    self.draw_dates[0] if self.draw_dates else None,
+                                    self.draw_dates[-1] if self.draw_dates else None)
+        hc = results.hot_cold = self.get_hot_cold_digits()
+        
+        def analysis_of(num):
+            if num not in results.number_analysis:
+                results.number_analysis[num] = self.analyze_all_patterns_for_number(num)
+            return results.number_analysis[num]
+        
+        for pattern_id, pattern_name in enumerate(self.PATTERN_NAMES, 1):
+            if predictions is not None:
+                preds = predictions.get(pattern_name, [])
+            else:
+                try:
+                    with stage(self.metrics, f"generator.{pattern_name}"):
+                        preds = self.generate_predictions_for_pattern(pattern_id, 2)
+                except Exception as e:
+                    results.errors[pattern_name] = str(e)
+                    results.predictions[pattern_name] = ["0000", "1111"]
+                    continue
+            results.predictions[pattern_name] = preds
             
-            scored_numbers.append((num, score))
-        
-        # Sort by score
-        scored_numbers.sort(key=lambda x: x[1], reverse=True)
+            rows = []
+            for pred in preds:
+                analysis = analysis_of(pred)
+                description = "Various patterns"
+                analysis_key = self.PATTERN_KEYS[pattern_id - 1]
+                if analysis.get(analysis_key):
+                    description = f"✓ {pattern_name.split('. ')[1]}"
+                    # Add special info for certain patterns
+                    if pattern_id == 13 and analysis['13_Aritmatika_Difference']:
+                        description += f" (Difference {analysis['13_Aritmatika_Difference']})"
+                    elif pattern_id == 14 and analysis['14_Geometri_Ratio']:
+                        description += f" (ratio {analysis['14_Geometri_Ratio']:.1f})"
+                    elif pattern_id == 16 and analysis['16_Birthday_Pattern']:
+                        description += f" ({analysis['16_Birthday_Pattern']})"
+                rows.append({'number': pred, 'total': sum(int(d) for d in pred), 'description': description,
+                             'hot': sum(1 for d in pred if d in hc['hot']),
+                             'cold': sum(1 for d in pred if d in hc['cold'])})
+            results.rows[pattern_name] = rows
         
-        for i, (num, score) in enumerate(scored_numbers[:10], 1):
-            patterns = []
-            analysis = self.analyze_all_patterns_for_number(num)
-            
-            # Get top patterns
-            pattern_list = []
-            for key, value in analysis.items():
-                if value and key not in ['13_Aritmatika_Difference', '14_Geometri_Ratio', '16_Birthday_Pattern']:
-                    if 'Total' not in key and 'Digits' not in key:
-                        pattern_name = key.replace('_', ' ')
-                        pattern_list.append(pattern_name)
+        # Most common patterns in historical data
+        with stage(self.metrics, 'results.pattern_counts'):
+            pattern_counts = defaultdict(int)
+            results.sample_size = min(100, len(self.numbers_4d))
+            for num in self.numbers_4d[:results.sample_size]:
+                for key, value in analysis_of(num).items():
+                    if value and key not in DETAIL_KEYS:
+                        pattern_counts[key.replace('_', ' ')] += 1
+            results.pattern_counts = sorted(pattern_counts.items(), key=lambda x: x[1], reverse=True)
+        
+        # Score each recommended number
+        with stage(self.metrics, 'results.recommendations'):
+            all_recommended = []
+            for preds in results.predictions.values():
+                all_recommended.extend(preds)
             
-            top_patterns = pattern_list[:3]
-            pattern_str = ", ".join(top_patterns) if top_patterns else "Various"
+            scored_numbers = []
+            for num in set(all_recommended):
+                if num == "0000":  # Skip placeholder
+                    continue
+                
+                score = 0
+                analysis = analysis_of(num)
+                if analysis['36_Historical_Pattern']:
+                    score += 3
+                if analysis['39_Not_Appeared']:
+                    score += 2
+                # sum 10-18 is the most common range
+                if 10 <= sum(int(d) for d in num) <= 18:
+                    score += 2
+                hot_count = sum(1 for d in num if d in hc['hot'])
+                if 2 <= hot_count <= 3:
+                    score += hot_count
+                if analysis['24_All_Different']:
+                    score += 1
+                if analysis['35_Lucky_Number']:
+                    score += 2
+                if analysis['40_Special_Combination']:
+                    score += 3
+                
+                pattern_list = [key.replace('_', ' ') for key, value in analysis.items()
+                                if value and key not in DETAIL_KEYS and 'Total' not in key and 'Digits' not in key]
+                scored_numbers.append((num, score, ", ".join(pattern_list[:3]) if pattern_list else "Various"))
             
-            total = sum(int(d) for d in num)
-            print(f"{i:2d}. {num} (Score: {score:2d}) - {pattern_str} | Total: {total:2d}")
-        
-        return all_predictions
+            scored_numbers.sort(key=lambda x: x[1], reverse=True)
+            results.recommendations = scored_numbers
+        return results
     
-    def save_predictions_report(self, predictions: Dict):
-        """Save complete predictions report to file"""
-        filename = f"toto_predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    @reads
+    def generate_all_predictions(self) -> Dict[str, List[str]]:
+        """Generate 2 predictions for each of the 40 patterns"""
+        results = self.compute_prediction_results()
+        self.last_results = results
+        print("\n".join(results.console_lines()))
+        return results.predictions
+    
+    @reads
+    def save_predictions_report(self, predictions: Dict, fmt: str = 'txt'):
+        """Save complete predictions report to file ('txt', 'json' or 'csv')
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("REPORT MALAYSIA - 4D [TOTO] SPORTSTOTO / [88] SABAH 88 \n")
-            f.write("="*80 + "\n\n")
-            
-            f.write(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Based on Data: {len(self.draw_dates)} times vote\n")
-            f.write(f"Total Analyzed Numbers: {len(self.numbers_4d)}\n")
-            if self.draw_dates and len(self.draw_dates) > 0:
-                f.write(f"Julat Tarikh: {self.draw_dates[0].strftime('%Y-%m-%d')} until "
-                       f"{self.draw_dates[-1].strftime('%Y-%m-%d')}\n\n")
-            
-            f.write("ANALYSIS OF 40 PATTERNS WITH 2 PREDICTIONS EACH:\n")
-            f.write("-"*80 + "\n\n")
-            
-            for pattern_name, preds in predictions.items():
-                f.write(f"{pattern_name}:\n")
-                for i, pred in enumerate(preds, 1):
-                    analysis = self.analyze_all_patterns_for_number(pred)
-                    total = sum(int(d) for d in pred)
-                    f.write(f"  {i}. {pred} (Total: {total})\n")
-                f.write("\n")
-            
-            # Statistics
-            f.write("\n" + "="*80 + "\n")
-            f.write("IMPORTANT STATISTICS:\n")
-            f.write("-"*80 + "\n\n")
-            
-            hc = self.get_hot_cold_digits()
-            f.write("Frekuensi Digit (0-9):\n")
-            for digit in range(10):
-                freq = hc['all'].get(str(digit), 0)
-                percentage = (freq / len(self.numbers_4d) * 100) if len(self.numbers_4d) > 0 else 0
-                f.write(f"  {digit}: {freq} times ({percentage:.1f}%)\n")
-            
-            f.write(f"\nDigit HOT: {', '.join(hc['hot']) if hc['hot'] else 'None'}\n")
-            f.write(f"Digit COLD: {', '.join(hc['cold']) if hc['cold'] else 'None'}\n")
-            
-            # Pattern frequency
-            f.write("\nPattern Frequency (100 prime numbers):\n")
-            pattern_counts = defaultdict(int)
-            sample_size = min(100, len(self.numbers_4d))
-            for num in self.numbers_4d[:sample_size]:
-                analysis = self.analyze_all_patterns_for_number(num)
-                for key, value in analysis.items():
-                    if value and key not in ['13_Aritmatika_Difference', '14_Geometri_Ratio', '16_Birthday_Pattern']:
-                        pattern_name = key.replace('_', ' ')
-                        pattern_counts[pattern_name] += 1
-            
-            for pattern, count in sorted(pattern_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
-                percentage = (count / sample_size * 100)
-                f.write(f"  {pattern}: {count} times ({percentage:.1f}%)\n")
-            
-            f.write("\n" + "="*80 + "\n")
-            f.write("IMPORTANT: This prediction is based on statistical analysis only.\n")
-            f.write("No guarantee of victory. Play responsibly.\n")
-            f.write("="*80 + "\n")
+        Renders the results of the generate_all_predictions() run that
+        produced `predictions`; other predictions are analyzed once here.
+        """
+        results = self.last_results
+        if results is None or results.predictions is not predictions:
+            results = self.compute_prediction_results(predictions)
+        
+        filename = f"toto_predictions_{results.created.strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        results.write(filename, fmt)
         
         print(f"\n✅ The prediction report is saved as: {filename}")
 
 def main():
     """Main execution function"""
+    import argparse
+    parser = argparse.ArgumentParser(prog='prediction_4d_v2.py')
+    parser.add_argument('data', nargs='?', help="Draw_Date,01..23 data file")
+    parser.add_argument('--profile', metavar='METRICS.json',
+                        help="time the load stages and the 40 generators, write the metrics as JSON here")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile: also record peak memory per stage (tracemalloc, slower)")
+    parser.add_argument('--profile-cprofile', metavar='PSTATS', help="with --profile: dump cProfile stats here")
+    parser.add_argument('--cache-dir', help="cache results in this directory (default: $TOTO_CACHE_DIR, else no cache)")
+    args = parser.parse_args()
+    
     print("🎯 MALAYSIA - 4D [TOTO] SPORTSTOTO / [88] SABAH 88 - ALL ANALYSES WITH PREDICTIONS")
     print("="*60)
     
 
-    if len(sys.argv) < 2:
+    if args.data is None:
         print("Usage: python3 toto_predictior2.py data.txt")
         sys.exit(1)
 
-    predictor = TOTOPredictor40Analisis(sys.argv[1])
+    metrics = None
+    if args.profile:
+        metrics = Metrics(trace_memory=args.profile_memory, profile_path=args.profile_cprofile).start()
+    
+    cache = optional_cache(args.cache_dir)
+    with stage(metrics, 'load'):
+        predictor = TOTOPredictor40Analisis(args.data, cache=cache, metrics=metrics)
     # Gantikan 'toto_data.txt' dengan path file data anda
     #predictor = TOTOPredictor40Analisis('real_data.txt')
     
     if predictor.numbers_4d:
         # Generate semua prediksi
-        predictions = predictor.generate_all_predictions()
+        with stage(metrics, 'generate_all_predictions'):
+            predictions = predictor.generate_all_predictions()
         
         # Save report
-        predictor.save_predictions_report(predictions)
+        with stage(metrics, 'save_predictions_report'):
+            predictor.save_predictions_report(predictions)
         
         print("\n" + "="*60)
         print("ATTENTION:")
@@ -1165,6 +1286,16 @@ def main():
         print("="*60)
     else:
         print("❌ None data to analyze. Please make sure the data file exists and is in the correct format.")
+    
+    if metrics is not None:
+        metrics.stop()
+        # derived statistics time themselves when they are computed or updated
+        for row in predictor.DERIVED.values(predictor.snapshot).report():
+            if row['action'] in ('computed', 'updated'):
+                metrics.add(f"derived.{row['node']}", row['seconds'])
+        metrics.write(args.profile)
+        print("\n".join(metrics.summary_lines()))
+        print(f"📈 Metrics saved as: {args.profile}")
 
 if __name__ == "__main__":
     main()
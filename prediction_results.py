@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, List
+
+# Keys of analyze_all_patterns_for_number() that are details, not pattern flags
+DETAIL_KEYS = ('13_Aritmatika_Difference', '14_Geometri_Ratio', '16_Birthday_Pattern')
+
+
+class PredictionResults:
+    """Everything one 40-pattern run computed, rendered by console and report writers
+
+    predictions      {pattern name: [numbers]}
+    rows             {pattern name: [{number, total, description, hot, cold}]}
+    errors           {pattern name: message} for generators that failed
+    number_analysis  {number: analyze_all_patterns_for_number()} for every prediction
+    hot_cold         get_hot_cold_digits()
+    pattern_counts   [(pattern, count)] over the first `sample_size` historical numbers
+    recommendations  [(number, score, pattern summary)] best first
+    """
+
+    def __init__(self, pattern_names: List[str], draw_count: int, number_count: int,
+                 first_date=None, last_date=None):
+        self.pattern_names = pattern_names
+        self.draw_count = draw_count
+        self.number_count = number_count
+        self.first_date = first_date
+        self.last_date = last_date
+        self.created = datetime.now()
+        self.predictions: Dict[str, List[str]] = {}
+        self.rows: Dict[str, List[Dict]] = {}
+        self.errors: Dict[str, str] = {}
+        self.number_analysis: Dict[str, Dict] = {}
+        self.hot_cold = {'hot': [], 'cold': [], 'all': {}}
+        self.pattern_counts = []
+        self.sample_size = 0
+        self.recommendations = []
+
+    def digit_percentages(self) -> Dict[str, float]:
+        total = self.number_count
+        return {str(d): (self.hot_cold['all'].get(str(d), 0) / total * 100) if total > 0 else 0
+                for d in range(10)}
+
+    # ==================== RENDERERS ====================
+
+    def console_lines(self) -> List[str]:
+        """The generate_all_predictions() console output"""
+        lines = ["", "=" * 80, "TOTO 4D MALAYSIA - 40 PATTERN ANALYSIS WITH 2 PREDICTIONS EACH ANALYSIS", "=" * 80,
+                 f"Total pattern names: {len(self.pattern_names)}"]
+
+        for pattern_id, name in enumerate(self.pattern_names, 1):
+            if name in self.errors:
+                lines.append(f"Error generating predictions for pattern {pattern_id}: {self.errors[name]}")
+                continue
+            lines.append(f"\n{name}:")
+            for i, row in enumerate(self.rows.get(name, []), 1):
+                info = [f"Total: {row['total']}"]
+                if row['hot'] > 0:
+                    info.append(f"Hot: {row['hot']}")
+                if row['cold'] > 0:
+                    info.append(f"Cold: {row['cold']}")
+                lines.append(f"  Prediction {i}: {row['number']} - {row['description']} [{' | '.join(info)}]")
+
+        hc = self.hot_cold
+        lines += ["\n" + "=" * 80, "STATISTIK ANALISIS:", "-" * 80,
+                  f"Digit HOT (often appear): {', '.join(hc['hot']) if hc['hot'] else 'None'}",
+                  f"Digit COLD (rarely appears): {', '.join(hc['cold']) if hc['cold'] else 'None'}",
+                  f"\nFrekuensi Digit (0-9):"]
+        percentages = self.digit_percentages()
+        for digit in range(10):
+            lines.append(f"  {digit}: {hc['all'].get(str(digit), 0)} times ({percentages[str(digit)]:.1f}%)")
+
+        lines.append(f"\nMOST FREQUENT PATTERNS IN HISTORICAL DATA (first 100 numbers):")
+        for pattern, count in self.pattern_counts[:8]:
+            lines.append(f"  {pattern}: {count} times ({count / self.sample_size * 100:.1f}%)")
+
+        lines += ["\n" + "=" * 80, "10 MAIN RECOMMENDATIONS BASED ON ALL ANALYSI:", "-" * 80]
+        for i, (num, score, pattern_str) in enumerate(self.recommendations[:10], 1):
+            total = sum(int(d) for d in num)
+            lines.append(f"{i:2d}. {num} (Score: {score:2d}) - {pattern_str} | Total: {total:2d}")
+        return lines
+
+    def to_text(self) -> str:
+        """The save_predictions_report() text report"""
+        out = ["=" * 80, "REPORT MALAYSIA - 4D [TOTO] SPORTSTOTO / [88] SABAH 88 ", "=" * 80, "",
+               f"Report Date: {self.created.strftime('%Y-%m-%d %H:%M:%S')}",
+               f"Based on Data: {self.draw_count} times vote",
+               f"Total Analyzed Numbers: {self.number_count}"]
+        if self.first_date is not None:
+            out.append(f"Julat Tarikh: {self.first_date.strftime('%Y-%m-%d')} until "
+                       f"{self.last_date.strftime('%Y-%m-%d')}\n")
+
+        out += ["ANALYSIS OF 40 PATTERNS WITH 2 PREDICTIONS EACH:", "-" * 80, ""]
+        for name, preds in self.predictions.items():
+            out.append(f"{name}:")
+            for i, pred in enumerate(preds, 1):
+                out.append(f"  {i}. {pred} (Total: {sum(int(d) for d in pred)})")
+            out.append("")
+
+        hc = self.hot_cold
+        out += ["", "=" * 80, "IMPORTANT STATISTICS:", "-" * 80, "", "Frekuensi Digit (0-9):"]
+        percentages = self.digit_percentages()
+        for digit in range(10):
+            out.append(f"  {digit}: {hc['all'].get(str(digit), 0)} times ({percentages[str(digit)]:.1f}%)")
+        out += ["", f"Digit HOT: {', '.join(hc['hot']) if hc['hot'] else 'None'}",
+                f"Digit COLD: {', '.join(hc['cold']) if hc['cold'] else 'None'}",
+                "", "Pattern Frequency (100 prime numbers):"]
+        for pattern, count in self.pattern_counts[:10]:
+            out.append(f"  {pattern}: {count} times ({count / self.sample_size * 100:.1f}%)")
+
+        out += ["", "=" * 80, "IMPORTANT: This prediction is based on statistical analysis only.",
+                "No guarantee of victory. Play responsibly.", "=" * 80]
+        return "\n".join(out) + "\n"
+
+    def to_dict(self) -> Dict:
+        def plain(value):
+            return value.item() if hasattr(value, 'item') else value
+
+        return {
+            'created': self.created.isoformat(timespec='seconds'),
+            'draws': self.draw_count,
+            'numbers': self.number_count,
+            'first_date': self.first_date.strftime('%Y-%m-%d') if self.first_date is not None else None,
+            'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            'predictions': self.predictions,
+            'rows': self.rows,
+            'errors': self.errors,
+            'number_analysis': {n: {k: plain(v) for k, v in a.items()} for n, a in self.number_analysis.items()},
+            'hot_cold': self.hot_cold,
+            'digit_percentages': self.digit_percentages(),
+            'pattern_counts': {'sample_size': self.sample_size, 'counts': dict(self.pattern_counts)},
+            'recommendations': [{'number': n, 'score': s, 'patterns': p} for n, s, p in self.recommendations],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_csv(self) -> str:
+        """One line per prediction, then one per recommendation"""
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['section', 'pattern', 'rank', 'number', 'total', 'description', 'hot', 'cold', 'score'])
+        for name, rows in self.rows.items():
+            for rank, row in enumerate(rows, 1):
+                writer.writerow(['prediction', name, rank, row['number'], row['total'], row['description'],
+                                 row['hot'], row['cold'], ''])
+        for rank, (num, score, patterns) in enumerate(self.recommendations, 1):
+            writer.writerow(['recommendation', patterns, rank, num, sum(int(d) for d in num), '', '', '', score])
+        return out.getvalue()
+
+    def write(self, filename: str, fmt: str = 'txt'):
+        renderers = {'txt': self.to_text, 'json': self.to_json, 'csv': self.to_csv}
+        if fmt not in renderers:
+            raise ValueError(f"unknown report format {fmt!r}, expected one of {list(renderers)}")
+        with open(filename, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+            f.write(renderers[fmt]())
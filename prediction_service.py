@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import io
+import os
+import json
+import asyncio
+import argparse
+import contextlib
+import numpy as np
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from toto_core import TIER_NAMES, number_histogram, digit_matrix
+from bootstrap import hot_cold_digit_labels
+from ticket_checker import check_tickets, clean_tickets
+from result_cache import ResultCache, DEFAULT_CACHE_DIR
+from prediction_4d import TOTO4DAnalyzer
+from prediction_4d_v2 import TOTOPredictor40Analisis
+import consensus
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATASETS = {'toto': os.path.join(_HERE, '1992-2026-toto.txt'),
+                    '88': os.path.join(_HERE, '2001-2026-88.txt')}
+
+# Per-process analyzers of the worker pool (set by _init_worker)
+_WORKER = {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _init_worker(paths, cache_dir):
+    cache = ResultCache(cache_dir) if cache_dir else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, path in paths.items():
+            _WORKER[name] = (TOTO4DAnalyzer(path, cache=cache), TOTOPredictor40Analisis(path, cache=cache))
+
+
+def _quietly(func, *args):
+    """Workers only compute; the analyses' console output is dropped"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def _worker_ready():
+    return sorted(_WORKER)
+
+
+def _worker_recommendations(name, seed, top_n):
+    """The 11 analyses, their popular-prediction consensus and the top consensus scores"""
+    analyzer, _ = _WORKER[name]
+
+    def compute():
+        with analyzer.snapshot_pinned():
+            analyses, errors = analyzer.run_analyses(seed=seed)
+            popular = analyzer.predictions_populer_analysis(analyses)
+            scores = consensus.consensus_scores(analyzer.DERIVED.values(analyzer.snapshot))
+        ranked = np.argsort(-scores, kind='stable')[:top_n]
+        return {'analyses': analyses, 'errors': errors, 'popular': [str(p) for p in popular],
+                'consensus': [{'number': f"{n:04d}", 'score': float(scores[n])} for n in ranked]}
+
+    if seed is None:
+        return compute()
+    return analyzer.cached('service.recommendations', compute, {'top': top_n}, seed)
+
+
+def _worker_patterns(name, seed):
+    """The 40-pattern predictions with their descriptions and recommendations"""
+    _, predictor = _WORKER[name]
+
+    def compute():
+        if seed is not None:
+            np.random.seed(seed)
+        result = predictor.compute_prediction_results().to_dict()
+        result.pop('number_analysis')
+        return result
+
+    if seed is None or predictor.cache is None:
+        return compute()
+    return predictor.cache.cached(predictor.dataset_hash, 'compute_prediction_results', compute, None, seed)
+
+
+class WarmDataset:
+    """One operator's history kept in memory with the counts the cheap endpoints need"""
+
+    def __init__(self, name: str, path: str, cache: ResultCache = None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = TOTO4DAnalyzer(path, cache=cache)
+        draws = analyzer.draws
+        if draws is None:
+            raise ValueError(f"could not load {path}")
+        self.name = name
+        self.path = path
+        self.analyzer = analyzer
+        self.counts = number_histogram(draws)
+        digits = digit_matrix(draws)[draws >= 0]
+        self.positional = np.stack([np.bincount(digits[:, p], minlength=10) for p in range(4)])
+        self.digit_totals = self.positional.sum(axis=0)
+        self.digit_labels = hot_cold_digit_labels(self.digit_totals)
+        # most to least frequent, and drawn numbers from least to most frequent
+        self.ranked = np.argsort(-self.counts, kind='stable')
+        seen = np.nonzero(self.counts)[0]
+        self.rising = seen[np.argsort(self.counts[seen], kind='stable')]
+
+    def summary(self) -> dict:
+        dates = self.analyzer.draw_dates
+        return {'file': self.path, 'draws': int(len(self.analyzer.draws)), 'numbers': int(self.counts.sum()),
+                'first_date': str(dates[0]) if len(dates) else None,
+                'last_date': str(dates[-1]) if len(dates) else None}
+
+
+def _int_param(params, name, default=None, low=None, high=None):
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be between {low} and {high}")
+    return value
+
+
+class PredictionService:
+    """Local JSON-over-HTTP service with both operators' histories loaded once
+
+    Cheap endpoints (frequency, hot/cold, ticket checks) are answered on
+    the event loop from the warm in-memory arrays. The 40-pattern and full
+    recommendation runs go to a process pool whose workers load the same
+    files once at start-up (from the result cache when warm), so they never
+    block the loop. workers=0 uses one background thread instead.
+
+        GET  /health, /datasets
+        GET  /frequency?dataset=toto&top=10
+        GET  /hotcold?dataset=toto&top=10
+        GET  /check?dataset=toto&tickets=1234,5678&permutation=1&detail=1   (or POST a JSON body)
+        GET  /patterns?dataset=88&seed=7
+        GET  /recommendations?dataset=toto&seed=7&top=5
+    """
+
+    def __init__(self, paths=None, workers: int = None, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.paths = dict(paths or DEFAULT_DATASETS)
+        cache = ResultCache(cache_dir) if cache_dir else None
+        self.datasets = {name: WarmDataset(name, path, cache) for name, path in self.paths.items()}
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.paths, cache_dir))
+        else:
+            self.pool = ThreadPoolExecutor(1, initializer=_init_worker, initargs=(self.paths, cache_dir))
+        # start every worker now, so the first heavy request does not pay for loading
+        for future in [self.pool.submit(_worker_ready) for _ in range(max(workers, 1))]:
+            future.result()
+
+        self.routes = {
+            '/health': self.health,
+            '/datasets': self.list_datasets,
+            '/frequency': self.frequency,
+            '/hotcold': self.hot_cold,
+            '/check': self.check,
+            '/patterns': self.patterns,
+            '/recommendations': self.recommendations,
+        }
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def _dataset(self, params) -> WarmDataset:
+        name = params.get('dataset') or next(iter(self.datasets))
+        if name not in self.datasets:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"unknown dataset {name!r}, expected one of {list(self.datasets)}")
+        return self.datasets[name]
+
+    async def _offload(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, partial(_quietly, func, *args))
+
+    # ==================== ENDPOINTS ====================
+
+    async def health(self, params):
+        return {'ok': True, 'datasets': list(self.datasets)}
+
+    async def list_datasets(self, params):
+        return {name: ds.summary() for name, ds in self.datasets.items()}
+
+    async def frequency(self, params):
+        ds = self._dataset(params)
+        top = _int_param(params, 'top', 10, 1, 10000)
+        ranked = ds.ranked[:top]
+        return {'dataset': ds.name, **ds.summary(),
+                'top': [{'number': f"{n:04d}", 'count': int(ds.counts[n])} for n in ranked],
+                'positional_digits': ds.positional.tolist()}
+
+    async def hot_cold(self, params):
+        ds = self._dataset(params)
+        top = _int_param(params, 'top', 10, 1, 10000)
+        order = ds.rising
+        labels = {1: 'hot', -1: 'cold', 0: 'neutral'}
+        return {'dataset': ds.name,
+                'hot': [{'number': f"{n:04d}", 'count': int(ds.counts[n])} for n in order[::-1][:top]],
+                'cold': [{'number': f"{n:04d}", 'count': int(ds.counts[n])} for n in order[:top]],
+                'digits': [{'digit': str(d), 'count': int(ds.digit_totals[d]), 'label': labels[int(ds.digit_labels[d])]}
+                           for d in range(10)]}
+
+    async def check(self, params):
+        ds = self._dataset(params)
+        tickets = params.get('tickets') or []
+        if isinstance(tickets, str):
+            tickets = tickets.replace(',', ' ').split()
+        tickets = clean_tickets(tickets)
+        if not tickets:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "tickets must list 1-4 digit numbers")
+        permutation = str(params.get('permutation', '')).lower() in ('1', 'true', 'yes')
+
+        hits = check_tickets(ds.analyzer.occurrence_index, tickets, np.array(tickets, dtype=np.int64), permutation)
+        result = {'dataset': ds.name, 'permutation': permutation,
+                  'tickets': [{'ticket': t, 'hits': int(row.sum()), 'tiers': dict(zip(TIER_NAMES, row.tolist()))}
+                              for t, row in zip(tickets, hits.summary())]}
+        if str(params.get('detail', '')).lower() in ('1', 'true', 'yes'):
+            result['hits'] = [dict(zip(('ticket', 'number', 'date', 'tier'), row)) for row in hits.rows()]
+        return result
+
+    async def patterns(self, params):
+        ds = self._dataset(params)
+        seed = _int_param(params, 'seed')
+        return {'dataset': ds.name, **await self._offload(_worker_patterns, ds.name, seed)}
+
+    async def recommendations(self, params):
+        ds = self._dataset(params)
+        seed = _int_param(params, 'seed')
+        top = _int_param(params, 'top', 5, 1, 10000)
+        return {'dataset': ds.name, **await self._offload(_worker_recommendations, ds.name, seed, top)}
+
+    # ==================== HTTP ====================
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        try:
+            handler = self.routes.get(url.path)
+            if handler is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"no endpoint {url.path}")
+            if method not in ('GET', 'POST'):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported")
+
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if body:
+                try:
+                    params.update(json.loads(body))
+                except (ValueError, TypeError):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+            return HTTPStatus.OK, await handler(params)
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive: one JSON response per request on the connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                    body = await reader.readexactly(int(headers.get('content-length') or 0))
+                    status, payload = await self.dispatch(method, target, body)
+                except ValueError:
+                    version, headers = 'HTTP/1.0', {}
+                    status, payload = HTTPStatus.BAD_REQUEST, {'error': "malformed request"}
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8044, unix_path: str = None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            where = f"unix:{unix_path}"
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            where = "http://" + ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+        print(f"🚀 Serving {', '.join(self.datasets)} on {where}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local prediction service with the draw histories kept in memory")
+    parser.add_argument('--data', action='append', metavar='NAME=FILE',
+                        help="dataset to serve (repeatable, default: toto and 88 next to this script)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8044)
+    parser.add_argument('--unix', help="listen on this Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, help="processes for the heavy endpoints (0: one thread)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="result cache directory")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args(argv)
+
+    paths = None
+    if args.data:
+        paths = {}
+        for item in args.data:
+            name, sep, path = item.partition('=')
+            if not sep:
+                name, path = os.path.splitext(os.path.basename(item))[0], item
+            paths[name] = path
+
+    print("📂 Loading datasets...", flush=True)
+    service = PredictionService(paths, args.workers, None if args.no_cache else args.cache_dir)
+    for name, ds in service.datasets.items():
+        summary = ds.summary()
+        print(f"✅ {name}: {summary['draws']:,} draws ({summary['first_date']} - {summary['last_date']})", flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("\n⚠️  Service Stopped!")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
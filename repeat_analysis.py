@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from typing import Dict
+
+from toto_core import NUM_SPACE
+from number_features import DIGITS
+from occurrence_index import OccurrenceIndex
+
+
+def autocorrelation(series: np.ndarray, max_lag: int = 10) -> np.ndarray:
+    """Sample autocorrelation at lags 1..max_lag"""
+    x = np.asarray(series, dtype=np.float64)
+    x = x - x.mean()
+    denom = (x * x).sum()
+    if denom == 0:
+        return np.zeros(max_lag)
+    return np.array([(x[:-lag] * x[lag:]).sum() / denom for lag in range(1, max_lag + 1)])
+
+
+class RepeatAnalysis:
+    """How soon numbers come back, and whether draws depend on the previous ones
+
+    Built in one pass over an OccurrenceIndex: occurrences are grouped by
+    number and chronological within a number, so the gaps between a
+    number's consecutive appearances are a single np.diff. Gaps are in
+    draws; a gap of 0 means the number appeared twice in the same draw.
+    """
+
+    def __init__(self, occ: OccurrenceIndex, draws: np.ndarray):
+        self.draw_count = occ.draw_count
+        same = occ.number[1:] == occ.number[:-1]
+        self.gap_number = occ.number[1:][same].astype(np.int64)
+        self.gaps = (occ.draw[1:] - occ.draw[:-1])[same].astype(np.int64)
+        self.gap_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.gap_number, minlength=NUM_SPACE))])
+
+        # chance a given number shows up in a draw if the draws were uniform
+        per_draw = (draws >= 0).sum(axis=1).mean() if len(draws) else 0.0
+        self.hit_probability = 1.0 - (1.0 - 1.0 / NUM_SPACE) ** per_draw
+
+        valid = draws >= 0
+        numbers = np.where(valid, draws, 0).astype(np.int64)
+        self.draw_sums = np.where(valid, DIGITS.sum(axis=1)[numbers], 0).sum(axis=1)
+        self.draw_even = (valid & (numbers % 2 == 0)).sum(axis=1)
+
+    def gap_histogram(self, max_gap: int = None) -> np.ndarray:
+        """Counts of repeat distances 0..max_gap over all numbers"""
+        counts = np.bincount(self.gaps, minlength=(max_gap or 0) + 1)
+        return counts if max_gap is None else counts[:max_gap + 1]
+
+    def repeat_within(self, k: int) -> np.ndarray:
+        """(10000,) how many times each number repeated within k draws of its previous appearance
+
+        Same-draw duplicates (gap 0) are not repeats, as in within_k_distribution().
+        """
+        return np.bincount(self.gap_number, weights=(self.gaps > 0) & (self.gaps <= k),
+                           minlength=NUM_SPACE).astype(np.int64)
+
+    def expected_gap_counts(self) -> np.ndarray:
+        """Expected repeats at each gap 1..draws-1 if every draw were uniform
+
+        A number hits a draw with probability p; a repeat at gap g needs two
+        hits g draws apart with none in between, and there are draws - g
+        places for it: N (draws - g) p^2 (1 - p)^(g - 1). Index 0 is unused.
+        """
+        p = self.hit_probability
+        g = np.arange(self.draw_count, dtype=np.float64)
+        expected = NUM_SPACE * (self.draw_count - g) * p * p * (1.0 - p) ** np.maximum(g - 1, 0)
+        expected[0] = 0.0
+        return expected
+
+    def within_k_distribution(self, ks) -> Dict[int, Dict[str, float]]:
+        """Observed vs uniform-random share (and count) of repeats with gap <= k"""
+        positive = self.gaps[self.gaps > 0]
+        expected_cum = np.cumsum(self.expected_gap_counts())
+        total_expected = expected_cum[-1] if len(expected_cum) else 0.0
+
+        result = {}
+        for k in ks:
+            k = int(k)
+            count = int((positive <= k).sum())
+            expected = float(expected_cum[min(k, len(expected_cum) - 1)]) if len(expected_cum) else 0.0
+            result[k] = {'count': count,
+                         'observed': count / len(positive) if len(positive) else 0.0,
+                         'expected_count': expected,
+                         'expected': float(expected / total_expected) if total_expected else 0.0}
+        return result
+
+    def number_summary(self, num) -> Dict[str, float]:
+        """Repeat distances of one number"""
+        n = int(num)
+        gaps = self.gaps[self.gap_offsets[n]:self.gap_offsets[n + 1]]
+        return {'repeats': int(len(gaps)),
+                'min_gap': int(gaps.min()) if len(gaps) else None,
+                'mean_gap': float(gaps.mean()) if len(gaps) else None,
+                'expected_mean_gap': float(1.0 / self.hit_probability)}
+
+    def mean_gaps(self) -> np.ndarray:
+        """(10000,) mean repeat distance of every number (nan if it never repeated)"""
+        totals = np.bincount(self.gap_number, weights=self.gaps, minlength=NUM_SPACE)
+        counts = np.diff(self.gap_offsets)
+        return np.divide(totals, counts, out=np.full(NUM_SPACE, np.nan), where=counts > 0)
+
+    def autocorrelations(self, max_lag: int = 10) -> Dict[str, np.ndarray]:
+        """Lag 1..max_lag autocorrelation of per-draw digit-sum totals and even-number counts
+
+        Under independent draws every value is ~0 with standard error
+        about 1 / sqrt(draws), given as 'expected_se'.
+        """
+        return {'sum': autocorrelation(self.draw_sums, max_lag),
+                'even': autocorrelation(self.draw_even, max_lag),
+                'expected_se': np.full(max_lag, 1.0 / np.sqrt(max(self.draw_count, 1)))}
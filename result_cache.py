@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import os
+import sys
+import json
+import zlib
+import pickle
+import glob
+import hashlib
+import tempfile
+import contextlib
+import numpy as np
+from io import StringIO
+
+from toto_core import PRIZE_COLUMNS
+
+# Bump when the layout of a cached value changes, so old entries are never read back
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get('TOTO_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'toto4d'))
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def source_fingerprint(directory: str = os.path.dirname(os.path.abspath(__file__))) -> str:
+    """sha256 over the bytes of the analysis modules (every .py file next to this one)"""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(directory, '*.py'))):
+        digest.update(os.path.basename(path).encode('utf-8') + b'\0')
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Computed once at import: editing or updating the code changes every key
+SOURCE_FINGERPRINT = source_fingerprint()
+
+# One draw as hashed: the day number, then the 23 numbers (-1 = missing)
+_ROW = np.dtype([('date', '<i8'), ('numbers', '<i2', (PRIZE_COLUMNS,))])
+
+
+def optional_cache(directory: str = None):
+    """ResultCache in `directory` or $TOTO_CACHE_DIR; None (no disk writes) when neither is set or usable"""
+    directory = directory or os.environ.get('TOTO_CACHE_DIR')
+    if not directory:
+        return None
+    try:
+        return ResultCache(directory)
+    except OSError:
+        return None
+
+
+def file_hash(path: str) -> str:
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetHasher:
+    """Content hash of (dates, draws) that can be extended one draw at a time
+
+    Draws are hashed in order as fixed-width records, so hashing N draws
+    and then appending one gives the same digest as hashing all N + 1 at
+    once: a loaded file and the same history grown by append_draw() share
+    their cache entries, and any other change gives a new hash.
+    """
+
+    def __init__(self, dates=None, draws=None):
+        self._digest = hashlib.sha256(b'toto-draws-v1')
+        if draws is not None and len(draws):
+            self.update(dates, draws)
+
+    def update(self, dates, draws):
+        rows = np.empty(len(draws), dtype=_ROW)
+        rows['date'] = np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+        rows['numbers'] = draws
+        self._digest.update(rows.tobytes())
+        return self
+
+    def append(self, date, draw_row):
+        return self.update(np.array([date if date is not None else 'NaT'], dtype='datetime64[D]'),
+                           np.asarray(draw_row, dtype=np.int16).reshape(1, PRIZE_COLUMNS))
+
+    def copy(self):
+        other = DatasetHasher()
+        other._digest = self._digest.copy()
+        return other
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def dataset_hash(dates, draws) -> str:
+    return DatasetHasher(dates, draws).hexdigest()
+
+
+class _Tee:
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+        return len(text)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
+
+
+@contextlib.contextmanager
+def tee_stdout():
+    """Keep printing while also recording stdout (the console part of a cached result)"""
+    buffer = StringIO()
+    with contextlib.redirect_stdout(_Tee(sys.stdout, buffer)):
+        yield buffer
+
+
+class ResultCache:
+    """On-disk cache of analysis results, addressed by content
+
+    The key of a result is the sha256 of (source fingerprint, dataset hash,
+    analysis name, parameters, seed), so appending draws, changing any
+    parameter or editing the analysis code simply misses; nothing has to
+    be invalidated by hand. Values are pickled and
+    zlib-compressed, one file per entry, written atomically. A hit touches
+    the file's mtime and puts past `max_bytes` evict the least recently
+    used entries.
+    """
+
+    SUFFIX = '.pkl.z'
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(dataset: str, name: str, params=None, seed=None) -> str:
+        payload = json.dumps([CACHE_VERSION, SOURCE_FINGERPRINT, dataset, name, params, seed], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            # truncated or unreadable entry: drop it and recompute
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+            self.misses += 1
+            return default
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        if len(blob) > self.max_bytes:
+            return False
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self.evict()
+        return True
+
+    def cached(self, dataset: str, name: str, compute, params=None, seed=None):
+        """compute() once per (dataset, name, params, seed); later calls read it back"""
+        key = self.key(dataset, name, params, seed)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        """[(mtime, size, path)] of every cached value, oldest first"""
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.SUFFIX):
+                    with contextlib.suppress(OSError):
+                        st = entry.stat()
+                        found.append((st.st_mtime, st.st_size, entry.path))
+        return sorted(found)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: int = None):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                total -= size
+                removed += 1
+        return removed
+
+    def clear(self):
+        return self.evict(0)
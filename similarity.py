@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import itertools
+import math
+import numpy as np
+from typing import Dict, List
+
+from toto_core import NUM_SPACE, COLUMN_TIER, TIER_NAMES, digit_matrix, number_histogram
+
+# Every subset of the 4 digit positions, grouped by size
+_SUBSETS = {size: list(itertools.combinations(range(4), size)) for size in range(5)}
+
+
+def _agree_totals(hist: np.ndarray) -> np.ndarray:
+    """T[j, x] = sum over position sets S with |S| = j of #draws agreeing with x on S"""
+    cube = hist.reshape(10, 10, 10, 10).astype(np.int64)
+    totals = np.zeros((5, NUM_SPACE), dtype=np.int64)
+
+    for size, subsets in _SUBSETS.items():
+        for keep in subsets:
+            drop = tuple(p for p in range(4) if p not in keep)
+            marginal = cube.sum(axis=drop, keepdims=True)
+            totals[size] += np.broadcast_to(marginal, cube.shape).ravel()
+
+    return totals
+
+
+def hamming_counts(hist: np.ndarray, max_distance: int = 2) -> np.ndarray:
+    """(10000, max_distance + 1) counts of drawn numbers at exact Hamming distance 0..k
+
+    Works from the number histogram alone: summing the marginals over
+    every set of kept positions gives T_j = sum_i C(i, j) E_i where E_i is
+    the count agreeing in exactly i positions, and the triangular system
+    is solved from i = 4 down. Cost is independent of the number of draws.
+    """
+    totals = _agree_totals(hist)
+    exact = np.zeros((5, NUM_SPACE), dtype=np.int64)
+
+    for agree in range(4, -1, -1):
+        exact[agree] = totals[agree]
+        for higher in range(agree + 1, 5):
+            exact[agree] -= math.comb(higher, agree) * exact[higher]
+
+    # distance d == agreeing in 4 - d positions
+    return exact[::-1][:max_distance + 1].T.copy()
+
+
+class HammingEngine:
+    """Hamming-distance neighbourhood of every number over any draw window"""
+
+    def __init__(self, dates: np.ndarray, draws: np.ndarray):
+        self.dates = dates.astype('datetime64[D]')
+        self.draws = draws
+        self.digits = digit_matrix(draws)
+
+    def counts(self, start: int = 0, stop: int = None, max_distance: int = 2) -> np.ndarray:
+        """(10000, k + 1) historical draws at distance 0..k, for draws[start:stop]"""
+        return hamming_counts(number_histogram(self.draws[start:stop]), max_distance)
+
+    def within(self, distance: int, start: int = 0, stop: int = None) -> np.ndarray:
+        """Historical draws within `distance` of every number"""
+        return self.counts(start, stop, distance).sum(axis=1)
+
+    def nearest(self, num, k: int = 10, start: int = 0, stop: int = None) -> List[Dict]:
+        """k nearest historical hits of one number, most recent first on ties"""
+        query = digit_matrix(np.array([int(num)], dtype=np.int16))[0]
+        stop = len(self.draws) if stop is None else stop
+
+        draws = self.draws[start:stop]
+        valid = draws >= 0
+        distance = (self.digits[start:stop] != query).sum(axis=2)
+        distance = np.where(valid, distance, 5)
+
+        flat = distance.ravel()
+        k = min(k, int(valid.sum()))
+        candidates = np.argpartition(flat, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.int64)
+        cutoff = flat[candidates].max() if k > 0 else 0
+
+        # keep every tie at the cutoff so recency can break them
+        pool = np.nonzero(flat <= cutoff)[0]
+        order = np.lexsort((-pool, flat[pool]))[:k]
+        picked = pool[order]
+
+        rows, cols = np.divmod(picked, draws.shape[1])
+        return [{
+            'number': f"{draws[r, c]:04d}",
+            'distance': int(flat[i]),
+            'date': str(self.dates[start + r]),
+            'tier': TIER_NAMES[COLUMN_TIER[c]],
+        } for i, r, c in zip(picked, rows, cols)]
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import math
+import numpy as np
+from typing import Dict, List, Tuple
+
+from toto_core import NUM_SPACE, PLACE, digit_matrix, iter_draw_chunks, number_histogram
+
+# Key namespaces, packed into the high bits of an int64 key
+KIND_NUMBER = 0
+KIND_PERMUTATION = 1
+KIND_PAIR = 2
+KIND_BIGRAM = 3
+KIND_TRIGRAM = 4
+
+KIND_NAMES = {
+    'number': KIND_NUMBER,
+    'permutation': KIND_PERMUTATION,
+    'pair': KIND_PAIR,
+    'bigram': KIND_BIGRAM,
+    'trigram': KIND_TRIGRAM,
+}
+
+_KIND_SHIFT = 40
+_PAIR_I, _PAIR_J = np.triu_indices(23, k=1)
+
+
+def _pack(kind: int, values: np.ndarray) -> np.ndarray:
+    return (np.int64(kind) << _KIND_SHIFT) | values.astype(np.int64)
+
+
+def derived_keys(draws: np.ndarray, kinds=None) -> Dict[int, np.ndarray]:
+    """All stream keys of a (draws, 23) chunk, grouped by kind
+
+    number       the 4D number itself
+    permutation  digits sorted ascending (4211 -> 1124), i.e. its i-box group
+    pair         two numbers drawn together in one draw (lo * 10000 + hi)
+    bigram       2-digit substring at positions 1-2, 2-3, 3-4
+    trigram      3-digit substring at positions 1-3, 2-4
+    """
+    if kinds is None:
+        kinds = list(KIND_NAMES.values())
+
+    valid = draws >= 0
+    nums = draws[valid].astype(np.int64)
+    digits = digit_matrix(draws)[valid].astype(np.int64)
+    keys = {}
+
+    if KIND_NUMBER in kinds:
+        keys[KIND_NUMBER] = _pack(KIND_NUMBER, nums)
+
+    if KIND_PERMUTATION in kinds:
+        keys[KIND_PERMUTATION] = _pack(KIND_PERMUTATION, np.sort(digits, axis=1) @ PLACE.astype(np.int64))
+
+    if KIND_PAIR in kinds:
+        a = draws[:, _PAIR_I].astype(np.int64)
+        b = draws[:, _PAIR_J].astype(np.int64)
+        ok = (a >= 0) & (b >= 0)
+        lo = np.minimum(a, b)[ok]
+        hi = np.maximum(a, b)[ok]
+        keys[KIND_PAIR] = _pack(KIND_PAIR, lo * NUM_SPACE + hi)
+
+    if KIND_BIGRAM in kinds:
+        grams = digits[:, :3] * 10 + digits[:, 1:]
+        keys[KIND_BIGRAM] = _pack(KIND_BIGRAM, grams.ravel())
+
+    if KIND_TRIGRAM in kinds:
+        grams = digits[:, :2] * 100 + digits[:, 1:3] * 10 + digits[:, 2:]
+        keys[KIND_TRIGRAM] = _pack(KIND_TRIGRAM, grams.ravel())
+
+    return keys
+
+
+def format_key(kind: int, value: int) -> str:
+    """Human readable label of an unpacked key"""
+    if kind == KIND_PAIR:
+        return f"{value // NUM_SPACE:04d}+{value % NUM_SPACE:04d}"
+    if kind == KIND_BIGRAM:
+        return f"{value:02d}"
+    if kind == KIND_TRIGRAM:
+        return f"{value:03d}"
+    return f"{value:04d}"
+
+
+class CountMinSketch:
+    """Count-Min sketch over int64 keys
+
+    With width w and depth d every estimate satisfies
+        true <= estimate <= true + (e / w) * N
+    with probability at least 1 - exp(-d), where N is the total count
+    added. Memory is fixed at w * d int64 counters.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 4):
+        self.log_width = max(1, int(math.ceil(math.log2(width))))
+        self.width = 1 << self.log_width
+        self.depth = depth
+        self.table = np.zeros((depth, self.width), dtype=np.int64)
+        self.total = 0
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=depth, dtype=np.uint64)
+
+    @classmethod
+    def from_error(cls, epsilon: float = 1e-4, delta: float = 0.01, seed: int = 4):
+        """Size the sketch so error <= epsilon * N with probability 1 - delta"""
+        width = int(math.ceil(math.e / epsilon))
+        depth = int(math.ceil(math.log(1.0 / delta)))
+        return cls(width, depth, seed)
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    def _hash(self, row: int, keys: np.ndarray) -> np.ndarray:
+        # multiply-shift hashing, uint64 arithmetic wraps mod 2**64
+        h = keys.astype(np.uint64) * self._a[row] + self._b[row]
+        return (h >> np.uint64(64 - self.log_width)).astype(np.int64)
+
+    def add(self, keys: np.ndarray, counts: np.ndarray = None):
+        """Add a batch of keys (optionally with weights)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return self
+
+        for row in range(self.depth):
+            self.table[row] += np.bincount(self._hash(row, keys), weights=counts,
+                                           minlength=self.width).astype(np.int64)
+
+        self.total += int(len(keys) if counts is None else np.sum(counts))
+        return self
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        """Upper-bound count estimate for each key"""
+        keys = np.atleast_1d(np.asarray(keys, dtype=np.int64))
+        est = np.full(len(keys), np.iinfo(np.int64).max, dtype=np.int64)
+
+        for row in range(self.depth):
+            est = np.minimum(est, self.table[row, self._hash(row, keys)])
+
+        return est
+
+    def error_bound(self) -> float:
+        """Additive error that holds with probability 1 - delta"""
+        return self.epsilon * self.total
+
+
+class SpaceSaving:
+    """Space-Saving top-K summary with at most `capacity` counters
+
+    Every key with true count > N / capacity is guaranteed to be tracked,
+    and each tracked count overestimates the truth by at most its `error`
+    (which is itself <= N / capacity). Batches are folded in with the
+    mergeable-summary rule, so a chunk costs one sort instead of a Python
+    loop per key.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+        self.total = 0
+
+    def add(self, keys: np.ndarray):
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return self
+
+        batch_keys, batch_counts = np.unique(keys, return_counts=True)
+        floor = int(self.counts.min()) if len(self.keys) >= self.capacity else 0
+
+        merged, inverse = np.unique(np.concatenate([self.keys, batch_keys]), return_inverse=True)
+        old_pos = inverse[:len(self.keys)]
+        new_pos = inverse[len(self.keys):]
+
+        counts = np.full(len(merged), floor, dtype=np.int64)
+        errors = np.full(len(merged), floor, dtype=np.int64)
+        counts[old_pos] = self.counts
+        errors[old_pos] = self.errors
+        counts[new_pos] += batch_counts
+
+        if len(merged) > self.capacity:
+            keep = np.argpartition(-counts, self.capacity - 1)[:self.capacity]
+            merged, counts, errors = merged[keep], counts[keep], errors[keep]
+
+        self.keys, self.counts, self.errors = merged, counts, errors
+        self.total += len(keys)
+        return self
+
+    def top(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        """(key, count, max overestimate) sorted by count"""
+        order = np.lexsort((self.keys, self.errors, -self.counts))[:n]
+        return [(int(self.keys[i]), int(self.counts[i]), int(self.errors[i])) for i in order]
+
+    def guaranteed(self) -> np.ndarray:
+        """Tracked keys whose lower bound beats every untracked key"""
+        if len(self.keys) < self.capacity:
+            return self.keys.copy()
+        floor = self.counts.min()
+        return self.keys[(self.counts - self.errors) > floor]
+
+    def error_bound(self) -> float:
+        return self.total / self.capacity
+
+
+class DrawStreamSketch:
+    """Bounded-memory hot number / pair / n-gram tracker for draw streams
+
+    Per key kind, a Count-Min sketch answers point queries and a
+    Space-Saving summary answers "top hot" queries, so the error bound of
+    one kind is not inflated by the (much larger) pair stream. Memory does
+    not grow with the number of draws or files consumed.
+    """
+
+    def __init__(self, capacity: int = 1000, width: int = 1 << 15, depth: int = 4, kinds=None):
+        if kinds is None:
+            kinds = list(KIND_NAMES.keys())
+
+        self.kinds = [KIND_NAMES[k] for k in kinds]
+        self.count_min = {kind: CountMinSketch(width, depth, seed=4 + kind) for kind in self.kinds}
+        self.top_k = {kind: SpaceSaving(capacity) for kind in self.kinds}
+        self.draw_count = 0
+
+    def consume(self, draws: np.ndarray):
+        """Fold one (draws, 23) chunk into the sketches"""
+        for kind, keys in derived_keys(draws, self.kinds).items():
+            self.count_min[kind].add(keys)
+            self.top_k[kind].add(keys)
+
+        self.draw_count += len(draws)
+        return self
+
+    def consume_files(self, file_paths, chunk_size: int = 2000):
+        """Stream one or many operators' archives through the sketches"""
+        for _, draws in iter_draw_chunks(file_paths, chunk_size):
+            self.consume(draws)
+        return self
+
+    def top(self, kind: str = 'number', n: int = 10) -> List[Tuple[str, int, int]]:
+        """Top-n hot keys of one kind as (label, count, max overestimate)"""
+        kind_id = KIND_NAMES[kind]
+        mask = (np.int64(1) << _KIND_SHIFT) - 1
+        return [(format_key(kind_id, key & mask), count, err)
+                for key, count, err in self.top_k[kind_id].top(n)]
+
+    def estimate(self, kind: str, values) -> np.ndarray:
+        """Count-Min estimate for raw values of one kind (e.g. numbers as ints)"""
+        kind_id = KIND_NAMES[kind]
+        values = np.atleast_1d(np.asarray(values, dtype=np.int64))
+        return self.count_min[kind_id].estimate(_pack(kind_id, values))
+
+    def error_bounds(self) -> Dict[str, Dict[str, float]]:
+        """Documented worst-case additive errors per key kind for the current stream"""
+        bounds = {}
+        for name, kind in KIND_NAMES.items():
+            if kind in self.top_k:
+                bounds[name] = {
+                    'count_min': self.count_min[kind].error_bound(),
+                    'count_min_confidence': 1 - self.count_min[kind].delta,
+                    'space_saving': self.top_k[kind].error_bound(),
+                }
+        return bounds
+
+    def memory_bytes(self) -> int:
+        tables = sum(cm.table.nbytes for cm in self.count_min.values())
+        summaries = sum(s.keys.nbytes + s.counts.nbytes + s.errors.nbytes for s in self.top_k.values())
+        return tables + summaries
+
+
+def check_against_exact(sketch: DrawStreamSketch, draws: np.ndarray, n: int = 20) -> Dict:
+    """Compare the number sketches with the exact histogram of the same draws"""
+    exact = number_histogram(draws)
+    exact_top = set(np.argsort(-exact, kind='stable')[:n].tolist())
+    sketch_top = set(int(label) for label, _, _ in sketch.top('number', n))
+
+    estimates = sketch.estimate('number', np.arange(NUM_SPACE))
+    over = estimates - exact
+
+    return {
+        'top_n': n,
+        'top_n_recall': len(exact_top & sketch_top) / n,
+        'count_min_max_error': int(over.max()),
+        'count_min_mean_error': float(over.mean()),
+        'count_min_underestimates': int((over < 0).sum()),
+        'count_min_bound': sketch.count_min[KIND_NUMBER].error_bound(),
+    }
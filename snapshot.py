@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import functools
+import threading
+import contextlib
+import contextvars
+import numpy as np
+
+# Snapshot pinned by the running method, per thread / asyncio task: {store: snapshot}
+_PINNED = contextvars.ContextVar('pinned_snapshots', default={})
+
+
+class Snapshot:
+    """Immutable bundle of one version of a dataset and everything derived from it
+
+    Fields are set once in the constructor and numpy fields become
+    read-only; a changed dataset is a new snapshot built with replace().
+    `memo` is the only mutable part: lazily computed values that depend on
+    this snapshot alone, so two readers filling the same key can only
+    store equal values.
+    """
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_fields', tuple(fields))
+        object.__setattr__(self, 'memo', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"snapshots are immutable, use replace({name}=...)")
+
+    def __delattr__(self, name):
+        raise AttributeError("snapshots are immutable")
+
+    def replace(self, **changes) -> 'Snapshot':
+        """A new snapshot with some fields changed (the memo starts empty)"""
+        fields = {name: getattr(self, name) for name in self._fields}
+        fields.update(changes)
+        return type(self)(**fields)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class SnapshotStore:
+    """Holds the current snapshot of one analyzer
+
+    Readers never lock: they take the current snapshot (one attribute read)
+    and, inside a method decorated with @reads, keep using that same
+    snapshot even if a writer swaps in a new one meanwhile. Writers are
+    serialized by a (re-entrant) lock so two updates never build on the
+    same old snapshot and lose one of them.
+    """
+
+    def __init__(self, initial: Snapshot):
+        self._current = initial
+        self._write_lock = threading.RLock()
+
+    def current(self) -> Snapshot:
+        return _PINNED.get().get(self, self._current)
+
+    @contextlib.contextmanager
+    def pin(self):
+        """Use one snapshot for the whole block (nested pins reuse the outer one)"""
+        pinned = _PINNED.get()
+        if self in pinned:
+            yield pinned[self]
+            return
+        snapshot = self._current
+        token = _PINNED.set({**pinned, self: snapshot})
+        try:
+            yield snapshot
+        finally:
+            _PINNED.reset(token)
+
+    @contextlib.contextmanager
+    def writing(self):
+        """Hold off other writers while a new snapshot is derived from the current one"""
+        with self._write_lock:
+            yield self._current
+
+    def swap(self, snapshot: Snapshot):
+        with self._write_lock:
+            self._current = snapshot
+
+    def update(self, build):
+        """Atomically replace the current snapshot with build(current)"""
+        with self._write_lock:
+            self._current = build(self._current)
+            return self._current
+
+
+def reads(method):
+    """Run an analyzer method against one pinned snapshot of its dataset"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._store.pin():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def snapshot_field(name: str, doc: str = None) -> property:
+    """Read-only attribute that resolves to the (pinned or current) snapshot's field"""
+    return property(lambda self: getattr(self._store.current(), name), doc=doc)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import os
+import numpy as np
+
+from bootstrap import bootstrap_hot_cold
+from toto_core import read_draw_matrix
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2001-2026-88.txt')
+
+
+def test_seeded_result_does_not_depend_on_workers():
+    draws = read_draw_matrix(DATA)[1]
+    one, two = (bootstrap_hot_cold(draws, 10, 100, workers, seed=7) for workers in (1, 2))
+    for name in ('hot_stability', 'cold_stability', 'mean', 'std',
+                 'tracked_interval', 'digit_interval', 'digit_stability'):
+        assert np.array_equal(getattr(one, name), getattr(two, name)), name
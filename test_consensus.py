@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import os
+import numpy as np
+
+import consensus
+from toto_core import read_draw_matrix, number_histogram
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2001-2026-88.txt')
+
+
+def _draws():
+    return read_draw_matrix(DATA)[1]
+
+
+def test_rarest_and_digit_merge_into_frequency():
+    names, matrix = consensus.score_matrix(_draws())
+    groups, merged = consensus.merge_redundant(matrix)
+    frequency = names.index("1. Analysis Frequency")
+    group = next(g for g in groups if frequency in g)
+    assert names.index("11. Analysis of the Rarest Numbers") in group
+    assert names.index("2. Analysis Digit") in group
+    # the mirrored scorer is sign-aligned, not cancelled
+    assert np.corrcoef(merged[groups.index(group)], matrix[frequency])[0, 1] > 0.95
+
+
+def test_consensus_responds_to_frequency():
+    draws = _draws()
+    counts = number_histogram(draws)
+    before = consensus.consensus_scores(draws)
+    number = int(np.argsort(counts, kind='stable')[len(counts) // 2])
+
+    # the same history with that number drawn 15 more times, older draws untouched
+    boosted = draws.copy()
+    rows = np.arange(len(draws) - 400, len(draws) - 100, 20)
+    boosted[rows, 22] = number
+    after = consensus.consensus_scores(boosted)
+
+    rank = lambda scores: int((scores > scores[number]).sum())
+    assert rank(after) < rank(before) // 2
+    assert np.corrcoef(after, number_histogram(boosted))[0, 1] > 0.3
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import io
+import os
+import asyncio
+import pytest
+
+from ticket_checker import clean_tickets, read_tickets
+from prediction_service import PredictionService, HTTPError
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2001-2026-88.txt')
+MALFORMED = ['12²', '١٢٣', '12345', '-12', '1.5', '']
+
+
+def test_clean_tickets_keeps_ascii_digits_only():
+    assert clean_tickets(['7', ' 123 ', '4567', *MALFORMED]) == ['0007', '0123', '4567']
+
+
+def test_read_tickets_skips_malformed_tokens():
+    source = io.StringIO("12² 0042\n١٢٣,9999\n")
+    (tickets, numbers), = read_tickets(source)
+    assert tickets == ['0042', '9999']
+    assert numbers.tolist() == [42, 9999]
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = PredictionService({'88': DATA}, workers=0, cache_dir=None)
+    yield service
+    service.close()
+
+
+def test_check_rejects_malformed_ticket(service):
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(service.check({'tickets': '12²'}))
+    assert error.value.status == 400
+    result = asyncio.run(service.check({'tickets': ['12²', '42']}))
+    assert [t['ticket'] for t in result['tickets']] == ['0042']
+
+
+def test_ticket_history_check_skips_malformed_ticket(service):
+    hits = service.datasets['88'].analyzer.ticket_history_check(['12²', '0042'])
+    assert len(hits.summary()) == 1
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import re
+import sys
+import argparse
+import numpy as np
+from typing import Iterator, List, Tuple
+
+from toto_core import COLUMN_TIER, TIER_NAMES, read_draw_matrix
+from occurrence_index import OccurrenceIndex
+
+
+_TICKET = re.compile(r'[0-9]{1,4}')
+
+
+def clean_tickets(tokens) -> List[str]:
+    """Keep the 1-4 digit tokens (ASCII 0-9 only), zero-padded to 4 digits"""
+    tokens = (str(t).strip() for t in tokens)
+    return [t.zfill(4) for t in tokens if _TICKET.fullmatch(t)]
+
+
+def read_tickets(source, chunk_size: int = 100000) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Stream tickets from a file path, '-' (stdin) or an open file
+
+    Tickets may be one per line or separated by commas / whitespace.
+    Yields (ticket strings, int numbers) chunks; anything that is not a
+    1-4 digit number is skipped.
+    """
+    if source == '-':
+        handle, close = sys.stdin, False
+    elif isinstance(source, str):
+        handle, close = open(source, 'r'), True
+    else:
+        handle, close = source, False
+
+    try:
+        batch = []
+        for line in handle:
+            batch.extend(clean_tickets(line.replace(',', ' ').split()))
+            if len(batch) >= chunk_size:
+                yield batch, np.array(batch, dtype=np.int64)
+                batch = []
+        if batch:
+            yield batch, np.array(batch, dtype=np.int64)
+    finally:
+        if close:
+            handle.close()
+
+
+class TicketHits:
+    """Columnar result of one batch check: one row per (ticket, historical hit)"""
+
+    def __init__(self, tickets: List[str], ticket: np.ndarray, number: np.ndarray,
+                 draw: np.ndarray, column: np.ndarray, dates: np.ndarray):
+        self.tickets = tickets
+        self.ticket = ticket
+        self.number = number
+        self.draw = draw
+        self.column = column
+        self.dates = dates
+
+    def __len__(self):
+        return len(self.ticket)
+
+    @property
+    def tier(self) -> np.ndarray:
+        return COLUMN_TIER[self.column]
+
+    def summary(self) -> np.ndarray:
+        """(tickets, 5) hit counts per prize tier"""
+        flat = self.ticket * len(TIER_NAMES) + self.tier
+        counts = np.bincount(flat, minlength=len(self.tickets) * len(TIER_NAMES))
+        return counts.reshape(len(self.tickets), len(TIER_NAMES))
+
+    def rows(self):
+        """(ticket, drawn number, date, tier) tuples in ticket order"""
+        dates = self.dates[self.draw].astype(str).tolist()
+        tiers = self.tier.tolist()
+        numbers = self.number.tolist()
+        for t, n, d, tier in zip(self.ticket.tolist(), numbers, dates, tiers):
+            yield self.tickets[t], f"{n:04d}", d, TIER_NAMES[tier]
+
+
+def check_tickets(index: OccurrenceIndex, tickets: List[str], numbers: np.ndarray,
+                  permutation: bool = False) -> TicketHits:
+    """Every historical hit of every ticket in one vectorized join"""
+    if permutation:
+        positions, query = index.gather_permutations(numbers)
+    else:
+        positions, query = index.gather(numbers)
+
+    return TicketHits(tickets, query, index.number[positions].astype(np.int64),
+                      index.draw[positions], index.column[positions], index.dates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ticket numbers against the whole draw history")
+    parser.add_argument('data', help="Draw_Date,01..23 data file")
+    parser.add_argument('tickets', nargs='?', default='-', help="ticket file, '-' for stdin (default)")
+    parser.add_argument('--perm', action='store_true', help="count any permutation of the digits as a hit")
+    parser.add_argument('--summary', action='store_true', help="one line per ticket with hits per tier")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    dates, draws = read_draw_matrix(args.data)
+    index = OccurrenceIndex(dates, draws)
+    out = sys.stdout
+
+    if args.summary:
+        out.write("ticket,hits," + ",".join(TIER_NAMES) + "\n")
+    else:
+        out.write("ticket,number,date,tier\n")
+
+    for tickets, numbers in read_tickets(args.tickets, args.chunk_size):
+        hits = check_tickets(index, tickets, numbers, args.perm)
+
+        if args.summary:
+            counts = hits.summary()
+            lines = [f"{t},{row.sum()}," + ",".join(str(c) for c in row) for t, row in zip(tickets, counts)]
+        else:
+            lines = [",".join(row) for row in hits.rows()]
+
+        if lines:
+            out.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# github.com/rouze-d
+
+import numpy as np
+from datetime import datetime
+from typing import Tuple
+
+# 4D number space and draw layout (01-03 prizes, 04-13 special, 14-23 consolation)
+NUM_SPACE = 10000
+PRIZE_COLUMNS = 23
+TIER_NAMES = ['1st', '2nd', '3rd', 'Special', 'Consolation']
+COLUMN_TIER = np.array([0, 1, 2] + [3] * 10 + [4] * 10, dtype=np.int8)
+
+# Place value of each digit position, so digits @ PLACE == number
+PLACE = np.array([1000, 100, 10, 1], dtype=np.int16)
+
+
+def parse_number(value) -> int:
+    """Convert one raw cell to an int 0-9999, or -1 when it is not a 4D number"""
+    num_str = str(value).strip()
+    if num_str.isdigit() and len(num_str) <= 4:
+        return int(num_str)
+    return -1
+
+
+def read_draw_matrix(file_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Read a Draw_Date,01..23 file into (dates, draws)
+
+    dates is datetime64[D] with one entry per draw, draws is an int16
+    (draws, 23) matrix where -1 marks a missing or invalid number.
+    """
+    chunks = list(iter_draw_chunks(file_path))
+    if not chunks:
+        return np.array([], dtype='datetime64[D]'), np.empty((0, PRIZE_COLUMNS), dtype=np.int16)
+
+    dates = np.concatenate([c[0] for c in chunks])
+    draws = np.concatenate([c[1] for c in chunks])
+
+    order = np.argsort(dates, kind='stable')
+    return dates[order], draws[order]
+
+
+def iter_draw_chunks(file_paths, chunk_size: int = 10000):
+    """Stream (dates, draws) chunks from one or more Draw_Date,01..23 files
+
+    Only `chunk_size` draws are held at a time, so arbitrarily long or
+    concatenated archives can be consumed with bounded memory. Files are
+    read in the order given, chunks are not re-sorted across files.
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+
+    for file_path in file_paths:
+        dates = []
+        rows = []
+
+        with open(file_path, 'r') as f:
+            for line in f:
+                if line.startswith('Draw_Date') or line.strip() == '':
+                    continue
+
+                parts = line.strip().split(',')
+                if len(parts) < PRIZE_COLUMNS + 1:
+                    continue
+
+                try:
+                    dates.append(datetime.strptime(parts[0], '%Y-%m-%d'))
+                except ValueError:
+                    continue
+                rows.append([parse_number(p) for p in parts[1:PRIZE_COLUMNS + 1]])
+
+                if len(rows) >= chunk_size:
+                    yield np.array(dates, dtype='datetime64[D]'), np.array(rows, dtype=np.int16)
+                    dates = []
+                    rows = []
+
+        if rows:
+            yield np.array(dates, dtype='datetime64[D]'), np.array(rows, dtype=np.int16)
+
+
+def frame_to_draw_matrix(frame, number_columns) -> np.ndarray:
+    """Build the (draws, 23) int16 matrix from an already loaded DataFrame"""
+    import pandas as pd
+
+    draws = np.full((len(frame), PRIZE_COLUMNS), -1, dtype=np.int16)
+
+    for col_idx, col in enumerate(number_columns[:PRIZE_COLUMNS]):
+        values = pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=float)
+        valid = np.isfinite(values) & (values >= 0) & (values < NUM_SPACE) & (values == np.floor(values))
+        draws[valid, col_idx] = values[valid].astype(np.int16)
+
+    return draws
+
+
+def digit_matrix(draws: np.ndarray) -> np.ndarray:
+    """Split numbers into digits: (..., 4) uint8, missing numbers become 0s"""
+    nums = np.where(draws >= 0, draws, 0).astype(np.int16)
+    digits = np.empty(nums.shape + (4,), dtype=np.uint8)
+
+    for pos in range(4):
+        digits[..., pos] = (nums // PLACE[pos]) % 10
+
+    return digits
+
+
+def date_parts(dates: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(weekday Mon=0, month 1-12, year) of a datetime64 array"""
+    days = np.asarray(dates).astype('datetime64[D]')
+    # 1970-01-01 was a Thursday
+    weekday = (days.astype(np.int64) + 3) % 7
+    month = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    year = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    return weekday, month, year
+
+
+def number_histogram(draws: np.ndarray) -> np.ndarray:
+    """Count of every number 0000-9999 over the given draws"""
+    flat = draws.ravel()
+    return np.bincount(flat[flat >= 0], minlength=NUM_SPACE)
+
+
+def all_numbers() -> np.ndarray:
+    """Every 4D number as a U4 string array, indexed by its integer value"""
+    return np.char.zfill(np.arange(NUM_SPACE).astype('U4'), 4)